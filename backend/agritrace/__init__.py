@@ -1,6 +1,7 @@
 # AGRITRACE Backend Application
 __version__ = '1.0.0'
 
-# Celery app initialization (commented out for now)
-# from .celery import app as celery_app
-# __all__ = ('celery_app',)
+# Celery app initialization
+from .celery import app as celery_app
+
+__all__ = ('celery_app',)
@@ -0,0 +1,19 @@
+"""
+ASGI config for AGRITRACE project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server (e.g. gunicorn -k uvicorn.workers.UvicornWorker)
+together with BLOCKCHAIN_ASYNC_VIEWS=True to run the blockchain read
+endpoints as async views.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'agritrace.settings')
+
+application = get_asgi_application()
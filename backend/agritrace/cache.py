@@ -0,0 +1,51 @@
+"""
+Shared caching helpers for AGRITRACE
+"""
+import time
+from django.core.cache import cache
+
+
+def get_or_revalidate(key, compute, fresh_for, stale_for, lock_timeout=30, wait_timeout=5):
+    """
+    Cache a computed value with stale-while-revalidate semantics
+
+    Fresh values are returned as is. Once a value goes stale, a single caller
+    (holding a cache lock) recomputes it while every other caller keeps
+    getting the stale value. On a cold cache the other callers wait for the
+    lock holder's result instead of repeating the computation.
+
+    Args:
+        key: Cache key
+        compute: Callable producing the value
+        fresh_for: Seconds a value is served without revalidation
+        stale_for: Extra seconds a stale value may still be served
+        lock_timeout: Seconds after which an abandoned lock expires
+        wait_timeout: Seconds to wait for another caller on a cold cache
+    """
+    lock_key = f'{key}:lock'
+
+    def refresh():
+        try:
+            value = compute()
+            cache.set(key, (value, time.time() + fresh_for), fresh_for + stale_for)
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    entry = cache.get(key)
+    if entry is not None:
+        value, fresh_until = entry
+        if time.time() >= fresh_until and cache.add(lock_key, True, lock_timeout):
+            return refresh()
+        return value
+
+    if cache.add(lock_key, True, lock_timeout):
+        return refresh()
+
+    deadline = time.time() + wait_timeout
+    while time.time() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+    return compute()
@@ -18,14 +18,42 @@ app.autodiscover_tasks()
 
 # Periodic tasks configuration
 app.conf.beat_schedule = {
-    'sync-blockchain-daily': {
+    'sync-blockchain-events': {
         'task': 'blockchain.tasks.sync_blockchain_data',
-        'schedule': crontab(hour=2, minute=0),  # Run at 2 AM daily
+        'schedule': 60.0,  # Index newly confirmed contract events every minute
+    },
+    'reconcile-blockchain-jobs': {
+        'task': 'blockchain.tasks.reconcile_blockchain_jobs',
+        'schedule': 15.0,  # Pick up receipts of submitted transactions
+    },
+    'sweep-blockchain-jobs': {
+        'task': 'blockchain.tasks.sweep_blockchain_jobs',
+        'schedule': 60.0,  # Re-dispatch jobs whose task was lost
+    },
+    'anchor-pending-records': {
+        'task': 'blockchain.tasks.anchor_pending_records',
+        'schedule': 60.0,  # Anchors once a batch is full or overdue
+    },
+    'send-queued-sms': {
+        'task': 'ussd.tasks.send_queued_sms',
+        'schedule': 30.0,  # Sends messages whose wake-up was lost, and due retries
+    },
+    'flush-user-activity': {
+        'task': 'users.tasks.flush_user_activity',
+        'schedule': 10.0,  # Writes buffered activity that did not fill a batch
     },
     'generate-daily-reports': {
         'task': 'analytics.tasks.generate_daily_reports',
         'schedule': crontab(hour=6, minute=0),  # Run at 6 AM daily
     },
+    'maintain-partitions': {
+        'task': 'analytics.tasks.maintain_partitions',
+        'schedule': crontab(hour=2, minute=30),  # Partitions of the coming months
+    },
+    'compact-raw-history': {
+        'task': 'analytics.tasks.compact_raw_history',
+        'schedule': crontab(hour=4, minute=0),  # Fold expired raw rows into rollups
+    },
     'cleanup-expired-sessions': {
         'task': 'users.tasks.cleanup_expired_sessions',
         'schedule': crontab(hour=3, minute=0),  # Run at 3 AM daily
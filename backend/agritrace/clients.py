@@ -0,0 +1,90 @@
+"""
+Lazily built, per-process clients for external services
+"""
+import os
+import threading
+from django.utils.module_loading import import_string
+
+
+class LazyClient:
+    """
+    Proxy that builds its client on first use
+
+    Importing a module that exposes a client costs nothing until an
+    attribute is read, so management commands and Celery workers that
+    never touch the service never pay for it. The client is rebuilt in a
+    forked child (e.g. gunicorn --preload workers) instead of sharing the
+    parent's connections.
+    """
+
+    def __init__(self, name, factory):
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_lock', threading.Lock())
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_pid', None)
+
+    def _get_instance(self):
+        instance = self._instance
+        if instance is not None and self._pid == os.getpid():
+            return instance
+        with self._lock:
+            if self._instance is None or self._pid != os.getpid():
+                factory = self._factory
+                if isinstance(factory, str):
+                    factory = import_string(factory)
+                object.__setattr__(self, '_instance', factory())
+                object.__setattr__(self, '_pid', os.getpid())
+            return self._instance
+
+    def _reset(self):
+        """Drop the built client; the next attribute access builds a new one"""
+        object.__setattr__(self, '_lock', threading.Lock())
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_pid', None)
+
+    @property
+    def is_initialized(self):
+        return self._instance is not None and self._pid == os.getpid()
+
+    def __getattr__(self, name):
+        return getattr(self._get_instance(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._get_instance(), name, value)
+
+    def __delattr__(self, name):
+        delattr(self._get_instance(), name)
+
+    def __repr__(self):
+        state = 'initialized' if self.is_initialized else 'not initialized'
+        return f'<LazyClient {self._name} ({state})>'
+
+
+# Client name -> LazyClient
+registry = {}
+
+
+def lazy_client(name, factory):
+    """
+    Register a client built on first use
+
+    Args:
+        name: Registry name of the client
+        factory: Callable or dotted path of a callable returning the client
+    """
+    client = registry.get(name)
+    if client is None:
+        client = registry[name] = LazyClient(name, factory)
+    return client
+
+
+def reset_clients():
+    """Forget every built client, e.g. after a fork or in tests"""
+    for client in registry.values():
+        client._reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    # A lock held by another thread at fork time would stay locked forever
+    os.register_at_fork(after_in_child=reset_clients)
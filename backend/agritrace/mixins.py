@@ -0,0 +1,128 @@
+"""
+Shared view mixins for AGRITRACE API
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from .serializers import sparse_fieldsets_requested
+
+
+def plan_eager_loading(serializer, model, prefix='', prefetch=False):
+    """
+    Walk the fields of a serializer and collect the relations and columns it reads
+
+    Args:
+        serializer: Serializer instance whose fields are inspected
+        model: Model class the serializer reads from
+        prefix: Lookup prefix of the serializer relative to the queryset
+        prefetch: Whether the serializer already sits behind a to-many relation
+
+    Returns:
+        Tuple of (select_related, prefetch_related, only) lookup lists. `only`
+        is None when some field reads something other than a model column,
+        in which case the queryset cannot safely be narrowed.
+    """
+    select_related = []
+    prefetch_related = []
+    only = []
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            only = None
+            continue
+
+        # Resolve the (possibly dotted) source to a chain of model fields
+        related_model = model
+        model_field = None
+        to_many = prefetch
+        for attr in field.source_attrs:
+            try:
+                model_field = related_model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                model_field = None
+                break
+            if not model_field.is_relation:
+                related_model = None
+                break
+            to_many = to_many or model_field.one_to_many or model_field.many_to_many
+            related_model = model_field.related_model
+
+        lookup = prefix + '__'.join(field.source_attrs)
+        if model_field is None or (related_model is None and len(field.source_attrs) > 1):
+            only = None
+            continue
+        if related_model is None:
+            if only is not None:
+                only.append(lookup)
+            continue
+
+        many = isinstance(field, (serializers.ListSerializer, serializers.ManyRelatedField))
+        if isinstance(field, serializers.ListSerializer):
+            nested = field.child
+        elif isinstance(field, serializers.BaseSerializer):
+            nested = field
+        else:
+            nested = None
+
+        if to_many or many:
+            prefetch_related.append(lookup)
+        elif nested is not None:
+            select_related.append(lookup)
+        if only is not None and not (to_many or many) and model_field.concrete:
+            only.append(lookup)
+
+        if nested is not None:
+            nested_select, nested_prefetch, nested_only = plan_eager_loading(
+                nested, related_model, prefix=f'{lookup}__', prefetch=to_many or many
+            )
+            select_related.extend(nested_select)
+            prefetch_related.extend(nested_prefetch)
+            if nested_only is None:
+                only = None
+            elif only is not None and not (to_many or many):
+                only.extend(nested_only)
+
+    return select_related, prefetch_related, only
+
+
+class EagerLoadingMixin:
+    """
+    Apply select_related/prefetch_related derived from the view's serializer
+
+    The plan is computed once per serializer class and model, so list
+    endpoints run a constant number of queries regardless of page size.
+    Requests using sparse fieldsets get a fresh plan that also narrows the
+    selected columns with only().
+    """
+    _eager_loading_plans = {}
+
+    def get_eager_loading_plan(self, model):
+        if sparse_fieldsets_requested(self.request):
+            # Plans for client-chosen fieldsets are not memoised
+            return plan_eager_loading(self.get_serializer(), model)
+
+        key = (self.get_serializer_class(), model)
+        plan = self._eager_loading_plans.get(key)
+        if plan is None:
+            plan = plan_eager_loading(self.get_serializer(), model)
+            self._eager_loading_plans[key] = plan
+        return plan
+
+    def optimize_queryset(self, queryset):
+        """Apply the eager loading plan to a queryset"""
+        select_related, prefetch_related, only = self.get_eager_loading_plan(queryset.model)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        if only and sparse_fieldsets_requested(self.request):
+            # Keyset paginators read the ordering column from every row
+            cursor_ordering = getattr(self, 'cursor_ordering', None)
+            if cursor_ordering:
+                only = only + [cursor_ordering.lstrip('-')]
+            queryset = queryset.only(*only)
+        return queryset
+
+    def get_queryset(self):
+        return self.optimize_queryset(super().get_queryset())
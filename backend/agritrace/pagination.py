@@ -0,0 +1,167 @@
+"""
+Pagination classes for AGRITRACE API
+"""
+import heapq
+from collections import OrderedDict
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    BasePagination,
+    CursorPagination,
+    Cursor,
+    PageNumberPagination
+)
+from rest_framework.response import Response
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination that always walks the view's indexed ordering
+
+    The cursor only encodes a position in that ordering, so it stays valid
+    when the client changes its filters between pages.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', None) or self.ordering
+        if isinstance(ordering, str):
+            return (ordering,)
+        return tuple(ordering)
+
+
+class MergedKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination over several querysets merged in Python
+
+    Each stream is read separately in the view's ordering from the cursor
+    position, so every branch can use its own index instead of one OR query
+    that defeats them. Only page_size + 1 rows are pulled from each stream
+    and merged with a k-way merge. Pagination is forward-only.
+    """
+
+    def paginate_streams(self, streams, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.next_position = None
+
+        ordering = self.get_ordering(request, None, view)[0]
+        descending = ordering.startswith('-')
+        field_name = ordering.lstrip('-')
+        model = streams[0].model if streams else None
+
+        cursor = self.decode_cursor(request)
+        position = self.parse_position(cursor, model, field_name) if cursor else None
+
+        order_by = (ordering, '-pk' if descending else 'pk')
+        rows = []
+        for queryset in streams:
+            queryset = queryset.order_by(*order_by)
+            if position is not None:
+                value, pk = position
+                if descending:
+                    queryset = queryset.filter(
+                        Q(**{f'{field_name}__lt': value}) |
+                        Q(**{field_name: value, 'pk__lt': pk})
+                    )
+                else:
+                    queryset = queryset.filter(
+                        Q(**{f'{field_name}__gt': value}) |
+                        Q(**{field_name: value, 'pk__gt': pk})
+                    )
+            rows.append(list(queryset[:self.page_size + 1]))
+
+        merged = heapq.merge(
+            *rows,
+            key=lambda obj: (getattr(obj, field_name), obj.pk),
+            reverse=descending
+        )
+        page = []
+        for obj in merged:
+            page.append(obj)
+            if len(page) > self.page_size:
+                break
+
+        self.has_next = len(page) > self.page_size
+        page = page[:self.page_size]
+        if self.has_next:
+            last = page[-1]
+            self.next_position = f'{getattr(last, field_name).isoformat()}|{last.pk}'
+        return page
+
+    def parse_position(self, cursor, model, field_name):
+        try:
+            value, pk = cursor.position.rsplit('|', 1)
+            return model._meta.get_field(field_name).to_python(value), int(pk)
+        except (AttributeError, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        cursor = Cursor(offset=0, reverse=False, position=self.next_position)
+        return self.encode_cursor(cursor)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', None),
+            ('results', data)
+        ]))
+
+
+class CursorOrPageNumberPagination(BasePagination):
+    """
+    Page number pagination with an opt-in keyset cursor mode
+
+    Views that declare a `cursor_ordering` switch to keyset pagination when
+    the client sends ?pagination=cursor (or a cursor), so deep pages cost
+    the same as the first one. Everything else keeps page numbers.
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    cursor_pagination_class = KeysetPagination
+    page_number_pagination_class = PageNumberPagination
+
+    def __init__(self):
+        self.paginator = self.page_number_pagination_class()
+
+    def use_cursor(self, request, view):
+        if not getattr(view, 'cursor_ordering', None):
+            return False
+        return (
+            request.query_params.get(self.mode_query_param) == self.cursor_mode or
+            self.cursor_pagination_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request, view):
+            self.paginator = self.cursor_pagination_class()
+        else:
+            self.paginator = self.page_number_pagination_class()
+        return self.paginator.paginate_queryset(queryset, request, view=view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.paginator.get_paginated_response_schema(schema)
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+    def get_results(self, data):
+        return self.paginator.get_results(data)
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.paginator, 'display_page_controls', False)
+
+    def get_schema_fields(self, view):
+        return self.paginator.get_schema_fields(view)
+
+    def get_schema_operation_parameters(self, view):
+        return self.paginator.get_schema_operation_parameters(view)
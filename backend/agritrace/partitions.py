@@ -0,0 +1,255 @@
+"""
+Monthly range partitions for append-only tables
+
+PostgreSQL only; on other databases is_partitioned() is always False and
+callers fall back to plain tables.
+"""
+import logging
+import re
+from datetime import date, datetime, time
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(day, months):
+    """First day of the month `months` after the month of day"""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month):
+    """Aware local midnights starting month and the month after it"""
+    return (
+        timezone.make_aware(datetime.combine(month, time.min)),
+        timezone.make_aware(datetime.combine(add_months(month, 1), time.min)),
+    )
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y%m}'
+
+
+def default_partition_name(table):
+    return f'{table}_default'
+
+
+def is_partitioned(table, using=connection):
+    if using.vendor != 'postgresql':
+        return False
+    with using.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)', [table])
+        return cursor.fetchone() is not None
+
+
+def list_partitions(table, using=connection):
+    """
+    Monthly partitions of a table
+
+    Returns:
+        Dict of month (first day) -> partition name, oldest first
+    """
+    pattern = re.compile(rf'^{re.escape(table)}_p(\d{{4}})(\d{{2}})$')
+    with using.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = to_regclass(%s)',
+            [table]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = {}
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return dict(sorted(partitions.items()))
+
+
+def _partition_column(cursor, table):
+    cursor.execute(
+        'SELECT a.attname FROM pg_partitioned_table p '
+        'JOIN pg_attribute a ON a.attrelid = p.partrelid AND a.attnum = p.partattrs[0] '
+        'WHERE p.partrelid = to_regclass(%s)',
+        [table]
+    )
+    return cursor.fetchone()[0]
+
+
+def _create_partition(cursor, quote, table, name, month):
+    """
+    Create the partition of month, moving in the rows the default partition
+    holds for it
+
+    Such rows (a clock far off) would otherwise make PostgreSQL refuse the
+    new partition. The default partition stays locked until the surrounding
+    transaction ends, so no row for the month lands there meanwhile.
+    """
+    bounds = list(month_bounds(month))
+    default = default_partition_name(table)
+    cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [default])
+    if not cursor.fetchone()[0]:
+        cursor.execute(
+            f'CREATE TABLE {quote(name)} PARTITION OF {quote(table)} FOR VALUES FROM (%s) TO (%s)', bounds
+        )
+        return
+
+    column = quote(_partition_column(cursor, table))
+    cursor.execute(f'LOCK TABLE {quote(default)} IN ACCESS EXCLUSIVE MODE')
+    cursor.execute(f'CREATE TABLE {quote(name)} (LIKE {quote(table)})')
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM {quote(default)} WHERE {column} >= %s AND {column} < %s RETURNING *) '
+        f'INSERT INTO {quote(name)} SELECT * FROM moved',
+        bounds
+    )
+    # Indexes, the primary key and foreign keys are added on attach
+    cursor.execute(
+        f'ALTER TABLE {quote(table)} ATTACH PARTITION {quote(name)} FOR VALUES FROM (%s) TO (%s)', bounds
+    )
+
+
+def ensure_partitions(table, first_month, last_month, using=connection):
+    """
+    Create the monthly partitions from first_month to last_month
+
+    A month whose partition cannot be created is logged and skipped, so the
+    months after it are still created.
+
+    Returns:
+        Names of the partitions created
+    """
+    quote = using.ops.quote_name
+    existing = set(list_partitions(table, using))
+    created = []
+    month = month_start(first_month)
+    with using.cursor() as cursor:
+        while month <= last_month:
+            if month not in existing:
+                name = partition_name(table, month)
+                try:
+                    with transaction.atomic(using=using.alias):
+                        _create_partition(cursor, quote, table, name, month)
+                except DatabaseError:
+                    logger.exception('Could not create partition %s', name)
+                else:
+                    created.append(name)
+            month = add_months(month, 1)
+    return created
+
+
+def drop_partition(table, month, using=connection):
+    """Drop the partition holding month, and its rows; False if there is none"""
+    name = list_partitions(table, using).get(month)
+    if name is None:
+        return False
+    quote = using.ops.quote_name
+    with using.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {quote(table)} DETACH PARTITION {quote(name)}')
+        cursor.execute(f'DROP TABLE {quote(name)}')
+    return True
+
+
+def _table_definition(cursor, table):
+    """Index definitions and foreign keys of a table, minus its primary key"""
+    cursor.execute(
+        'SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT IN ('
+        "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'p')",
+        [table, table]
+    )
+    indexes = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        'SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint '
+        "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+        [table]
+    )
+    return indexes, cursor.fetchall()
+
+
+def _rebuild_table(schema_editor, table, create_sql, primary_key, before_copy=None):
+    """
+    Swap table for a new one with the same columns, keeping rows, indexes,
+    foreign keys and ids
+
+    The id default becomes a plain sequence: partitioned tables cannot
+    have identity columns before PostgreSQL 17.
+    """
+    quote = schema_editor.quote_name
+    old = f'{table}_swap'
+    sequence = f'{table}_id_seq'
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {quote(table)} RENAME TO {quote(old)}')
+        cursor.execute(
+            f'ALTER TABLE {quote(old)} RENAME CONSTRAINT {quote(table + "_pkey")} TO {quote(old + "_pkey")}'
+        )
+        indexes, foreign_keys = _table_definition(cursor, old)
+        cursor.execute('CREATE TABLE ' + create_sql.format(table=quote(table), old=quote(old)))
+        cursor.execute(f'ALTER TABLE {quote(table)} ADD PRIMARY KEY ({primary_key})')
+        if before_copy:
+            before_copy(cursor)
+        cursor.execute(f'INSERT INTO {quote(table)} SELECT * FROM {quote(old)}')
+        # Also drops the old id sequence, owned by the old table
+        cursor.execute(f'DROP TABLE {quote(old)}')
+
+        # Same names as before, so later migrations still find them. Indexes
+        # of a partitioned table read "ON ONLY", which would skip partitions
+        old_reference = re.compile(rf' ON (ONLY )?(\S+\.)?"?{re.escape(old)}"? ')
+        for definition in indexes:
+            cursor.execute(old_reference.sub(f' ON {quote(table)} ', definition, count=1))
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(name)} {definition}')
+
+        cursor.execute(f'CREATE SEQUENCE {quote(sequence)} OWNED BY {quote(table)}.id')
+        cursor.execute(f"ALTER TABLE {quote(table)} ALTER COLUMN id SET DEFAULT nextval('{quote(sequence)}')")
+        cursor.execute(
+            f'SELECT setval(%s, COALESCE(MAX(id), 0) + 1, false) FROM {quote(table)}',
+            [quote(sequence)]
+        )
+
+
+def partition_table(schema_editor, table, column, months_ahead):
+    """
+    Turn a table into one range partitioned by month on column
+
+    PostgreSQL requires the partition column in the primary key, so it
+    becomes (id, column); ids still come from one sequence. Existing rows
+    are copied into monthly partitions, and rows outside them (a clock far
+    off) go to a default partition.
+    """
+    if schema_editor.connection.vendor != 'postgresql' or is_partitioned(table, schema_editor.connection):
+        return
+    quote = schema_editor.quote_name
+
+    def create_partitions(cursor):
+        cursor.execute(f'SELECT MIN({quote(column)}) FROM {quote(table + "_swap")}')
+        oldest = cursor.fetchone()[0]
+        today = timezone.localdate()
+        first = month_start(timezone.localtime(oldest).date() if oldest else today)
+        ensure_partitions(table, first, add_months(today, months_ahead), schema_editor.connection)
+        cursor.execute(
+            f'CREATE TABLE {quote(default_partition_name(table))} PARTITION OF {quote(table)} DEFAULT'
+        )
+
+    _rebuild_table(
+        schema_editor,
+        table,
+        f'{{table}} (LIKE {{old}} INCLUDING STORAGE) PARTITION BY RANGE ({quote(column)})',
+        f'id, {quote(column)}',
+        before_copy=create_partitions
+    )
+
+
+def unpartition_table(schema_editor, table):
+    """Turn a partitioned table back into a plain one"""
+    if not is_partitioned(table, schema_editor.connection):
+        return
+    _rebuild_table(
+        schema_editor,
+        table,
+        '{table} (LIKE {old} INCLUDING STORAGE)',
+        'id'
+    )
@@ -0,0 +1,92 @@
+"""
+Shared serializer mixins for AGRITRACE API
+"""
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+FIELDS_QUERY_PARAM = 'fields'
+EXPAND_QUERY_PARAM = 'expand'
+
+
+def parse_field_paths(value):
+    """Parse a comma separated list of dotted field paths into tuples"""
+    return [
+        tuple(part for part in item.strip().split('.') if part)
+        for item in (value or '').split(',')
+        if item.strip()
+    ]
+
+
+def sparse_fieldsets_requested(request):
+    """Whether a read request asks for sparse fieldsets or explicit expansion"""
+    if request is None or request.method not in SAFE_METHODS:
+        return False
+    params = request.query_params
+    return FIELDS_QUERY_PARAM in params or EXPAND_QUERY_PARAM in params
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin for ?fields= and ?expand= query parameters
+
+    Once a read request sends either parameter, nested serializers collapse
+    to primary keys unless their dotted path is listed in ?expand=, and each
+    serializer only keeps the fields listed for its path in ?fields=
+    (e.g. ?fields=id,name,creator.username). Requests without either
+    parameter keep the full nested representation.
+    """
+
+    def get_field_path(self):
+        """Dotted path of this serializer relative to the root serializer"""
+        parts = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                parts.append(node.field_name)
+            node = node.parent
+        return tuple(reversed(parts))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if not sparse_fieldsets_requested(request):
+            return fields
+
+        path = self.get_field_path()
+        depth = len(path)
+        selected = [
+            field_path for field_path in parse_field_paths(request.query_params.get(FIELDS_QUERY_PARAM))
+            if len(field_path) > depth and field_path[:depth] == path
+        ]
+        # Expanding a path expands its parents, and selecting a nested
+        # field (creator.username) expands the serializers above it
+        expanded = set()
+        for field_path in parse_field_paths(request.query_params.get(EXPAND_QUERY_PARAM)):
+            for index in range(1, len(field_path) + 1):
+                expanded.add(field_path[:index])
+        for field_path in selected:
+            for index in range(1, len(field_path)):
+                expanded.add(field_path[:index])
+
+        if selected:
+            names = {field_path[depth] for field_path in selected}
+            for name in list(fields):
+                if name not in names and not fields[name].write_only:
+                    fields.pop(name)
+
+        for name, field in list(fields.items()):
+            if not isinstance(field, serializers.BaseSerializer) or path + (name,) in expanded:
+                continue
+            kwargs = {'read_only': True}
+            if field.source and field.source != name:
+                kwargs['source'] = field.source
+            if isinstance(field, serializers.ListSerializer):
+                fields[name] = serializers.ManyRelatedField(
+                    child_relation=serializers.PrimaryKeyRelatedField(read_only=True),
+                    **kwargs
+                )
+            else:
+                fields[name] = serializers.PrimaryKeyRelatedField(**kwargs)
+
+        return fields
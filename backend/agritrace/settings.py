@@ -77,6 +77,11 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'agritrace.wsgi.application'
+ASGI_APPLICATION = 'agritrace.asgi.application'
+
+# Worker boot budget: milliseconds to import ROOT_URLCONF once apps are loaded
+# (see `manage.py check_import_budget`)
+URLCONF_IMPORT_BUDGET_MS = int(os.getenv('URLCONF_IMPORT_BUDGET_MS', 500))
 
 # Database - PostgreSQL for production, SQLite for development
 if os.getenv('DATABASE_URL'):
@@ -160,7 +165,7 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'agritrace.pagination.CursorOrPageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_RENDERER_CLASSES': (
         'rest_framework.renderers.JSONRenderer',
@@ -207,17 +212,83 @@ CORS_ALLOW_METHODS = [
     'PUT',
 ]
 
-# Redis Configuration (Disabled for now)
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+# Cache Configuration - Redis when available, local memory for development
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
     }
-}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Serialized product payloads served by the QR lookup endpoint
+QR_CACHE_TIMEOUT = int(os.getenv('QR_CACHE_TIMEOUT', 60 * 60))
+QR_SUMMARY_MISS_TIMEOUT = int(os.getenv('QR_SUMMARY_MISS_TIMEOUT', 60))
+
+# Dashboard statistics: served fresh, then stale while one request recomputes
+DASHBOARD_CACHE_FRESH = int(os.getenv('DASHBOARD_CACHE_FRESH', 30))
+DASHBOARD_CACHE_STALE = int(os.getenv('DASHBOARD_CACHE_STALE', 5 * 60))
 
 # Blockchain Configuration
 ETHEREUM_NODE_URL = os.getenv('ETHEREUM_NODE_URL', 'https://goerli.infura.io/v3/YOUR_PROJECT_ID')
 ETHEREUM_PRIVATE_KEY = os.getenv('ETHEREUM_PRIVATE_KEY', '')
 CONTRACT_ADDRESS = os.getenv('CONTRACT_ADDRESS', '')
+BLOCKCHAIN_RECEIPT_TIMEOUT = int(os.getenv('BLOCKCHAIN_RECEIPT_TIMEOUT', 120))
+BLOCKCHAIN_NONCE_TIMEOUT = int(os.getenv('BLOCKCHAIN_NONCE_TIMEOUT', 5 * 60))
+
+# Receipt reconciliation: jobs checked per pass, and how many times a dropped
+# transaction is signed again before its job fails. Transactions without a
+# receipt after BLOCKCHAIN_RECEIPT_TIMEOUT seconds are checked for being dropped
+BLOCKCHAIN_RECONCILE_BATCH_SIZE = int(os.getenv('BLOCKCHAIN_RECONCILE_BATCH_SIZE', 500))
+BLOCKCHAIN_MAX_SUBMISSIONS = int(os.getenv('BLOCKCHAIN_MAX_SUBMISSIONS', 3))
+
+# Queued jobs whose task never reached a worker are dispatched again after
+# BLOCKCHAIN_REDISPATCH_AFTER seconds. A job still sending after
+# BLOCKCHAIN_SEND_TIMEOUT seconds lost its worker mid-send and fails
+BLOCKCHAIN_REDISPATCH_AFTER = int(os.getenv('BLOCKCHAIN_REDISPATCH_AFTER', 60))
+BLOCKCHAIN_SEND_TIMEOUT = int(os.getenv('BLOCKCHAIN_SEND_TIMEOUT', 10 * 60))
+
+# Transaction fees: EIP-1559 max fee = multiplier x base fee + tip (the tip
+# falls back to BLOCKCHAIN_PRIORITY_FEE_GWEI); gas limits are estimates plus a margin
+BLOCKCHAIN_MAX_FEE_MULTIPLIER = int(os.getenv('BLOCKCHAIN_MAX_FEE_MULTIPLIER', 2))
+BLOCKCHAIN_PRIORITY_FEE_GWEI = float(os.getenv('BLOCKCHAIN_PRIORITY_FEE_GWEI', 1.5))
+BLOCKCHAIN_GAS_MARGIN = float(os.getenv('BLOCKCHAIN_GAS_MARGIN', 0.2))
+BLOCKCHAIN_GAS_ESTIMATE_TIMEOUT = int(os.getenv('BLOCKCHAIN_GAS_ESTIMATE_TIMEOUT', 60 * 60))
+
+# Serve blockchain read endpoints from async views (only useful under ASGI)
+BLOCKCHAIN_ASYNC_VIEWS = os.getenv('BLOCKCHAIN_ASYNC_VIEWS', 'False') == 'True'
+
+# Contract view calls are cached per head block; the head is re-polled this often
+BLOCKCHAIN_HEAD_POLL_INTERVAL = int(os.getenv('BLOCKCHAIN_HEAD_POLL_INTERVAL', 3))
+BLOCKCHAIN_CALL_CACHE_TIMEOUT = int(os.getenv('BLOCKCHAIN_CALL_CACHE_TIMEOUT', 60))
+
+# Batched JSON-RPC reads: requests per HTTP call and request timeout in seconds
+BLOCKCHAIN_RPC_BATCH_SIZE = int(os.getenv('BLOCKCHAIN_RPC_BATCH_SIZE', 100))
+BLOCKCHAIN_RPC_TIMEOUT = int(os.getenv('BLOCKCHAIN_RPC_TIMEOUT', 10))
+
+# Contract event indexer: first block to read, blocks per get_logs call, and
+# how far behind the head it stays so reorged blocks are never indexed
+BLOCKCHAIN_INDEXER_START_BLOCK = int(os.getenv('BLOCKCHAIN_INDEXER_START_BLOCK', 0))
+BLOCKCHAIN_INDEXER_CHUNK_SIZE = int(os.getenv('BLOCKCHAIN_INDEXER_CHUNK_SIZE', 2000))
+BLOCKCHAIN_CONFIRMATIONS = int(os.getenv('BLOCKCHAIN_CONFIRMATIONS', 12))
+
+# Merkle anchoring: records per root, and the longest a record waits for one
+ANCHOR_BATCH_SIZE = int(os.getenv('ANCHOR_BATCH_SIZE', 1024))
+ANCHOR_MAX_DELAY = int(os.getenv('ANCHOR_MAX_DELAY', 10 * 60))
+ANCHOR_ROOT_MISS_TIMEOUT = int(os.getenv('ANCHOR_ROOT_MISS_TIMEOUT', 60))
+
+# Celery Configuration
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+CELERY_TASK_ALWAYS_EAGER = os.getenv('CELERY_TASK_ALWAYS_EAGER', 'False') == 'True'
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TIMEZONE = TIME_ZONE
 
 # IPFS Configuration
 IPFS_API_URL = os.getenv('IPFS_API_URL', 'http://localhost:5001')
@@ -225,6 +296,46 @@ IPFS_API_URL = os.getenv('IPFS_API_URL', 'http://localhost:5001')
 # Africa's Talking Configuration
 AFRICAS_TALKING_USERNAME = os.getenv('AFRICAS_TALKING_USERNAME', 'sandbox')
 AFRICAS_TALKING_API_KEY = os.getenv('AFRICAS_TALKING_API_KEY', '')
+# Africa's Talking does not sign its callbacks: register the USSD and delivery
+# report URLs as /api/v1/ussd/callback/?token=<this> and
+# /api/v1/ussd/sms/delivery/?token=<this>. Both are refused while it is unset
+AFRICAS_TALKING_CALLBACK_TOKEN = os.getenv('AFRICAS_TALKING_CALLBACK_TOKEN', '')
+
+# User activity is buffered and written in batches of ACTIVITY_BATCH_SIZE,
+# at least every ACTIVITY_FLUSH_INTERVAL seconds. 'redis' keeps the buffer
+# in a Redis list shared by all processes, 'memory' in each process
+ACTIVITY_BUFFER = os.getenv('ACTIVITY_BUFFER', 'redis' if os.getenv('REDIS_URL') else 'memory')
+ACTIVITY_BUFFER_URL = os.getenv('ACTIVITY_BUFFER_URL', os.getenv('REDIS_URL', ''))
+ACTIVITY_BATCH_SIZE = int(os.getenv('ACTIVITY_BATCH_SIZE', 500))
+ACTIVITY_FLUSH_INTERVAL = int(os.getenv('ACTIVITY_FLUSH_INTERVAL', 10))
+# While the database is unreachable the buffer keeps at most
+# ACTIVITY_BUFFER_MAX events (the oldest go first), and an event is given up
+# after ACTIVITY_MAX_ATTEMPTS failed flushes
+ACTIVITY_BUFFER_MAX = int(os.getenv('ACTIVITY_BUFFER_MAX', 100000))
+ACTIVITY_MAX_ATTEMPTS = int(os.getenv('ACTIVITY_MAX_ATTEMPTS', 5))
+
+# Append-only tables (UserActivity, Verification): monthly partitions on
+# PostgreSQL, created PARTITION_MONTHS_AHEAD months in advance. Raw rows are
+# kept for RAW_RETENTION_MONTHS whole months, then compacted into daily rollups
+PARTITION_MONTHS_AHEAD = int(os.getenv('PARTITION_MONTHS_AHEAD', 3))
+RAW_RETENTION_MONTHS = int(os.getenv('RAW_RETENTION_MONTHS', 12))
+
+# Outbound SMS: gateway requests per second (token bucket rate and burst),
+# recipients per request, and retries with exponential backoff from
+# SMS_RETRY_BACKOFF seconds. Local numbers get PHONE_DEFAULT_COUNTRY_CODE
+SMS_RATE_PER_SECOND = float(os.getenv('SMS_RATE_PER_SECOND', 5))
+SMS_BURST = int(os.getenv('SMS_BURST', 5))
+SMS_MAX_RECIPIENTS = int(os.getenv('SMS_MAX_RECIPIENTS', 1000))
+SMS_MAX_ATTEMPTS = int(os.getenv('SMS_MAX_ATTEMPTS', 5))
+SMS_RETRY_BACKOFF = int(os.getenv('SMS_RETRY_BACKOFF', 60))
+PHONE_DEFAULT_COUNTRY_CODE = os.getenv('PHONE_DEFAULT_COUNTRY_CODE', '250')
+
+# USSD sessions: seconds a session's state is kept between hops, and the
+# language used for callers without an account
+USSD_SESSION_TIMEOUT = int(os.getenv('USSD_SESSION_TIMEOUT', 3 * 60))
+USSD_DEFAULT_LANGUAGE = os.getenv('USSD_DEFAULT_LANGUAGE', 'en')
+# Transactions listed under "Transaction History"
+USSD_RECENT_TRANSACTIONS = int(os.getenv('USSD_RECENT_TRANSACTIONS', 5))
 
 # Sentry Configuration (Disabled for development)
 
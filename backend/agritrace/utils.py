@@ -0,0 +1,60 @@
+"""
+Shared helpers for AGRITRACE API
+"""
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+def parse_timestamp_bound(value, end=False):
+    """
+    Parse a date or datetime query param into an aware datetime
+
+    Args:
+        value: ISO date (2025-01-31) or datetime string
+        end: Whether the value is an upper bound; plain dates then
+            include the whole day
+
+    Returns:
+        Aware datetime, or None if the value cannot be parsed
+    """
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                return None
+            if end:
+                day += timedelta(days=1)
+            moment = datetime.combine(day, time.min)
+    except ValueError:
+        return None
+
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def normalize_phone_number(value, country_code=None):
+    """
+    Normalise a phone number to E.164 (+250788123456)
+
+    Local numbers (0788 123 456) get the default country code
+    PHONE_DEFAULT_COUNTRY_CODE; separators are dropped.
+
+    Returns:
+        The normalised number, or '' when value has no digits
+    """
+    country_code = country_code or settings.PHONE_DEFAULT_COUNTRY_CODE
+    value = (value or '').strip()
+    digits = ''.join(char for char in value if char.isdigit())
+    if not digits:
+        return ''
+    if value.startswith('+'):
+        return f'+{digits}'
+    if digits.startswith('00'):
+        return f'+{digits[2:]}'
+    if digits.startswith(country_code) and len(digits) > 10:
+        return f'+{digits}'
+    return f'+{country_code}{digits.lstrip("0")}'
@@ -0,0 +1,16 @@
+"""
+Admin configuration for Analytics models
+"""
+from django.contrib import admin
+from .models import DailyRollup
+
+
+@admin.register(DailyRollup)
+class DailyRollupAdmin(admin.ModelAdmin):
+    list_display = ['date', 'source', 'dimension', 'bucket', 'count', 'quantity', 'amount']
+    list_filter = ['source', 'dimension', 'date']
+    search_fields = ['bucket']
+    ordering = ['-date', 'source', 'dimension', 'bucket']
+    
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,156 @@
+"""
+Streaming data exports for AGRITRACE analytics
+"""
+import csv
+import json
+import tempfile
+import uuid
+from collections import namedtuple
+from datetime import datetime
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from products.models import Batch, Product, Verification
+from transactions.models import Transaction, SupplyChain, Payment
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+ExportDataset = namedtuple('ExportDataset', ['model', 'columns', 'date_field', 'district_field'])
+
+
+# Export datasets keyed by the export type used in the URL
+EXPORT_DATASETS = {
+    'products': ExportDataset(
+        model=Product,
+        columns=[
+            'id', 'qr_code', 'name', 'variety', 'iron_content', 'biofortified',
+            'quantity', 'harvest_date', 'status', 'creator__username',
+            'batch__batch_number', 'blockchain_hash', 'created_at'
+        ],
+        date_field='created_at',
+        district_field='creator__location__district',
+    ),
+    'batches': ExportDataset(
+        model=Batch,
+        columns=[
+            'id', 'batch_number', 'seed_variety', 'planting_date', 'harvest_date',
+            'total_quantity', 'farmer__username', 'location__district',
+            'blockchain_hash', 'created_at'
+        ],
+        date_field='created_at',
+        district_field='location__district',
+    ),
+    'transactions': ExportDataset(
+        model=Transaction,
+        columns=[
+            'id', 'transaction_id', 'from_user__username', 'to_user__username',
+            'product__qr_code', 'quantity', 'price', 'transaction_type', 'status',
+            'location__district', 'blockchain_hash', 'timestamp'
+        ],
+        date_field='timestamp',
+        district_field='location__district',
+    ),
+    'supply-chain': ExportDataset(
+        model=SupplyChain,
+        columns=[
+            'id', 'product__qr_code', 'step_number', 'actor_type', 'actor__username',
+            'action', 'location__district', 'temperature', 'humidity',
+            'blockchain_hash', 'timestamp'
+        ],
+        date_field='timestamp',
+        district_field='location__district',
+    ),
+    'verifications': ExportDataset(
+        model=Verification,
+        columns=[
+            'id', 'product__qr_code', 'user__username', 'verification_type',
+            'result', 'confidence_score', 'verified_at'
+        ],
+        date_field='verified_at',
+        district_field='user__location__district',
+    ),
+    'payments': ExportDataset(
+        model=Payment,
+        columns=[
+            'id', 'transaction__transaction_id', 'amount', 'payment_method',
+            'status', 'transaction_reference', 'initiated_at', 'completed_at'
+        ],
+        date_field='initiated_at',
+        district_field='transaction__location__district',
+    ),
+}
+
+
+def export_headers(dataset):
+    """Column headers for a dataset, e.g. creator__username -> creator_username"""
+    return [column.replace('__', '_') for column in dataset.columns]
+
+
+def export_rows(dataset, since=None, until=None, district=None):
+    """
+    Stream the rows of a dataset as tuples, in bounded memory
+
+    Args:
+        dataset: ExportDataset to read
+        since / until: Optional aware datetime bounds on the dataset date field
+        district: Optional district name
+    """
+    queryset = dataset.model.objects.order_by('pk')
+    if since:
+        queryset = queryset.filter(**{f'{dataset.date_field}__gte': since})
+    if until:
+        queryset = queryset.filter(**{f'{dataset.date_field}__lt': until})
+    if district:
+        queryset = queryset.filter(**{dataset.district_field: district})
+    return queryset.values_list(*dataset.columns).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+class Echo:
+    """Pseudo-buffer that hands written lines back to the caller"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(headers, rows):
+    """Yield CSV lines one row at a time"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(headers, rows):
+    """Yield one JSON object per line"""
+    for row in rows:
+        yield json.dumps(dict(zip(headers, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def _xlsx_value(value):
+    """openpyxl cannot store aware datetimes or UUIDs"""
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        return timezone.localtime(value).replace(tzinfo=None)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def build_xlsx(title, headers, rows):
+    """
+    Write rows to a temporary XLSX file using openpyxl's write-only mode
+
+    Write-only worksheets flush rows to disk as they are appended, so memory
+    stays bounded; the finished file is returned rewound for streaming.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(title=title[:31])
+    worksheet.append(headers)
+    for row in rows:
+        worksheet.append([_xlsx_value(value) for value in row])
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
@@ -0,0 +1,44 @@
+"""
+Compact raw UserActivity and Verification rows past retention
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from analytics import retention
+from analytics.tasks import COMPACT_LOCK_KEY
+
+
+class Command(BaseCommand):
+    help = (
+        'Create upcoming monthly partitions, then fold raw activity and verification '
+        'rows older than RAW_RETENTION_MONTHS into daily rollups and remove them'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-months',
+            type=int,
+            default=settings.RAW_RETENTION_MONTHS,
+            help='Whole months of raw rows to keep (default: RAW_RETENTION_MONTHS)'
+        )
+
+    def handle(self, *args, **options):
+        keep_months = options['keep_months']
+        if keep_months < 1:
+            # Month 0 is the current one, still being written
+            raise CommandError('--keep-months must be at least 1')
+
+        created = retention.maintain_partitions()
+        for name in created:
+            self.stdout.write(f'Created partition {name}')
+
+        # Same lock as the beat task: two compactions would both merge the
+        # same rows into the rollups
+        if not cache.add(COMPACT_LOCK_KEY, True, 60 * 60):
+            raise CommandError('Another compaction is running, try again later')
+        try:
+            compacted = retention.compact(keep_months=keep_months)
+        finally:
+            cache.delete(COMPACT_LOCK_KEY)
+        for source_name, count in compacted.items():
+            self.stdout.write(self.style.SUCCESS(f'Compacted {source_name}: {count} rows'))
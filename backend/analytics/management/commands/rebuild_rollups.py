@@ -0,0 +1,21 @@
+"""
+Rebuild the daily analytics rollups from raw rows
+"""
+from django.core.management.base import BaseCommand
+from analytics.rollups import ROLLUP_SOURCES, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily analytics rollup tables from the source tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            action='append',
+            choices=sorted(ROLLUP_SOURCES),
+            help='Only rebuild this source (may be repeated)'
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild(options['source'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rollups: {written} rows written'))
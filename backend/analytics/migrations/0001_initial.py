@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('source', models.CharField(choices=[('product', 'Product'), ('transaction', 'Transaction'), ('user', 'User'), ('supply_chain', 'Supply Chain Step')], max_length=20, verbose_name='Source')),
+                ('dimension', models.CharField(max_length=30, verbose_name='Dimension')),
+                ('bucket', models.CharField(blank=True, max_length=200, verbose_name='Value')),
+                ('count', models.BigIntegerField(default=0, verbose_name='Count')),
+                ('quantity', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Quantity')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Amount')),
+                ('amount_count', models.BigIntegerField(default=0, verbose_name='Amount Count')),
+            ],
+            options={
+                'verbose_name': 'Daily Rollup',
+                'verbose_name_plural': 'Daily Rollups',
+                'ordering': ['-date', 'source', 'dimension', 'bucket'],
+                'indexes': [models.Index(fields=['source', 'dimension', 'date'], name='analytics_d_source_06efcb_idx')],
+                'unique_together': {('date', 'source', 'dimension', 'bucket')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dailyrollup',
+            name='source',
+            field=models.CharField(choices=[('product', 'Product'), ('transaction', 'Transaction'), ('user', 'User'), ('supply_chain', 'Supply Chain Step'), ('user_activity', 'User Activity'), ('verification', 'Verification')], max_length=20, verbose_name='Source'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:14
+
+from django.db import migrations
+from analytics.rollups import rebuild
+
+
+def backfill(apps, schema_editor):
+    rebuild(apps=apps)
+
+
+class Migration(migrations.Migration):
+    """Fill the rollup tables from the rows that existed before they were tracked"""
+
+    dependencies = [
+        ('analytics', '0002_retention_sources'),
+        ('products', '0005_pending_anchor_index'),
+        ('transactions', '0004_pending_anchor_index'),
+        ('users', '0003_partition_useractivity'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
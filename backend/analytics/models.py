@@ -0,0 +1,46 @@
+"""
+Analytics models for AGRITRACE
+"""
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class DailyRollup(models.Model):
+    """
+    Daily counters per source table, dimension and dimension value
+
+    `amount` holds the summed measure of the source (iron content for
+    products, price for transactions) and `amount_count` the number of rows
+    that had one, so averages can be derived without touching raw rows.
+    """
+    
+    SOURCES = [
+        ('product', _('Product')),
+        ('transaction', _('Transaction')),
+        ('user', _('User')),
+        ('supply_chain', _('Supply Chain Step')),
+        # Written by retention compaction only (analytics.retention)
+        ('user_activity', _('User Activity')),
+        ('verification', _('Verification')),
+    ]
+    
+    date = models.DateField(_('Date'))
+    source = models.CharField(_('Source'), max_length=20, choices=SOURCES)
+    dimension = models.CharField(_('Dimension'), max_length=30)
+    bucket = models.CharField(_('Value'), max_length=200, blank=True)
+    count = models.BigIntegerField(_('Count'), default=0)
+    quantity = models.DecimalField(_('Quantity'), max_digits=18, decimal_places=2, default=0)
+    amount = models.DecimalField(_('Amount'), max_digits=18, decimal_places=2, default=0)
+    amount_count = models.BigIntegerField(_('Amount Count'), default=0)
+    
+    class Meta:
+        verbose_name = _('Daily Rollup')
+        verbose_name_plural = _('Daily Rollups')
+        ordering = ['-date', 'source', 'dimension', 'bucket']
+        unique_together = ['date', 'source', 'dimension', 'bucket']
+        indexes = [
+            models.Index(fields=['source', 'dimension', 'date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} {self.source}.{self.dimension}={self.bucket}: {self.count}"
@@ -0,0 +1,176 @@
+"""
+Retention for append-only tables: old raw rows are compacted into daily rollups
+"""
+from collections import namedtuple
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Min
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from agritrace.partitions import (
+    add_months, drop_partition, ensure_partitions, is_partitioned, list_partitions, month_bounds, month_start
+)
+from products.models import Verification
+from users.models import UserActivity
+from .models import DailyRollup
+from .rollups import to_bucket, totals
+
+
+RetentionPolicy = namedtuple('RetentionPolicy', ['model', 'date_field', 'dimensions'])
+
+# Rollup source name -> policy; dimension name -> lookup on the model.
+# Verifications keep a per-product count, so QR lookups can still say how
+# often a product was checked once its raw rows are gone
+RETENTION_POLICIES = {
+    'user_activity': RetentionPolicy(
+        model=UserActivity,
+        date_field='timestamp',
+        dimensions={
+            'activity_type': 'activity_type',
+        },
+    ),
+    'verification': RetentionPolicy(
+        model=Verification,
+        date_field='verified_at',
+        dimensions={
+            'result': 'result',
+            'verification_type': 'verification_type',
+            'product': 'product_id',
+        },
+    ),
+}
+
+
+def compacted_verifications(product_id):
+    """Verifications of a product that were compacted into daily rollups"""
+    return totals('verification', 'product', bucket=to_bucket(product_id))['total_count']
+
+
+def archive_table(model):
+    """Table that takes compacted rows where partitions cannot be dropped"""
+    return f'{model._meta.db_table}_archive'
+
+
+def retention_cutoff(today=None, keep_months=None):
+    """First day of the oldest month whose raw rows are kept"""
+    keep_months = settings.RAW_RETENTION_MONTHS if keep_months is None else keep_months
+    return add_months(month_start(today or timezone.localdate()), -keep_months)
+
+
+def maintain_partitions(today=None):
+    """
+    Create the monthly partitions of the coming PARTITION_MONTHS_AHEAD months
+
+    Returns:
+        Names of the partitions created
+    """
+    today = today or timezone.localdate()
+    created = []
+    for policy in RETENTION_POLICIES.values():
+        table = policy.model._meta.db_table
+        if is_partitioned(table):
+            created.extend(ensure_partitions(
+                table, month_start(today), add_months(today, settings.PARTITION_MONTHS_AHEAD)
+            ))
+    return created
+
+
+def _merge_rollups(source_name, counts):
+    """Add (date, dimension, bucket) -> count to the rollups of a source"""
+    if not counts:
+        return
+    days = {day for day, _, _ in counts}
+    existing = {
+        (rollup.date, rollup.dimension, rollup.bucket): rollup
+        for rollup in DailyRollup.objects.filter(
+            source=source_name, date__gte=min(days), date__lte=max(days)
+        )
+    }
+    created, updated = [], []
+    for (day, dimension, bucket), count in counts.items():
+        rollup = existing.get((day, dimension, bucket))
+        if rollup is None:
+            created.append(DailyRollup(
+                date=day, source=source_name, dimension=dimension, bucket=bucket, count=count
+            ))
+        else:
+            rollup.count += count
+            updated.append(rollup)
+    DailyRollup.objects.bulk_create(created, batch_size=1000)
+    DailyRollup.objects.bulk_update(updated, ['count'], batch_size=1000)
+
+
+def compact_month(source_name, month):
+    """
+    Fold the raw rows of one month into daily rollups and remove them
+
+    A partitioned table drops the month's partition. Otherwise (SQLite)
+    the rows are moved to the archive table, which keeps the live table
+    down to the retained months.
+
+    Returns:
+        Number of raw rows compacted
+    """
+    policy = RETENTION_POLICIES[source_name]
+    model = policy.model
+    table = model._meta.db_table
+    start, end = month_bounds(month)
+    rows = model.objects.filter(**{f'{policy.date_field}__gte': start, f'{policy.date_field}__lt': end})
+
+    with transaction.atomic():
+        counts = {}
+        for dimension, lookup in policy.dimensions.items():
+            grouped = rows.annotate(
+                day=TruncDate(policy.date_field)
+            ).values('day', lookup).annotate(row_count=Count('pk')).order_by()
+            for group in grouped:
+                key = (group['day'], dimension, to_bucket(group[lookup]))
+                counts[key] = counts.get(key, 0) + group['row_count']
+        _merge_rollups(source_name, counts)
+        # Every row counts once under each dimension
+        first_dimension = next(iter(policy.dimensions))
+        compacted = sum(count for (_, dimension, _), count in counts.items() if dimension == first_dimension)
+
+        quote = connection.ops.quote_name
+        column = quote(model._meta.get_field(policy.date_field).column)
+        where = f'{column} >= %s AND {column} < %s'
+        bounds = [connection.ops.adapt_datetimefield_value(value) for value in (start, end)]
+        with connection.cursor() as cursor:
+            if is_partitioned(table):
+                drop_partition(table, month)
+            elif compacted:
+                archive = quote(archive_table(model))
+                cursor.execute(f'CREATE TABLE IF NOT EXISTS {archive} AS SELECT * FROM {quote(table)} WHERE 1 = 0')
+                cursor.execute(f'INSERT INTO {archive} SELECT * FROM {quote(table)} WHERE {where}', bounds)
+            # Raw SQL: the counts moved to the rollups, so delete signals
+            # (which adjust cached counts) must not run for these rows. On a
+            # partitioned table this only finds rows in the default partition
+            cursor.execute(f'DELETE FROM {quote(table)} WHERE {where}', bounds)
+    return compacted
+
+
+def compact(today=None, keep_months=None):
+    """
+    Compact every month older than keep_months (default RAW_RETENTION_MONTHS)
+
+    Returns:
+        Dict of source name -> number of raw rows compacted
+    """
+    cutoff = retention_cutoff(today, keep_months)
+    result = {}
+    for source_name, policy in RETENTION_POLICIES.items():
+        table = policy.model._meta.db_table
+        months = set()
+        oldest = policy.model.objects.aggregate(oldest=Min(policy.date_field))['oldest']
+        if oldest is not None:
+            month = month_start(timezone.localtime(oldest).date())
+            while month < cutoff:
+                months.add(month)
+                month = add_months(month, 1)
+        if is_partitioned(table):
+            # Empty partitions past retention go as well
+            months.update(month for month in list_partitions(table) if month < cutoff)
+
+        result[source_name] = sum(compact_month(source_name, month) for month in sorted(months))
+    return result
+
@@ -0,0 +1,221 @@
+"""
+Incrementally maintained daily rollups for AGRITRACE analytics
+"""
+from collections import namedtuple
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from products.models import Product
+from transactions.models import Transaction, SupplyChain
+from users.models import User
+from .models import DailyRollup
+
+
+RollupSource = namedtuple(
+    'RollupSource',
+    ['model', 'date_field', 'quantity_field', 'amount_field', 'dimensions']
+)
+
+# Dimension name -> lookup on the source model
+ROLLUP_SOURCES = {
+    'product': RollupSource(
+        model=Product,
+        date_field='created_at',
+        quantity_field='quantity',
+        amount_field='iron_content',
+        dimensions={
+            'status': 'status',
+            'variety': 'variety',
+            'biofortified': 'biofortified',
+            'district': 'creator__location__district',
+        },
+    ),
+    'transaction': RollupSource(
+        model=Transaction,
+        date_field='timestamp',
+        quantity_field='quantity',
+        amount_field='price',
+        dimensions={
+            'transaction_type': 'transaction_type',
+            'status': 'status',
+            'district': 'location__district',
+        },
+    ),
+    'user': RollupSource(
+        model=User,
+        date_field='date_joined',
+        quantity_field=None,
+        amount_field=None,
+        dimensions={
+            'user_type': 'user_type',
+            'verified': 'verified_status',
+            'district': 'location__district',
+        },
+    ),
+    'supply_chain': RollupSource(
+        model=SupplyChain,
+        date_field='timestamp',
+        quantity_field=None,
+        amount_field=None,
+        dimensions={
+            'action': 'action',
+            'district': 'location__district',
+        },
+    ),
+}
+
+SOURCES_BY_MODEL = {source.model: name for name, source in ROLLUP_SOURCES.items()}
+
+
+def to_bucket(value):
+    """Normalise a dimension value to the string stored in DailyRollup.bucket"""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+def _tracked_fields(source):
+    fields = [source.date_field] + list(source.dimensions.values())
+    if source.quantity_field:
+        fields.append(source.quantity_field)
+    if source.amount_field:
+        fields.append(source.amount_field)
+    return fields
+
+
+def snapshot(source_name, pk):
+    """Read the values a row contributes to the rollups, in a single query"""
+    source = ROLLUP_SOURCES[source_name]
+    return source.model.objects.filter(pk=pk).values(*_tracked_fields(source)).first()
+
+
+def affects_rollups(source_name, update_fields):
+    """Whether a save limited to update_fields can change the rollups"""
+    if update_fields is None:
+        return True
+    source = ROLLUP_SOURCES[source_name]
+    local_fields = {lookup.split('__')[0] for lookup in _tracked_fields(source)}
+    return bool(local_fields & set(update_fields))
+
+
+def contributions(source_name, values):
+    """
+    Turn a snapshot into rollup deltas keyed by (date, dimension, bucket)
+
+    Returns:
+        Dict of key -> (count, quantity, amount, amount_count)
+    """
+    if not values:
+        return {}
+    source = ROLLUP_SOURCES[source_name]
+    day = timezone.localdate(values[source.date_field])
+    quantity = values[source.quantity_field] if source.quantity_field else None
+    amount = values[source.amount_field] if source.amount_field else None
+    return {
+        (day, dimension, to_bucket(values[lookup])): (
+            1,
+            quantity or Decimal('0'),
+            amount or Decimal('0'),
+            0 if amount is None else 1,
+        )
+        for dimension, lookup in source.dimensions.items()
+    }
+
+
+def apply_change(source_name, old_values, new_values):
+    """Move a row's contribution from its old buckets to its new ones"""
+    deltas = {}
+    for sign, values in ((-1, old_values), (1, new_values)):
+        for key, contribution in contributions(source_name, values).items():
+            current = deltas.get(key, (0, Decimal('0'), Decimal('0'), 0))
+            deltas[key] = tuple(total + sign * part for total, part in zip(current, contribution))
+
+    with transaction.atomic():
+        for (day, dimension, bucket), (count, quantity, amount, amount_count) in deltas.items():
+            if not (count or quantity or amount or amount_count):
+                continue
+            rollup, _ = DailyRollup.objects.get_or_create(
+                date=day, source=source_name, dimension=dimension, bucket=bucket
+            )
+            DailyRollup.objects.filter(pk=rollup.pk).update(
+                count=F('count') + count,
+                quantity=F('quantity') + quantity,
+                amount=F('amount') + amount,
+                amount_count=F('amount_count') + amount_count,
+            )
+
+
+def rebuild(source_names=None, apps=None):
+    """
+    Recompute the rollups of the given sources (all by default) from raw rows
+
+    Args:
+        source_names: Rollup sources to rebuild
+        apps: App registry to load models from; data migrations pass their
+            historical models here
+
+    Returns:
+        Number of rollup rows written
+    """
+    rollup_model = apps.get_model('analytics', 'DailyRollup') if apps else DailyRollup
+    written = 0
+    for source_name in source_names or ROLLUP_SOURCES:
+        source = ROLLUP_SOURCES[source_name]
+        model = apps.get_model(source.model._meta.label) if apps else source.model
+        aggregates = {'row_count': Count('pk')}
+        if source.quantity_field:
+            aggregates['quantity_sum'] = Sum(source.quantity_field)
+        if source.amount_field:
+            aggregates['amount_sum'] = Sum(source.amount_field)
+            aggregates['amount_rows'] = Count(source.amount_field)
+
+        rows = []
+        for dimension, lookup in source.dimensions.items():
+            grouped = model.objects.annotate(
+                day=TruncDate(source.date_field)
+            ).values('day', lookup).annotate(**aggregates).order_by()
+            for group in grouped.iterator():
+                rows.append(rollup_model(
+                    date=group['day'],
+                    source=source_name,
+                    dimension=dimension,
+                    bucket=to_bucket(group[lookup]),
+                    count=group['row_count'],
+                    quantity=group.get('quantity_sum') or 0,
+                    amount=group.get('amount_sum') or 0,
+                    amount_count=group.get('amount_rows') or 0,
+                ))
+
+        with transaction.atomic():
+            rollup_model.objects.filter(source=source_name).delete()
+            rollup_model.objects.bulk_create(rows, batch_size=1000)
+        written += len(rows)
+    return written
+
+
+def breakdown(source_name, dimension):
+    """Per-bucket totals of one dimension across all days"""
+    return DailyRollup.objects.filter(
+        source=source_name, dimension=dimension
+    ).values('bucket').annotate(
+        total_count=Sum('count'),
+        total_quantity=Sum('quantity'),
+    ).filter(total_count__gt=0).order_by('bucket')
+
+
+def totals(source_name, dimension, bucket=None):
+    """Totals of a source across all days, read through one of its dimensions"""
+    queryset = DailyRollup.objects.filter(source=source_name, dimension=dimension)
+    if bucket is not None:
+        queryset = queryset.filter(bucket=bucket)
+    result = queryset.aggregate(
+        total_count=Sum('count'),
+        total_quantity=Sum('quantity'),
+        total_amount=Sum('amount'),
+        total_amount_count=Sum('amount_count'),
+    )
+    return {key: value or 0 for key, value in result.items()}
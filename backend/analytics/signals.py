@@ -0,0 +1,38 @@
+"""
+Signal handlers for Analytics app
+"""
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from .rollups import SOURCES_BY_MODEL, affects_rollups, apply_change, snapshot
+
+
+def capture_rollup_snapshot(sender, instance, update_fields=None, **kwargs):
+    """Remember what the row contributed to the rollups before the write"""
+    source_name = SOURCES_BY_MODEL[sender]
+    if not affects_rollups(source_name, update_fields):
+        instance._rollup_skip = True
+        return
+    instance._rollup_skip = False
+    instance._rollup_snapshot = snapshot(source_name, instance.pk) if instance.pk else None
+
+
+def update_rollups_on_save(sender, instance, **kwargs):
+    if instance.__dict__.pop('_rollup_skip', True):
+        return
+    source_name = SOURCES_BY_MODEL[sender]
+    apply_change(
+        source_name,
+        instance.__dict__.pop('_rollup_snapshot', None),
+        snapshot(source_name, instance.pk)
+    )
+
+
+def update_rollups_on_delete(sender, instance, **kwargs):
+    instance.__dict__.pop('_rollup_skip', None)
+    apply_change(SOURCES_BY_MODEL[sender], instance.__dict__.pop('_rollup_snapshot', None), None)
+
+
+for model in SOURCES_BY_MODEL:
+    pre_save.connect(capture_rollup_snapshot, sender=model, dispatch_uid=f'rollup_pre_save_{model.__name__}')
+    post_save.connect(update_rollups_on_save, sender=model, dispatch_uid=f'rollup_post_save_{model.__name__}')
+    pre_delete.connect(capture_rollup_snapshot, sender=model, dispatch_uid=f'rollup_pre_delete_{model.__name__}')
+    post_delete.connect(update_rollups_on_delete, sender=model, dispatch_uid=f'rollup_post_delete_{model.__name__}')
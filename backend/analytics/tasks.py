@@ -0,0 +1,31 @@
+"""
+Celery tasks for Analytics app
+"""
+from celery import shared_task
+from django.core.cache import cache
+from . import retention
+
+
+COMPACT_LOCK_KEY = 'analytics:compact:lock'
+
+
+@shared_task
+def maintain_partitions():
+    """Create the partitions of the coming months ahead of their first row"""
+    return retention.maintain_partitions()
+
+
+@shared_task
+def compact_raw_history():
+    """
+    Compact raw UserActivity and Verification rows past retention
+    
+    Returns:
+        Dict of source name -> number of raw rows compacted
+    """
+    if not cache.add(COMPACT_LOCK_KEY, True, 60 * 60):
+        return {}
+    try:
+        return retention.compact()
+    finally:
+        cache.delete(COMPACT_LOCK_KEY)
@@ -0,0 +1,185 @@
+"""
+Tests for Analytics app
+"""
+import datetime
+from decimal import Decimal
+from django.apps import apps
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count, Sum
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from products.models import Product, Verification
+from transactions.models import Transaction, SupplyChain
+from users.models import User, Location, UserActivity
+from . import retention, rollups
+from .models import DailyRollup
+from .tasks import COMPACT_LOCK_KEY
+from .views import DashboardStatsView
+
+
+class AnalyticsTestCase(TestCase):
+    """Two located users with products, transactions and supply chain steps"""
+    
+    def setUp(self):
+        cache.clear()
+        self.location = Location.objects.create(district='Musanze', sector='Muhoza', cell='Cyabararika', village='Kabeza')
+        self.farmer = User.objects.create(
+            username='farmer', phone_number='0788000001', user_type='farmer', location=self.location
+        )
+        self.trader = User.objects.create(username='trader', phone_number='0788000002', user_type='trader')
+        self.product = Product.objects.create(
+            name='Iron Beans', variety='RWV 3006', iron_content=85, creator=self.farmer,
+            quantity=500, harvest_date=datetime.date(2025, 6, 1)
+        )
+        Product.objects.create(
+            name='Beans', variety='Local', iron_content=40, biofortified=False, creator=self.trader,
+            quantity=200, harvest_date=datetime.date(2025, 6, 1)
+        )
+        for index in range(4):
+            Transaction.objects.create(
+                from_user=self.farmer, to_user=self.trader, product=self.product, quantity=10,
+                price=500 if index else None, transaction_type='sale', location=self.location
+            )
+            SupplyChain.objects.create(
+                product=self.product, step_number=index, actor_type='farmer', actor=self.farmer,
+                action='harvested', location=self.location
+            )
+        self.admin = User.objects.create(username='admin', phone_number='0788000003', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+
+class RollupTests(AnalyticsTestCase):
+    """Incrementally maintained rollups match the raw tables"""
+    
+    def assert_matches_live_aggregates(self):
+        products = Product.objects.aggregate(count=Count('pk'), quantity=Sum('quantity'), amount=Sum('iron_content'))
+        totals = rollups.totals('product', 'status')
+        self.assertEqual(totals['total_count'], products['count'])
+        self.assertEqual(totals['total_quantity'], products['quantity'])
+        self.assertEqual(totals['total_amount'], products['amount'])
+        
+        transactions = Transaction.objects.aggregate(
+            count=Count('pk'), quantity=Sum('quantity'), amount=Sum('price'), priced=Count('price')
+        )
+        for dimension in rollups.ROLLUP_SOURCES['transaction'].dimensions:
+            totals = rollups.totals('transaction', dimension)
+            self.assertEqual(totals['total_count'], transactions['count'])
+            self.assertEqual(totals['total_quantity'], transactions['quantity'] or 0)
+            self.assertEqual(totals['total_amount'], transactions['amount'] or 0)
+            self.assertEqual(totals['total_amount_count'], transactions['priced'])
+        
+        self.assertEqual(rollups.totals('user', 'user_type')['total_count'], User.objects.count())
+        self.assertEqual(rollups.totals('supply_chain', 'action')['total_count'], SupplyChain.objects.count())
+    
+    def test_rollups_follow_creates(self):
+        self.assert_matches_live_aggregates()
+    
+    def test_rollups_follow_updates_and_deletes(self):
+        transaction = Transaction.objects.first()
+        transaction.status = 'completed'
+        transaction.quantity = Decimal('12.5')
+        transaction.save()
+        Transaction.objects.last().delete()
+        self.product.status = 'sold'
+        self.product.save()
+        self.farmer.location = None
+        self.farmer.save()
+        self.assert_matches_live_aggregates()
+        
+        breakdown = {row['bucket']: row['total_count'] for row in rollups.breakdown('product', 'status')}
+        self.assertEqual(breakdown, {'registered': 1, 'sold': 1})
+    
+    def test_saves_of_untracked_fields_leave_rollups_alone(self):
+        with self.assertNumQueries(1):
+            self.trader.last_login = timezone.now()
+            self.trader.save(update_fields=['last_login'])
+    
+    def test_rebuild_matches_incremental_rollups(self):
+        self.product.status = 'sold'
+        self.product.save()
+        Transaction.objects.first().delete()
+        incremental = set(DailyRollup.objects.values_list(
+            'date', 'source', 'dimension', 'bucket', 'count', 'quantity', 'amount', 'amount_count'
+        ).exclude(count=0))
+        rollups.rebuild()
+        rebuilt = set(DailyRollup.objects.values_list(
+            'date', 'source', 'dimension', 'bucket', 'count', 'quantity', 'amount', 'amount_count'
+        ))
+        self.assertEqual(rebuilt, incremental)
+    
+    def test_rebuild_with_historical_models(self):
+        DailyRollup.objects.all().delete()
+        rollups.rebuild(apps=apps)
+        self.assert_matches_live_aggregates()
+    
+    def test_stats_views_read_the_rollups(self):
+        response = self.client.get('/api/v1/analytics/products/')
+        self.assertEqual(response.status_code, 200)
+        before = response.data
+        rollups.rebuild()
+        self.assertEqual(self.client.get('/api/v1/analytics/products/').data, before)
+
+
+class RetentionTests(AnalyticsTestCase):
+    """Raw rows past retention are folded into rollups exactly once"""
+    
+    def setUp(self):
+        super().setUp()
+        self.today = timezone.localdate()
+        old = timezone.now() - datetime.timedelta(days=400)
+        for index in range(3):
+            verification = Verification.objects.create(
+                product=self.product, user=self.trader, verification_type='qr_scan', result='authentic'
+            )
+            Verification.objects.filter(pk=verification.pk).update(verified_at=old + datetime.timedelta(days=index))
+            UserActivity.objects.create(user=self.farmer, activity_type='login', timestamp=old)
+        Verification.objects.create(product=self.product, user=self.trader, verification_type='manual')
+        UserActivity.objects.create(user=self.farmer, activity_type='login')
+    
+    def test_compact_folds_old_rows_into_rollups(self):
+        self.assertEqual(retention.compact(self.today, keep_months=3), {'user_activity': 3, 'verification': 3})
+        self.assertEqual(Verification.objects.count(), 1)
+        self.assertEqual(UserActivity.objects.count(), 1)
+        self.assertEqual(rollups.totals('verification', 'result')['total_count'], 3)
+        self.assertEqual(rollups.totals('user_activity', 'activity_type', 'login')['total_count'], 3)
+        self.assertEqual(retention.compacted_verifications(self.product.pk), 3)
+    
+    def test_compact_is_idempotent(self):
+        retention.compact(self.today, keep_months=3)
+        snapshot = set(DailyRollup.objects.values_list('date', 'source', 'dimension', 'bucket', 'count'))
+        self.assertEqual(retention.compact(self.today, keep_months=3), {'user_activity': 0, 'verification': 0})
+        self.assertEqual(set(DailyRollup.objects.values_list('date', 'source', 'dimension', 'bucket', 'count')), snapshot)
+    
+    def test_totals_include_compacted_rows(self):
+        before = DashboardStatsView.compute_stats()['total_verifications']
+        retention.compact(self.today, keep_months=3)
+        self.assertEqual(DashboardStatsView.compute_stats()['total_verifications'], before)
+    
+    def test_command_rejects_empty_retention(self):
+        with self.assertRaises(CommandError):
+            call_command('compact_raw_history', keep_months=0)
+    
+    def test_command_refuses_to_run_concurrently(self):
+        cache.add(COMPACT_LOCK_KEY, True, 60)
+        with self.assertRaises(CommandError):
+            call_command('compact_raw_history', keep_months=3)
+        self.assertEqual(Verification.objects.count(), 4)
+
+
+class ExportTests(AnalyticsTestCase):
+    """Exports are limited to staff"""
+    
+    def test_export_requires_staff(self):
+        client = APIClient()
+        client.force_authenticate(self.farmer)
+        self.assertEqual(client.get('/api/v1/analytics/export/products/').status_code, 403)
+    
+    def test_csv_export(self):
+        response = self.client.get('/api/v1/analytics/export/products/?file_format=csv')
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1 + Product.objects.count())
@@ -1,43 +1,92 @@
 """
 Views for Analytics app
 """
+from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, Sum, Avg, Q
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from django.conf import settings
+from django.db.models import Count, Q
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from agritrace.cache import get_or_revalidate
+from agritrace.utils import parse_timestamp_bound
 from products.models import Product, Verification
 from transactions.models import Transaction
 from users.models import User
+from . import rollups
+from .exports import (
+    EXPORT_DATASETS,
+    export_headers,
+    export_rows,
+    stream_csv,
+    stream_ndjson,
+    build_xlsx
+)
 
 
 class DashboardStatsView(APIView):
     """Get dashboard statistics"""
     permission_classes = (IsAuthenticated,)
     
+    CACHE_KEY = 'analytics:dashboard'
+    
     def get(self, request):
-        total_products = Product.objects.count()
-        total_transactions = Transaction.objects.count()
-        total_users = User.objects.count()
-        total_verifications = Verification.objects.count()
-        
-        biofortified_count = Product.objects.filter(biofortified=True).count()
-        
-        recent_products = Product.objects.order_by('-created_at')[:5]
-        recent_transactions = Transaction.objects.order_by('-timestamp')[:5]
+        return Response(get_or_revalidate(
+            self.CACHE_KEY,
+            self.compute_stats,
+            fresh_for=settings.DASHBOARD_CACHE_FRESH,
+            stale_for=settings.DASHBOARD_CACHE_STALE
+        ))
+    
+    @staticmethod
+    def compute_stats():
+        """One aggregate per table plus two lean projections for recent items"""
+        products = Product.objects.aggregate(
+            total=Count('id'),
+            biofortified=Count('id', filter=Q(biofortified=True))
+        )
+        total_transactions = Transaction.objects.aggregate(total=Count('id'))['total']
+        total_users = User.objects.aggregate(total=Count('id'))['total']
+        # Verifications past retention only exist as rollups
+        total_verifications = (
+            Verification.objects.aggregate(total=Count('id'))['total'] +
+            rollups.totals('verification', 'result')['total_count']
+        )
         
-        from products.serializers import ProductSerializer
-        from transactions.serializers import TransactionSerializer
+        recent_products = Product.objects.order_by('-created_at').values(
+            'id', 'qr_code', 'name', 'variety', 'biofortified', 'status',
+            'creator__username', 'created_at'
+        )[:5]
+        recent_transactions = Transaction.objects.order_by('-timestamp').values(
+            'id', 'transaction_id', 'transaction_type', 'status', 'quantity', 'price',
+            'product__qr_code', 'from_user__username', 'to_user__username', 'timestamp'
+        )[:5]
         
-        return Response({
-            'total_products': total_products,
+        return {
+            'total_products': products['total'],
             'total_transactions': total_transactions,
             'total_users': total_users,
             'total_verifications': total_verifications,
-            'biofortified_products': biofortified_count,
-            'conventional_products': total_products - biofortified_count,
-            'recent_products': ProductSerializer(recent_products, many=True).data,
-            'recent_transactions': TransactionSerializer(recent_transactions, many=True).data
-        })
+            'biofortified_products': products['biofortified'],
+            'conventional_products': products['total'] - products['biofortified'],
+            'recent_products': list(recent_products),
+            'recent_transactions': list(recent_transactions)
+        }
+
+
+def breakdown_counts(source_name, dimension, key):
+    """Per-value counts of a dimension, read from the daily rollups"""
+    return [
+        {key: row['bucket'], 'count': row['total_count']}
+        for row in rollups.breakdown(source_name, dimension)
+    ]
+
+
+def average_amount(totals):
+    if not totals['total_amount_count']:
+        return None
+    return totals['total_amount'] / totals['total_amount_count']
 
 
 class ProductStatsView(APIView):
@@ -45,20 +94,19 @@ class ProductStatsView(APIView):
     permission_classes = (IsAuthenticated,)
     
     def get(self, request):
-        stats = Product.objects.aggregate(
-            total=Count('id'),
-            biofortified=Count('id', filter=Q(biofortified=True)),
-            avg_iron=Avg('iron_content'),
-            total_quantity=Sum('quantity')
-        )
-        
-        by_status = Product.objects.values('status').annotate(count=Count('id'))
-        by_variety = Product.objects.values('variety').annotate(count=Count('id'))
+        totals = rollups.totals('product', 'status')
+        stats = {
+            'total': totals['total_count'],
+            'biofortified': rollups.totals('product', 'biofortified', 'true')['total_count'],
+            'avg_iron': average_amount(totals),
+            'total_quantity': totals['total_quantity']
+        }
         
         return Response({
             'summary': stats,
-            'by_status': list(by_status),
-            'by_variety': list(by_variety)
+            'by_status': breakdown_counts('product', 'status', 'status'),
+            'by_variety': breakdown_counts('product', 'variety', 'variety'),
+            'by_district': breakdown_counts('product', 'district', 'district')
         })
 
 
@@ -67,20 +115,19 @@ class TransactionStatsView(APIView):
     permission_classes = (IsAuthenticated,)
     
     def get(self, request):
-        stats = Transaction.objects.aggregate(
-            total=Count('id'),
-            total_value=Sum('price'),
-            avg_price=Avg('price'),
-            total_quantity=Sum('quantity')
-        )
-        
-        by_type = Transaction.objects.values('transaction_type').annotate(count=Count('id'))
-        by_status = Transaction.objects.values('status').annotate(count=Count('id'))
+        totals = rollups.totals('transaction', 'status')
+        stats = {
+            'total': totals['total_count'],
+            'total_value': totals['total_amount'],
+            'avg_price': average_amount(totals),
+            'total_quantity': totals['total_quantity']
+        }
         
         return Response({
             'summary': stats,
-            'by_type': list(by_type),
-            'by_status': list(by_status)
+            'by_type': breakdown_counts('transaction', 'transaction_type', 'transaction_type'),
+            'by_status': breakdown_counts('transaction', 'status', 'status'),
+            'by_district': breakdown_counts('transaction', 'district', 'district')
         })
 
 
@@ -89,16 +136,15 @@ class UserStatsView(APIView):
     permission_classes = (IsAuthenticated,)
     
     def get(self, request):
-        stats = User.objects.aggregate(
-            total=Count('id'),
-            verified=Count('id', filter=Q(verified_status=True))
-        )
-        
-        by_type = User.objects.values('user_type').annotate(count=Count('id'))
+        stats = {
+            'total': rollups.totals('user', 'user_type')['total_count'],
+            'verified': rollups.totals('user', 'verified', 'true')['total_count']
+        }
         
         return Response({
             'summary': stats,
-            'by_type': list(by_type)
+            'by_type': breakdown_counts('user', 'user_type', 'user_type'),
+            'by_district': breakdown_counts('user', 'district', 'district')
         })
 
 
@@ -107,26 +153,81 @@ class SupplyChainStatsView(APIView):
     permission_classes = (IsAuthenticated,)
     
     def get(self, request):
-        from transactions.models import SupplyChain
-        
-        stats = SupplyChain.objects.aggregate(
-            total_steps=Count('id')
-        )
-        
-        by_action = SupplyChain.objects.values('action').annotate(count=Count('id'))
+        stats = {
+            'total_steps': rollups.totals('supply_chain', 'action')['total_count']
+        }
         
         return Response({
             'summary': stats,
-            'by_action': list(by_action)
+            'by_action': breakdown_counts('supply_chain', 'action', 'action'),
+            'by_district': breakdown_counts('supply_chain', 'district', 'district')
         })
 
 
 class ExportDataView(APIView):
-    """Export data to CSV/Excel"""
-    permission_classes = (IsAuthenticated,)
+    """
+    Export data to CSV, NDJSON or Excel (admin only: exports span all users)
+    
+    Query params:
+        file_format: csv (default), ndjson or xlsx
+        since / until: Date or datetime bounds on the record date
+        district: District name
+    """
+    permission_classes = (IsAdminUser,)
+    
+    CONTENT_TYPES = {
+        'csv': 'text/csv',
+        'ndjson': 'application/x-ndjson',
+        'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    }
     
     def get(self, request, export_type):
-        # TODO: Implement actual export functionality
-        return Response({
-            'detail': f'Export {export_type} functionality coming soon'
-        })
+        dataset = EXPORT_DATASETS.get(export_type)
+        if dataset is None:
+            return Response(
+                {
+                    'detail': f'Unknown export type: {export_type}',
+                    'available': sorted(EXPORT_DATASETS)
+                },
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in self.CONTENT_TYPES:
+            return Response(
+                {'detail': f'file_format must be one of {", ".join(self.CONTENT_TYPES)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        bounds = {}
+        for param in ('since', 'until'):
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            bounds[param] = parse_timestamp_bound(value, end=(param == 'until'))
+            if bounds[param] is None:
+                return Response(
+                    {'detail': f'Invalid {param} date'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        headers = export_headers(dataset)
+        rows = export_rows(dataset, district=request.query_params.get('district'), **bounds)
+        filename = f'{export_type}-{timezone.localdate():%Y%m%d}.{file_format}'
+        
+        if file_format == 'xlsx':
+            # Workbooks can only be written out once complete
+            return FileResponse(
+                build_xlsx(export_type, headers, rows),
+                as_attachment=True,
+                filename=filename,
+                content_type=self.CONTENT_TYPES[file_format]
+            )
+        
+        stream = stream_csv if file_format == 'csv' else stream_ndjson
+        response = StreamingHttpResponse(
+            stream(headers, rows),
+            content_type=self.CONTENT_TYPES[file_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
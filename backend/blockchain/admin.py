@@ -0,0 +1,64 @@
+"""
+Admin configuration for Blockchain models
+"""
+from django.contrib import admin
+from .models import (
+    AnchorBatch,
+    BlockchainJob,
+    IndexerCheckpoint,
+    IndexedBatch,
+    IndexedProduct,
+    IndexedSupplyChainStep,
+    IndexedTransaction
+)
+
+
+@admin.register(BlockchainJob)
+class BlockchainJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'job_type', 'status', 'tx_hash', 'block_number', 'requested_by', 'created_at']
+    list_filter = ['job_type', 'status', 'created_at']
+    search_fields = ['id', 'tx_hash', 'requested_by__username']
+    readonly_fields = [
+        'id', 'tx_hash', 'raw_transaction', 'attempts', 'submitted_at',
+        'block_number', 'error', 'created_at', 'updated_at'
+    ]
+    ordering = ['-created_at']
+
+
+@admin.register(AnchorBatch)
+class AnchorBatchAdmin(admin.ModelAdmin):
+    list_display = ['root', 'leaf_count', 'status', 'job', 'created_at', 'anchored_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['root', 'job__tx_hash']
+    readonly_fields = ['root', 'leaf_count', 'job', 'created_at', 'anchored_at']
+    ordering = ['-created_at']
+
+
+@admin.register(IndexerCheckpoint)
+class IndexerCheckpointAdmin(admin.ModelAdmin):
+    list_display = ['name', 'block_number', 'updated_at']
+
+
+@admin.register(IndexedProduct)
+class IndexedProductAdmin(admin.ModelAdmin):
+    list_display = ['qr_code', 'name', 'variety', 'creator', 'verified', 'block_number']
+    list_filter = ['verified', 'biofortified']
+    search_fields = ['qr_code', 'name', 'creator', 'tx_hash']
+
+
+@admin.register(IndexedBatch)
+class IndexedBatchAdmin(admin.ModelAdmin):
+    list_display = ['batch_number', 'seed_variety', 'farmer', 'block_number']
+    search_fields = ['batch_number', 'farmer', 'tx_hash']
+
+
+@admin.register(IndexedTransaction)
+class IndexedTransactionAdmin(admin.ModelAdmin):
+    list_display = ['record_hash', 'product_qr_code', 'from_address', 'to_address', 'transaction_type', 'block_number']
+    search_fields = ['record_hash', 'product_qr_code', 'from_address', 'to_address', 'tx_hash']
+
+
+@admin.register(IndexedSupplyChainStep)
+class IndexedSupplyChainStepAdmin(admin.ModelAdmin):
+    list_display = ['qr_code', 'action', 'actor', 'block_number', 'log_index']
+    search_fields = ['qr_code', 'actor', 'tx_hash']
@@ -0,0 +1,210 @@
+"""
+Merkle-batched anchoring of AGRITRACE records
+"""
+import json
+from collections import namedtuple
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from products.cache import invalidate_qr_payloads
+from products.models import Batch, Product
+from transactions.models import Transaction, SupplyChain
+from .merkle import build_tree, from_hex, leaf_hash, merkle_proof, merkle_root, to_hex, verify_proof
+from .models import AnchorBatch
+from .clients import web3_client
+
+
+AnchorSource = namedtuple('AnchorSource', ['model', 'fields', 'date_field'])
+
+# Record types keyed by the name used in URLs. Only fields that never change
+# after creation are hashed, so later status updates keep proofs valid.
+ANCHOR_SOURCES = {
+    'products': AnchorSource(
+        model=Product,
+        fields=[
+            'qr_code', 'name', 'variety', 'iron_content', 'biofortified',
+            'harvest_date', 'creator_id', 'batch_id'
+        ],
+        date_field='created_at',
+    ),
+    'batches': AnchorSource(
+        model=Batch,
+        fields=['batch_number', 'seed_variety', 'planting_date', 'total_quantity', 'farmer_id'],
+        date_field='created_at',
+    ),
+    'transactions': AnchorSource(
+        model=Transaction,
+        fields=[
+            'transaction_id', 'from_user_id', 'to_user_id', 'product_id',
+            'quantity', 'price', 'transaction_type'
+        ],
+        date_field='timestamp',
+    ),
+    'supply-chain': AnchorSource(
+        model=SupplyChain,
+        fields=['product_id', 'step_number', 'actor_id', 'action', 'timestamp'],
+        date_field='timestamp',
+    ),
+}
+
+ROOT_CACHE_PREFIX = 'blockchain:anchored-root:'
+
+
+def record_leaf(record_type, pk, values):
+    """Leaf hash of a record: its type, primary key and hashed fields as canonical JSON"""
+    source = ANCHOR_SOURCES[record_type]
+    document = {'type': record_type, 'id': pk}
+    document.update((field, values[field]) for field in source.fields)
+    data = json.dumps(document, cls=DjangoJSONEncoder, sort_keys=True, separators=(',', ':'))
+    return leaf_hash(data.encode('utf-8'))
+
+
+def pending_records(record_type):
+    """Records of a type that are neither anchored individually nor batched yet"""
+    model = ANCHOR_SOURCES[record_type].model
+    return model.objects.filter(anchor_batch__isnull=True, blockchain_hash='')
+
+
+def anchor_due():
+    """Whether enough records are waiting, or the oldest has waited long enough"""
+    cutoff = timezone.now() - timedelta(seconds=settings.ANCHOR_MAX_DELAY)
+    waiting = 0
+    for record_type, source in ANCHOR_SOURCES.items():
+        queryset = pending_records(record_type)
+        if queryset.filter(**{f'{source.date_field}__lte': cutoff}).exists():
+            return True
+        waiting += queryset[:settings.ANCHOR_BATCH_SIZE].count()
+        if waiting >= settings.ANCHOR_BATCH_SIZE:
+            return True
+    return False
+
+
+def create_anchor_batch(limit=None):
+    """
+    Hash up to limit pending records into a tree and store each record's proof
+    
+    Returns:
+        The new AnchorBatch, or None when nothing is pending
+    """
+    limit = limit or settings.ANCHOR_BATCH_SIZE
+    records = []
+    for record_type, source in ANCHOR_SOURCES.items():
+        remaining = limit - len(records)
+        if remaining <= 0:
+            break
+        rows = pending_records(record_type).order_by(source.date_field, 'pk').values(
+            'pk', *source.fields
+        )[:remaining]
+        records.extend((record_type, row['pk'], row) for row in rows)
+    if not records:
+        return None
+    
+    levels = build_tree([record_leaf(record_type, pk, row) for record_type, pk, row in records])
+    root = to_hex(merkle_root(levels))
+    with transaction.atomic():
+        # The records of a failed batch come back in the same order, with the
+        # same root; retry them under that batch rather than a duplicate root
+        batch = AnchorBatch.objects.select_for_update().filter(root=root, status='failed').first()
+        if batch is None:
+            batch = AnchorBatch.objects.create(root=root, leaf_count=len(records))
+        else:
+            batch.status = 'pending'
+            batch.job = None
+            batch.save(update_fields=['status', 'job'])
+        updates = {}
+        for index, (record_type, pk, row) in enumerate(records):
+            instance = ANCHOR_SOURCES[record_type].model(pk=pk)
+            instance.anchor_batch = batch
+            instance.merkle_proof = [to_hex(node) for node in merkle_proof(levels, index)]
+            updates.setdefault(record_type, []).append(instance)
+        for record_type, instances in updates.items():
+            ANCHOR_SOURCES[record_type].model.objects.bulk_update(
+                instances, ['anchor_batch', 'merkle_proof'], batch_size=500
+            )
+    return batch
+
+
+def _anchored_qr_codes(batch):
+    """QR codes whose cached payload embeds a record of the batch"""
+    return Product.objects.filter(
+        Q(anchor_batch=batch) | Q(batch__anchor_batch=batch)
+    ).values_list('qr_code', flat=True).distinct()
+
+
+def complete_anchor_batch(job):
+    """Record the outcome of the blockchain job that anchored a batch's root"""
+    batch = AnchorBatch.objects.filter(job=job).first()
+    if batch is None:
+        return
+    
+    with transaction.atomic():
+        if job.status == 'mined':
+            batch.status = 'anchored'
+            batch.anchored_at = timezone.now()
+            # Records registered on chain individually keep their own hash
+            for source in ANCHOR_SOURCES.values():
+                source.model.objects.filter(anchor_batch=batch, blockchain_hash='').update(
+                    blockchain_hash=job.tx_hash
+                )
+        else:
+            # Release the records so the next batch picks them up again
+            batch.status = 'failed'
+            for source in ANCHOR_SOURCES.values():
+                source.model.objects.filter(anchor_batch=batch).update(
+                    anchor_batch=None, merkle_proof=None
+                )
+        qr_codes = list(_anchored_qr_codes(batch))
+        batch.save(update_fields=['status', 'anchored_at'])
+        transaction.on_commit(lambda: invalidate_qr_payloads(qr_codes))
+
+
+def anchored_at(root):
+    """
+    On-chain anchor timestamp of a root, read through the cache
+    
+    An anchored root can never change, so positive answers are cached for
+    good; misses are cached briefly while the anchor may still be mining.
+    """
+    key = f'{ROOT_CACHE_PREFIX}{root}'
+    timestamp = cache.get(key)
+    if timestamp is None:
+        timestamp = web3_client.get_anchored_root(root)
+        cache.set(key, timestamp, None if timestamp else settings.ANCHOR_ROOT_MISS_TIMEOUT)
+    return timestamp
+
+
+def verify_record(record_type, pk):
+    """
+    Check a record's current fields against its proof and anchored root
+    
+    Returns:
+        Dict describing the check, or None when the record is not in a batch
+    """
+    source = ANCHOR_SOURCES[record_type]
+    row = source.model.objects.filter(pk=pk, anchor_batch__isnull=False).values(
+        'blockchain_hash', 'merkle_proof', 'anchor_batch__root', *source.fields
+    ).first()
+    if row is None:
+        return None
+    
+    leaf = record_leaf(record_type, pk, row)
+    root = row['anchor_batch__root']
+    proof = row['merkle_proof'] or []
+    proof_valid = verify_proof(leaf, [from_hex(node) for node in proof], from_hex(root))
+    timestamp = anchored_at(root)
+    return {
+        'record_type': record_type,
+        'record_id': pk,
+        'leaf': to_hex(leaf),
+        'root': root,
+        'proof': proof,
+        'tx_hash': row['blockchain_hash'],
+        'proof_valid': proof_valid,
+        'anchored': bool(timestamp),
+        'anchored_at': timestamp or None,
+        'verified': proof_valid and bool(timestamp),
+    }
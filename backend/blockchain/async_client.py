@@ -0,0 +1,116 @@
+"""
+Async web3 client for serving blockchain reads under ASGI
+"""
+import asyncio
+from eth_account import Account
+from web3 import AsyncWeb3
+from web3.exceptions import ContractLogicError
+from django.conf import settings
+from .cache import ahead_block, aget_call_result, aset_call_result
+from .web3_client import load_contract_abi, product_to_dict, supply_chain_to_list
+
+
+class AsyncWeb3Client:
+    """Read-only AsyncWeb3 counterpart of Web3Client"""
+    
+    def __init__(self):
+        self.w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(settings.ETHEREUM_NODE_URL))
+        self.address = None
+        
+        if settings.ETHEREUM_PRIVATE_KEY:
+            self.address = Account.from_key(settings.ETHEREUM_PRIVATE_KEY).address
+        
+        self.contract_abi = load_contract_abi()
+        if settings.CONTRACT_ADDRESS and self.contract_abi:
+            self.contract = self.w3.eth.contract(
+                address=settings.CONTRACT_ADDRESS,
+                abi=self.contract_abi
+            )
+        else:
+            self.contract = None
+    
+    async def is_connected(self):
+        """Check if connected to Ethereum node"""
+        return await self.w3.is_connected()
+    
+    async def get_balance(self, address=None):
+        """Get ETH balance of address"""
+        address = address or self.address
+        if address:
+            balance = await self.w3.eth.get_balance(address)
+            return self.w3.from_wei(balance, 'ether')
+        return 0
+    
+    async def get_status(self):
+        """Connection state and account balance, read concurrently"""
+        connected, balance = await asyncio.gather(
+            self.is_connected(), self.get_balance(), return_exceptions=True
+        )
+        if connected is not True:
+            return {'connected': False, 'balance': 0}
+        return {'connected': True, 'balance': 0 if isinstance(balance, Exception) else balance}
+    
+    async def _call(self, function_name, *args):
+        """Run a contract view call at the head block, through the shared call cache"""
+        block = await ahead_block(self.w3)
+        entry = await aget_call_result(function_name, args, block)
+        if entry is None:
+            function = getattr(self.contract.functions, function_name)(*args)
+            try:
+                entry = (True, await function.call(block_identifier=block))
+            except ContractLogicError as e:
+                entry = (False, str(e))
+            await aset_call_result(function_name, args, block, entry)
+        
+        ok, value = entry
+        if not ok:
+            raise ContractLogicError(value)
+        return value
+    
+    async def get_product(self, qr_code):
+        """Get product details from blockchain"""
+        if not self.contract:
+            raise Exception("Contract not initialized")
+        
+        try:
+            return product_to_dict(await self._call('getProduct', qr_code))
+        except Exception:
+            return None
+    
+    async def get_supply_chain_history(self, qr_code):
+        """Get supply chain history from blockchain"""
+        if not self.contract:
+            raise Exception("Contract not initialized")
+        
+        try:
+            return supply_chain_to_list(await self._call('getSupplyChainHistory', qr_code))
+        except Exception:
+            return []
+    
+    async def is_product_verified(self, qr_code):
+        """Check if product is verified on blockchain"""
+        if not self.contract:
+            raise Exception("Contract not initialized")
+        
+        try:
+            return await self._call('isProductVerified', qr_code)
+        except Exception:
+            return False
+    
+    async def get_verified_products(self, qr_codes):
+        """
+        Verification flag and product details of several QR codes
+        
+        Returns:
+            Dict of qr_code -> (is_verified, product dict or None)
+        """
+        qr_codes = list(dict.fromkeys(qr_codes))
+        results = await asyncio.gather(*(
+            asyncio.gather(self.is_product_verified(qr_code), self.get_product(qr_code))
+            for qr_code in qr_codes
+        ))
+        return {qr_code: tuple(result) for qr_code, result in zip(qr_codes, results)}
+
+
+# Singleton instance, built on first use
+from .clients import async_web3_client  # noqa: E402,F401
@@ -0,0 +1,156 @@
+"""
+Async views for Blockchain app
+
+Served instead of the read views in views.py when BLOCKCHAIN_ASYNC_VIEWS is
+enabled, which only pays off under an ASGI server (agritrace.asgi): a
+request waiting on the node then yields its worker to other requests.
+"""
+import functools
+import json
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from .clients import async_web3_client
+from .models import IndexedProduct, IndexedSupplyChainStep
+from .views import BulkVerifyProductsView
+
+
+async def authenticate(request):
+    """Authenticate a plain Django request with the API's JWT authentication"""
+    try:
+        result = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+
+def async_api_view(methods=('GET',)):
+    """Method check, JWT authentication and CSRF exemption for an async view"""
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return JsonResponse(
+                    {'detail': f'Method "{request.method}" not allowed.'},
+                    status=405
+                )
+            user = await authenticate(request)
+            if user is None:
+                return JsonResponse(
+                    {'detail': 'Authentication credentials were not provided.'},
+                    status=401
+                )
+            request.user = user
+            return await view(request, *args, **kwargs)
+        
+        # Token authenticated like the DRF views, so no CSRF cookie is involved
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+@async_api_view()
+async def blockchain_status(request):
+    """Check blockchain connection status"""
+    chain_status = await async_web3_client.get_status()
+    contract = async_web3_client.contract
+    return JsonResponse({
+        'connected': chain_status['connected'],
+        'balance': float(chain_status['balance']),
+        'network': 'Goerli Testnet',
+        'contract_address': contract.address if contract else None
+    })
+
+
+@async_api_view()
+async def verify_product(request, qr_code):
+    """Verify product on blockchain"""
+    indexed = await IndexedProduct.objects.filter(qr_code=qr_code).afirst()
+    if indexed:
+        return JsonResponse({
+            'verified': indexed.verified,
+            'product': indexed.as_chain_data(),
+            'blockchain_verified': True
+        })
+    
+    try:
+        results = await async_web3_client.get_verified_products([qr_code])
+        is_verified, product_data = results[qr_code]
+        return JsonResponse({
+            'verified': is_verified,
+            'product': product_data,
+            'blockchain_verified': True
+        })
+    except Exception as e:
+        return JsonResponse({'detail': f'Verification error: {str(e)}'}, status=500)
+
+
+@async_api_view(methods=('POST',))
+async def bulk_verify_products(request):
+    """Verify a list of products on blockchain, e.g. a whole delivery"""
+    try:
+        qr_codes = json.loads(request.body or b'{}').get('qr_codes')
+    except (ValueError, AttributeError):
+        qr_codes = None
+    if not isinstance(qr_codes, list) or not qr_codes:
+        return JsonResponse({'detail': 'qr_codes must be a non-empty list'}, status=400)
+    max_qr_codes = BulkVerifyProductsView.max_qr_codes
+    if len(qr_codes) > max_qr_codes:
+        return JsonResponse(
+            {'detail': f'At most {max_qr_codes} QR codes can be verified at once'},
+            status=400
+        )
+    qr_codes = [str(qr_code) for qr_code in qr_codes]
+    
+    results = {
+        indexed.qr_code: (indexed.verified, indexed.as_chain_data())
+        async for indexed in IndexedProduct.objects.filter(qr_code__in=qr_codes)
+    }
+    missing = [qr_code for qr_code in qr_codes if qr_code not in results]
+    if missing:
+        try:
+            results.update(await async_web3_client.get_verified_products(missing))
+        except Exception as e:
+            return JsonResponse({'detail': f'Verification error: {str(e)}'}, status=500)
+    
+    return JsonResponse({
+        'results': [
+            {
+                'qr_code': qr_code,
+                'verified': results[qr_code][0],
+                'product': results[qr_code][1]
+            }
+            for qr_code in dict.fromkeys(qr_codes)
+        ]
+    })
+
+
+@async_api_view()
+async def get_product(request, qr_code):
+    """Get product from blockchain"""
+    indexed = await IndexedProduct.objects.filter(qr_code=qr_code).afirst()
+    if indexed:
+        return JsonResponse(indexed.as_chain_data())
+    
+    try:
+        product = await async_web3_client.get_product(qr_code)
+        if product:
+            return JsonResponse(product)
+        return JsonResponse({'detail': 'Product not found on blockchain'}, status=404)
+    except Exception as e:
+        return JsonResponse({'detail': f'Error: {str(e)}'}, status=500)
+
+
+@async_api_view()
+async def get_supply_chain(request, qr_code):
+    """Get supply chain from blockchain"""
+    if await IndexedProduct.objects.filter(qr_code=qr_code).aexists():
+        steps = IndexedSupplyChainStep.objects.filter(qr_code=qr_code).order_by('block_number', 'log_index')
+        return JsonResponse({'supply_chain': [step.as_chain_data() async for step in steps]})
+    
+    try:
+        history = await async_web3_client.get_supply_chain_history(qr_code)
+        return JsonResponse({'supply_chain': history})
+    except Exception as e:
+        return JsonResponse({'detail': f'Error: {str(e)}'}, status=500)
@@ -0,0 +1,260 @@
+"""
+In-process EVM harness and throughput benchmarks for Web3Client
+"""
+import math
+import os
+import time
+import uuid
+from collections import namedtuple
+from collections.abc import Mapping
+from django.conf import settings
+from hexbytes import HexBytes
+from .merkle import build_tree, leaf_hash, merkle_root, to_hex
+from .web3_client import Web3Client
+
+
+CONTRACT_SOURCE = os.path.join(os.path.dirname(__file__), 'contracts', 'AgriTrace.sol')
+
+# Compiler settings of the Truffle project (blockchain/truffle-config.js)
+SOLC_VERSION = '0.8.19'
+SOLC_OPTIMIZER_RUNS = 200
+SOLC_EVM_VERSION = 'istanbul'
+OPENZEPPELIN_PATH = settings.BASE_DIR.parent / 'blockchain' / 'node_modules' / '@openzeppelin'
+
+FLOWS = ('register', 'record', 'step', 'verify', 'anchor')
+MODES = ('sequential', 'pipelined', 'batched')
+
+BenchmarkResult = namedtuple(
+    'BenchmarkResult',
+    ['flow', 'mode', 'ops', 'errors', 'seconds', 'ops_per_second', 'p50_ms', 'p99_ms']
+)
+
+
+def compile_contract(openzeppelin_path=OPENZEPPELIN_PATH):
+    """
+    Compile contracts/AgriTrace.sol with py-solc-x
+    
+    Returns:
+        Tuple of (abi, creation bytecode)
+    """
+    import solcx
+    
+    if SOLC_VERSION not in [str(version) for version in solcx.get_installed_solc_versions()]:
+        solcx.install_solc(SOLC_VERSION)
+    output = solcx.compile_files(
+        [CONTRACT_SOURCE],
+        output_values=['abi', 'bin'],
+        solc_version=SOLC_VERSION,
+        import_remappings={'@openzeppelin': str(openzeppelin_path)},
+        allow_paths=[str(openzeppelin_path)],
+        optimize=True,
+        optimize_runs=SOLC_OPTIMIZER_RUNS,
+        evm_version=SOLC_EVM_VERSION
+    )
+    contract = next(value for key, value in output.items() if key.endswith(':AgriTrace'))
+    return contract['abi'], contract['bin']
+
+
+def to_wire(value):
+    """Encode a value the way a JSON-RPC node sends it: quantities and bytes as hex"""
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, int):
+        return hex(value)
+    if isinstance(value, (bytes, bytearray)):
+        return HexBytes(value).hex()
+    if isinstance(value, Mapping):
+        return {key: to_wire(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_wire(item) for item in value]
+    return value
+
+
+class InProcessWeb3Client(Web3Client):
+    """
+    Web3Client whose JSON-RPC batches are served by an in-process provider
+    
+    The eth-tester provider returns Python values and leaves the JSON-RPC
+    formatting to web3's middleware, so each batched request goes through
+    the middleware stack and is turned back into its wire form. Batched
+    reads exercise the same code as against a node, minus the HTTP round
+    trip.
+    """
+    
+    def _rpc_batch(self, calls):
+        replies = []
+        for index, (method, params) in enumerate(calls):
+            try:
+                reply = self.w3.manager._make_request(method, params)
+            except Exception as e:
+                # eth-tester raises where a node replies with an error
+                reply = {'error': {'code': -32000, 'message': str(e)}}
+            reply = dict(reply, id=index)
+            if 'result' in reply:
+                reply['result'] = to_wire(reply['result'])
+            replies.append(reply)
+        return replies
+
+
+class EVMHarness:
+    """
+    AgriTrace deployed to a fresh in-process py-evm chain
+    
+    Requires eth-tester[py-evm] and py-solc-x. The chain mines every
+    transaction as it arrives, so timings measure the client side of the
+    blockchain path (fee and nonce lookups, gas estimation, signing, RPC
+    calls and receipt handling) rather than block times.
+    """
+    
+    def __init__(self, abi, bytecode):
+        from eth_tester import EthereumTester, PyEVMBackend
+        from eth_tester.backends.pyevm.main import get_default_account_keys
+        from web3 import Web3
+        from web3.providers.eth_tester import EthereumTesterProvider
+        
+        self.w3 = Web3(EthereumTesterProvider(EthereumTester(PyEVMBackend())))
+        owner, self.recipient = self.w3.eth.accounts[:2]
+        tx_hash = self.w3.eth.contract(abi=abi, bytecode=bytecode).constructor().transact({'from': owner})
+        address = self.w3.eth.wait_for_transaction_receipt(tx_hash)['contractAddress']
+        
+        # The first default key is the owner account, verified by the constructor
+        self.client = InProcessWeb3Client(
+            w3=self.w3,
+            private_key=get_default_account_keys()[0].to_hex(),
+            contract_address=address,
+            contract_abi=abi
+        )
+        self.run_id = uuid.uuid4().hex[:8]
+    
+    def register_product(self, qr_code):
+        """Register a product outside any measurement"""
+        result = self.client.register_product(**self._product_kwargs(qr_code), wait=True)
+        if not result.get('success'):
+            raise RuntimeError(f'Could not register {qr_code}: {result.get("error")}')
+    
+    def _product_kwargs(self, qr_code):
+        return {
+            'qr_code': qr_code,
+            'name': 'Iron Beans',
+            'variety': 'RWR 2245',
+            'iron_content': 80,
+            'biofortified': True,
+            'quantity': 1000,
+            'harvest_date': int(time.time()),
+            'ipfs_hash': ''
+        }
+    
+    def operations(self, flow, count, leaves=1024):
+        """
+        Web3Client write calls for one flow
+        
+        Products that the record, step and verify flows act on are
+        registered first.
+        
+        Returns:
+            List of (method name, kwargs) tuples
+        """
+        if flow == 'register':
+            return [
+                ('register_product', self._product_kwargs(f'BENCH-{self.run_id}-{index}'))
+                for index in range(count)
+            ]
+        if flow == 'anchor':
+            roots = [
+                to_hex(merkle_root(build_tree([
+                    leaf_hash(f'{self.run_id}:{index}:{leaf}'.encode()) for leaf in range(leaves)
+                ])))
+                for index in range(count)
+            ]
+            return [('anchor_root', {'root': root, 'leaf_count': leaves}) for root in roots]
+        
+        qr_code = f'BENCH-{self.run_id}-{flow}'
+        self.register_product(qr_code)
+        if flow == 'record':
+            kwargs = {
+                'to_address': self.recipient,
+                'qr_code': qr_code,
+                'quantity': 1,
+                'price': 500,
+                'transaction_type': 'sale'
+            }
+            return [('record_transaction', kwargs)] * count
+        if flow == 'step':
+            kwargs = {
+                'qr_code': qr_code,
+                'action': 'transport',
+                'description': 'Benchmark step',
+                'location': 'Musanze'
+            }
+            return [('add_supply_chain_step', kwargs)] * count
+        if flow == 'verify':
+            return [('verify_product', {'qr_code': qr_code})] * count
+        raise ValueError(f'Unknown flow: {flow}')
+    
+    def run(self, flow, mode, count, leaves=1024):
+        """
+        Drive one flow in one mode and time each operation
+        
+        sequential: each write waits for its own receipt before the next
+            is sent
+        pipelined: writes are sent back to back (the nonce manager hands
+            out nonces locally), then receipts are awaited one by one
+        batched: writes are sent back to back, then all receipts are read
+            in JSON-RPC batches the way reconcile_blockchain_jobs does
+        
+        Latency runs from sending an operation until its receipt was seen.
+        """
+        operations = self.operations(flow, count, leaves=leaves)
+        latencies = []
+        errors = 0
+        started = time.perf_counter()
+        
+        if mode == 'sequential':
+            for method, kwargs in operations:
+                sent = time.perf_counter()
+                result = getattr(self.client, method)(**kwargs, wait=True)
+                latencies.append(time.perf_counter() - sent)
+                errors += not result.get('success')
+        elif mode in ('pipelined', 'batched'):
+            submitted = []
+            for method, kwargs in operations:
+                sent = time.perf_counter()
+                result = getattr(self.client, method)(**kwargs)
+                if result.get('success'):
+                    submitted.append((sent, result['tx_hash']))
+                else:
+                    errors += 1
+            if mode == 'pipelined':
+                for sent, tx_hash in submitted:
+                    receipt = self.client.wait_for_receipt(tx_hash)
+                    latencies.append(time.perf_counter() - sent)
+                    errors += not receipt['success']
+            else:
+                receipts = self.client.get_receipts([tx_hash for _, tx_hash in submitted])
+                seen = time.perf_counter()
+                for sent, tx_hash in submitted:
+                    latencies.append(seen - sent)
+                    errors += not (receipts[tx_hash] and receipts[tx_hash]['success'])
+        else:
+            raise ValueError(f'Unknown mode: {mode}')
+        
+        seconds = time.perf_counter() - started
+        return BenchmarkResult(
+            flow=flow,
+            mode=mode,
+            ops=count,
+            errors=errors,
+            seconds=seconds,
+            ops_per_second=count / seconds if seconds else 0.0,
+            p50_ms=percentile(latencies, 50) * 1000,
+            p99_ms=percentile(latencies, 99) * 1000
+        )
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile, 0 for no values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
@@ -0,0 +1,75 @@
+"""
+Block-aware read cache for contract view calls
+"""
+import hashlib
+import json
+from django.conf import settings
+from django.core.cache import cache
+
+
+HEAD_CACHE_KEY = 'blockchain:head'
+CALL_CACHE_PREFIX = 'blockchain:call:'
+
+
+def head_block(w3):
+    """
+    Latest block number, polled from the node at most once per interval
+    
+    Every cached call result is keyed by this number, so a new head seen by
+    the poll invalidates them all without deleting anything.
+    """
+    block = cache.get(HEAD_CACHE_KEY)
+    if block is None:
+        block = w3.eth.block_number
+        cache.set(HEAD_CACHE_KEY, block, settings.BLOCKCHAIN_HEAD_POLL_INTERVAL)
+    return block
+
+
+async def ahead_block(w3):
+    """Async counterpart of head_block for an AsyncWeb3 instance"""
+    block = await cache.aget(HEAD_CACHE_KEY)
+    if block is None:
+        block = await w3.eth.block_number
+        await cache.aset(HEAD_CACHE_KEY, block, settings.BLOCKCHAIN_HEAD_POLL_INTERVAL)
+    return block
+
+
+def call_cache_key(function_name, args, block):
+    """Build the cache key for a view call made at a given block"""
+    digest = hashlib.sha1(json.dumps(args, default=str).encode('utf-8')).hexdigest()
+    return f'{CALL_CACHE_PREFIX}{function_name}:{digest}:{block}'
+
+
+def get_call_result(function_name, args, block):
+    """Return the cached (ok, value) entry of a view call, or None on a miss"""
+    return cache.get(call_cache_key(function_name, args, block))
+
+
+def set_call_result(function_name, args, block, entry):
+    """Store the (ok, value) entry of a view call"""
+    cache.set(call_cache_key(function_name, args, block), entry, settings.BLOCKCHAIN_CALL_CACHE_TIMEOUT)
+
+
+async def aget_call_result(function_name, args, block):
+    """Async counterpart of get_call_result"""
+    return await cache.aget(call_cache_key(function_name, args, block))
+
+
+async def aset_call_result(function_name, args, block, entry):
+    """Async counterpart of set_call_result"""
+    await cache.aset(call_cache_key(function_name, args, block), entry, settings.BLOCKCHAIN_CALL_CACHE_TIMEOUT)
+
+
+def get_call_results(calls, block):
+    """Cached entries of several (function_name, args) calls, None for misses"""
+    keys = [call_cache_key(function_name, args, block) for function_name, args in calls]
+    found = cache.get_many(keys)
+    return [found.get(key) for key in keys]
+
+
+def set_call_results(entries, block):
+    """Store entries given as {(function_name, args): (ok, value)}"""
+    cache.set_many(
+        {call_cache_key(function_name, args, block): entry for (function_name, args), entry in entries.items()},
+        settings.BLOCKCHAIN_CALL_CACHE_TIMEOUT
+    )
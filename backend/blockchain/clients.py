@@ -0,0 +1,8 @@
+"""
+Blockchain clients, built on first use in each process
+"""
+from agritrace.clients import lazy_client
+
+
+web3_client = lazy_client('web3', 'blockchain.web3_client.Web3Client')
+async_web3_client = lazy_client('async_web3', 'blockchain.async_client.AsyncWeb3Client')
@@ -61,6 +61,7 @@ contract AgriTrace is Ownable, Pausable {
     mapping(string => SupplyChainStep[]) public supplyChain;
     mapping(address => bool) public verifiedUsers;
     mapping(string => bool) public verifiedProducts;
+    mapping(bytes32 => uint256) public anchoredRoots; // Merkle root => anchor timestamp
     
     // Arrays for iteration
     string[] public productQrCodes;
@@ -107,6 +108,13 @@ contract AgriTrace is Ownable, Pausable {
         uint256 timestamp
     );
     
+    event RootAnchored(
+        bytes32 indexed root,
+        uint256 leafCount,
+        address indexed anchoredBy,
+        uint256 timestamp
+    );
+    
     // Modifiers
     modifier onlyVerifiedUser() {
         require(verifiedUsers[msg.sender], "User not verified");
@@ -265,6 +273,21 @@ contract AgriTrace is Ownable, Pausable {
         emit ProductVerified(qrCode, msg.sender, block.timestamp);
     }
     
+    /**
+     * @dev Anchor the Merkle root of a batch of off-chain records
+     */
+    function anchorRoot(bytes32 root, uint256 leafCount) 
+        external 
+        whenNotPaused 
+        onlyVerifiedUser 
+    {
+        require(root != bytes32(0), "Invalid root");
+        require(anchoredRoots[root] == 0, "Root already anchored");
+        
+        anchoredRoots[root] = block.timestamp;
+        emit RootAnchored(root, leafCount, msg.sender, block.timestamp);
+    }
+    
     /**
      * @dev Verify a user (admin only)
      */
@@ -0,0 +1,93 @@
+"""
+Fee and gas limit estimation for transactions sent from the AgriTrace account
+"""
+from django.conf import settings
+from django.core.cache import cache
+from .cache import head_block
+
+
+FEES_CACHE_PREFIX = 'blockchain:fees:'
+GAS_CACHE_PREFIX = 'blockchain:gas:'
+CHAIN_ID_CACHE_KEY = 'blockchain:chain-id'
+
+
+def calldata_bucket(data):
+    """Size bucket of encoded calldata: its byte length rounded up to a power of two"""
+    size = max(1, (len(data) - 2) // 2)
+    return 1 << (size - 1).bit_length()
+
+
+class FeeOracle:
+    """
+    Transaction fee fields and gas limits, cached to avoid per-send RPCs
+    
+    Fees are read once per head block: EIP-1559 chains get maxFeePerGas
+    (BLOCKCHAIN_MAX_FEE_MULTIPLIER x base fee + tip) and
+    maxPriorityFeePerGas, other chains a legacy gasPrice. Gas limits are
+    estimated once per contract function and calldata size bucket, padded
+    by BLOCKCHAIN_GAS_MARGIN, and the largest estimate seen is kept.
+    """
+    
+    def __init__(self, client):
+        self.client = client
+    
+    def chain_id(self):
+        """Chain id, read from the node once"""
+        chain_id = cache.get(CHAIN_ID_CACHE_KEY)
+        if chain_id is None:
+            chain_id = self.client.w3.eth.chain_id
+            cache.set(CHAIN_ID_CACHE_KEY, chain_id, None)
+        return chain_id
+    
+    def get_fees(self):
+        """Fee fields for a transaction sent at the current head block"""
+        key = f'{FEES_CACHE_PREFIX}{head_block(self.client.w3)}'
+        fees = cache.get(key)
+        if fees is None:
+            fees = self._fetch_fees()
+            cache.set(key, fees, settings.BLOCKCHAIN_CALL_CACHE_TIMEOUT)
+        return fees
+    
+    def _fetch_fees(self):
+        # Latest block and suggested tip in one round trip
+        block, tip = self.client._rpc_batch([
+            ('eth_getBlockByNumber', ['latest', False]),
+            ('eth_maxPriorityFeePerGas', []),
+        ])
+        base_fee = (block.get('result') or {}).get('baseFeePerGas')
+        if base_fee is None:
+            return {'gasPrice': self.client.w3.eth.gas_price}
+        
+        if 'result' in tip:
+            priority_fee = int(tip['result'], 16)
+        else:
+            priority_fee = self.client.w3.to_wei(settings.BLOCKCHAIN_PRIORITY_FEE_GWEI, 'gwei')
+        return {
+            'maxFeePerGas': int(base_fee, 16) * settings.BLOCKCHAIN_MAX_FEE_MULTIPLIER + priority_fee,
+            'maxPriorityFeePerGas': priority_fee,
+        }
+    
+    def gas_limit(self, function, fallback):
+        """
+        Gas limit for a contract call, estimated once per size bucket
+        
+        Args:
+            function: Bound contract function
+            fallback: Limit used when the estimate fails, e.g. because the
+                call depends on a transaction that is still pending
+        """
+        data = self.client.contract.encodeABI(fn_name=function.fn_name, args=function.args)
+        key = f'{GAS_CACHE_PREFIX}{function.fn_name}:{calldata_bucket(data)}'
+        limit = cache.get(key)
+        if limit is not None:
+            return limit
+        
+        try:
+            estimate = function.estimate_gas({'from': self.client.account.address})
+        except Exception:
+            return fallback
+        limit = int(estimate * (1 + settings.BLOCKCHAIN_GAS_MARGIN))
+        # Concurrent estimates in the same bucket keep the largest
+        limit = max(limit, cache.get(key) or 0)
+        cache.set(key, limit, settings.BLOCKCHAIN_GAS_ESTIMATE_TIMEOUT)
+        return limit
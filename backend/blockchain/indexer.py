@@ -0,0 +1,249 @@
+"""
+Indexer mirroring AgriTrace contract events into local tables
+"""
+import logging
+from django.conf import settings
+from django.db import transaction
+from eth_utils import event_abi_to_log_topic
+from web3 import Web3
+from .models import (
+    IndexerCheckpoint,
+    IndexedBatch,
+    IndexedProduct,
+    IndexedSupplyChainStep,
+    IndexedTransaction
+)
+from .clients import web3_client
+
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = 'agritrace'
+
+# Event -> contract function whose input carries the fields the event leaves out
+INDEXED_EVENTS = {
+    'ProductRegistered': 'registerProduct',
+    'BatchCreated': 'registerBatch',
+    'TransactionRecorded': 'recordTransaction',
+    'SupplyChainStepAdded': 'addSupplyChainStep',
+    'ProductVerified': 'verifyProduct',
+}
+
+
+def _event_topics(contract):
+    """Map topic0 -> event name for the indexed events"""
+    return {
+        Web3.to_hex(event_abi_to_log_topic(abi)): abi['name']
+        for abi in contract.abi
+        if abi.get('type') == 'event' and abi['name'] in INDEXED_EVENTS
+    }
+
+
+def _store_product_registered(event, params, common):
+    IndexedProduct.objects.update_or_create(
+        qr_code=params['qrCode'],
+        defaults={
+            'name': params['name'],
+            'variety': params['variety'],
+            'iron_content': params['ironContent'],
+            'biofortified': params['biofortified'],
+            'creator': event['args']['creator'],
+            'quantity': params['quantity'],
+            'harvest_date': params['harvestDate'],
+            'ipfs_hash': params['ipfsHash'],
+            'registered_at': event['args']['timestamp'],
+            **common
+        }
+    )
+
+
+def _store_batch_created(event, params, common):
+    IndexedBatch.objects.update_or_create(
+        batch_number=params['batchNumber'],
+        defaults={
+            'seed_variety': params['seedVariety'],
+            'planting_date': params['plantingDate'],
+            'total_quantity': params['totalQuantity'],
+            'farmer': event['args']['farmer'],
+            'created_at': event['args']['timestamp'],
+            **common
+        }
+    )
+
+
+def _store_transaction_recorded(event, params, common):
+    args = event['args']
+    IndexedTransaction.objects.update_or_create(
+        record_hash=Web3.to_hex(args['txHash']),
+        defaults={
+            'from_address': args['from'],
+            'to_address': args['to'],
+            'product_qr_code': args['productQrCode'],
+            'quantity': params['quantity'],
+            'price': params['price'],
+            'transaction_type': params['transactionType'],
+            'timestamp': args['timestamp'],
+            **common
+        }
+    )
+
+
+def _store_supply_chain_step(event, params, common):
+    IndexedSupplyChainStep.objects.update_or_create(
+        tx_hash=common['tx_hash'],
+        log_index=common['log_index'],
+        defaults={
+            'qr_code': params['qrCode'],
+            'actor': event['args']['actor'],
+            'action': params['action'],
+            'description': params['description'],
+            'location': params['location'],
+            'timestamp': event['args']['timestamp'],
+            'block_number': common['block_number'],
+        }
+    )
+
+
+def _backfill_product(qr_code, to_block):
+    """
+    Index the ProductRegistered event of one product, e.g. one registered
+    before BLOCKCHAIN_INDEXER_START_BLOCK
+    
+    Returns:
+        Number of events indexed
+    """
+    contract = web3_client.contract
+    topic = Web3.to_hex(event_abi_to_log_topic(contract.events.ProductRegistered().abi))
+    try:
+        logs = web3_client.w3.eth.get_logs({
+            'address': contract.address,
+            'fromBlock': 'earliest',
+            'toBlock': to_block,
+            'topics': [topic, Web3.to_hex(Web3.keccak(text=qr_code))],
+        })
+    except ValueError:
+        logger.warning("Could not look up the registration of %s", qr_code, exc_info=True)
+        return 0
+    return index_logs(logs)
+
+
+def _store_product_verified(event, params, common):
+    def mark_verified():
+        return IndexedProduct.objects.filter(qr_code=params['qrCode']).update(
+            verified=True,
+            verified_by=event['args']['verifier'],
+            verified_at=event['args']['timestamp']
+        )
+    
+    # The product is normally indexed already: verifyProduct requires it to exist
+    if mark_verified():
+        return
+    if _backfill_product(params['qrCode'], common['block_number']) and mark_verified():
+        return
+    logger.warning(
+        "ProductVerified for %s in %s: the product's registration could not be indexed",
+        params['qrCode'], common['tx_hash']
+    )
+
+
+EVENT_HANDLERS = {
+    'ProductRegistered': _store_product_registered,
+    'BatchCreated': _store_batch_created,
+    'TransactionRecorded': _store_transaction_recorded,
+    'SupplyChainStepAdded': _store_supply_chain_step,
+    'ProductVerified': _store_product_verified,
+}
+
+
+def fetch_transactions(tx_hashes):
+    """Transactions by hash, for decoding the inputs of indexed events"""
+    return web3_client.get_transactions(tx_hashes)
+
+
+def index_logs(logs):
+    """
+    Decode a block range's logs and upsert them into the index tables
+    
+    Events only carry hashes of their indexed strings, so the full record is
+    read from the input of the transaction that emitted it. Upserts keyed on
+    the on-chain identifiers make re-indexing a range harmless.
+    """
+    contract = web3_client.contract
+    topics = _event_topics(contract)
+    logs = [log for log in logs if log['topics'] and Web3.to_hex(log['topics'][0]) in topics]
+    transactions = fetch_transactions(
+        list(dict.fromkeys(Web3.to_hex(log['transactionHash']) for log in logs))
+    )
+    
+    indexed = 0
+    for log in logs:
+        name = topics[Web3.to_hex(log['topics'][0])]
+        tx_hash = Web3.to_hex(log['transactionHash'])
+        try:
+            function, params = contract.decode_function_input(transactions[tx_hash]['input'])
+        except ValueError:
+            function = None
+        if function is None or function.fn_name != INDEXED_EVENTS[name]:
+            # Emitted through another contract; the input is not ours to decode
+            logger.warning("Skipping %s in %s: unexpected transaction input", name, tx_hash)
+            continue
+        
+        event = getattr(contract.events, name)().process_log(log)
+        common = {
+            'tx_hash': tx_hash,
+            'block_number': log['blockNumber'],
+            'log_index': log['logIndex'],
+        }
+        EVENT_HANDLERS[name](event, params, common)
+        indexed += 1
+    return indexed
+
+
+def sync_events(max_blocks=None):
+    """
+    Index confirmed contract events since the last checkpoint
+    
+    Blocks are read in chunks of BLOCKCHAIN_INDEXER_CHUNK_SIZE with one
+    get_logs call each, stopping BLOCKCHAIN_CONFIRMATIONS blocks behind the
+    head so reorged blocks are never indexed. Each chunk and its checkpoint
+    are committed together; a chunk the node refuses as too large is split.
+    
+    Returns:
+        Number of events indexed
+    """
+    if not web3_client.contract:
+        raise Exception("Contract not initialized")
+    
+    checkpoint, _ = IndexerCheckpoint.objects.get_or_create(
+        name=CHECKPOINT_NAME,
+        defaults={'block_number': settings.BLOCKCHAIN_INDEXER_START_BLOCK - 1}
+    )
+    head = web3_client.w3.eth.block_number - settings.BLOCKCHAIN_CONFIRMATIONS
+    if max_blocks:
+        head = min(head, checkpoint.block_number + max_blocks)
+    
+    topics = list(_event_topics(web3_client.contract))
+    chunk_size = settings.BLOCKCHAIN_INDEXER_CHUNK_SIZE
+    start = checkpoint.block_number + 1
+    indexed = 0
+    while start <= head:
+        end = min(start + chunk_size - 1, head)
+        try:
+            logs = web3_client.w3.eth.get_logs({
+                'address': web3_client.contract.address,
+                'fromBlock': start,
+                'toBlock': end,
+                'topics': [topics],
+            })
+        except ValueError:
+            if chunk_size == 1:
+                raise
+            chunk_size = max(1, chunk_size // 2)
+            continue
+        
+        with transaction.atomic():
+            indexed += index_logs(logs)
+            checkpoint.block_number = end
+            checkpoint.save(update_fields=['block_number', 'updated_at'])
+        start = end + 1
+    return indexed
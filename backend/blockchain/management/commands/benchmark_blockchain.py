@@ -0,0 +1,96 @@
+"""
+Benchmark Web3Client against AgriTrace on an in-process EVM
+"""
+import argparse
+import json
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from blockchain.benchmark import FLOWS, MODES, OPENZEPPELIN_PATH, EVMHarness, compile_contract
+
+
+# Nonces, fees and contract reads are cached by account and block number;
+# keep the benchmark chains' entries out of the shared cache
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blockchain-benchmark',
+    }
+}
+
+
+def comma_list(choices):
+    def parse(value):
+        items = [item.strip() for item in value.split(',') if item.strip()]
+        unknown = set(items) - set(choices)
+        if unknown:
+            raise argparse.ArgumentTypeError(f'unknown: {", ".join(sorted(unknown))}')
+        return items
+    return parse
+
+
+class Command(BaseCommand):
+    help = (
+        'Deploy AgriTrace to an in-process py-evm chain and report Web3Client '
+        'ops/sec and p50/p99 latency per flow and submission mode. '
+        'Requires eth-tester[py-evm] and py-solc-x.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ops', type=int, default=200, help='Operations per flow and mode')
+        parser.add_argument(
+            '--flows',
+            type=comma_list(FLOWS),
+            default=list(FLOWS),
+            help=f'Comma separated flows (default: {",".join(FLOWS)})'
+        )
+        parser.add_argument(
+            '--modes',
+            type=comma_list(MODES),
+            default=list(MODES),
+            help=f'Comma separated modes (default: {",".join(MODES)})'
+        )
+        parser.add_argument(
+            '--leaves',
+            type=int,
+            default=1024,
+            help='Records committed by each root in the anchor flow'
+        )
+        parser.add_argument(
+            '--openzeppelin',
+            default=str(OPENZEPPELIN_PATH),
+            help='Path of @openzeppelin (4.x) used to resolve the contract imports'
+        )
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+
+    def handle(self, *args, **options):
+        try:
+            abi, bytecode = compile_contract(options['openzeppelin'])
+        except ImportError as e:
+            raise CommandError(f'{e}. Install py-solc-x and eth-tester[py-evm] to run the benchmark.')
+
+        results = []
+        with override_settings(CACHES=BENCHMARK_CACHES):
+            for flow in options['flows']:
+                for mode in options['modes']:
+                    # A fresh chain per run so earlier runs do not grow the state,
+                    # and an empty cache since its block numbers start over
+                    cache.clear()
+                    try:
+                        harness = EVMHarness(abi, bytecode)
+                    except ImportError as e:
+                        raise CommandError(f'{e}. Install eth-tester[py-evm] to run the benchmark.')
+                    results.append(harness.run(flow, mode, options['ops'], leaves=options['leaves']))
+
+        if options['json']:
+            self.stdout.write(json.dumps([result._asdict() for result in results], indent=2))
+            return
+
+        self.stdout.write(
+            f'{"flow":<10}{"mode":<12}{"ops":>6}{"errors":>8}{"ops/s":>10}{"p50 ms":>10}{"p99 ms":>10}'
+        )
+        for result in results:
+            self.stdout.write(
+                f'{result.flow:<10}{result.mode:<12}{result.ops:>6}{result.errors:>8}'
+                f'{result.ops_per_second:>10.1f}{result.p50_ms:>10.2f}{result.p99_ms:>10.2f}'
+            )
@@ -0,0 +1,78 @@
+"""
+Measure how long importing the URLconf takes in a fresh process
+"""
+import os
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Runs in a child interpreter so nothing is already imported
+MEASURE_SCRIPT = '''
+import django
+django.setup()
+import {urlconf}
+'''
+
+
+class Command(BaseCommand):
+    help = 'Fail when importing the root URLconf after django.setup() exceeds the import budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--budget',
+            type=int,
+            default=settings.URLCONF_IMPORT_BUDGET_MS,
+            help='Budget in milliseconds (default: URLCONF_IMPORT_BUDGET_MS)'
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=10,
+            help='Number of slowest top-level imports to list'
+        )
+
+    def handle(self, *args, **options):
+        urlconf = settings.ROOT_URLCONF
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'agritrace.settings'))
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', MEASURE_SCRIPT.format(urlconf=urlconf)],
+            env=env,
+            capture_output=True,
+            text=True
+        )
+        if result.returncode:
+            raise CommandError(f'Importing {urlconf} failed:\n{result.stderr}')
+
+        # -X importtime lines: "import time: self [us] | cumulative | name"
+        timings = []
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or '|' not in line:
+                continue
+            _, cumulative, name = line.split('|')
+            if cumulative.strip().isdigit():
+                timings.append((name.rstrip(), int(cumulative)))
+
+        # The URLconf line closes its own subtree, so it comes last among its children
+        total = next((us for name, us in reversed(timings) if name.strip() == urlconf), None)
+        if total is None:
+            raise CommandError(f'No import timing found for {urlconf}')
+        start = max(index for index, (name, _) in enumerate(timings) if name.strip() == urlconf)
+        depth = len(timings[start][0]) - len(timings[start][0].lstrip())
+        children = []
+        for name, us in reversed(timings[:start]):
+            indent = len(name) - len(name.lstrip())
+            if indent <= depth:
+                break
+            if indent == depth + 2:
+                children.append((name.strip(), us))
+
+        for name, us in sorted(children, key=lambda item: item[1], reverse=True)[:options['top']]:
+            self.stdout.write(f'{us / 1000:8.1f} ms  {name}')
+
+        total_ms = total / 1000
+        message = f'{urlconf} imported in {total_ms:.1f} ms (budget {options["budget"]} ms)'
+        if total_ms > options['budget']:
+            raise CommandError(message)
+        self.stdout.write(self.style.SUCCESS(message))
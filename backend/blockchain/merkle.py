@@ -0,0 +1,77 @@
+"""
+Merkle trees for anchoring batches of records on chain
+"""
+from eth_hash.auto import keccak
+
+
+# Domain separation so a leaf can never be passed off as an inner node
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+
+def leaf_hash(data):
+    """Hash the canonical bytes of one record"""
+    return keccak(LEAF_PREFIX + data)
+
+
+def node_hash(left, right):
+    """
+    Hash two children into their parent
+    
+    Children are sorted first, so a proof only needs the sibling hashes and
+    not whether each sibling sits on the left or the right.
+    """
+    return keccak(NODE_PREFIX + min(left, right) + max(left, right))
+
+
+def to_hex(node):
+    """0x-prefixed hex of a hash, as stored and sent to the contract"""
+    return '0x' + node.hex()
+
+
+def from_hex(value):
+    """Hash bytes from their 0x-prefixed hex"""
+    return bytes.fromhex(value[2:] if value.startswith('0x') else value)
+
+
+def build_tree(leaves):
+    """
+    Build every level of the tree, from the leaves up to the root
+    
+    An unpaired node at the end of a level is carried up unchanged.
+    """
+    if not leaves:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+    
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def merkle_root(levels):
+    """Root of a tree returned by build_tree"""
+    return levels[-1][0]
+
+
+def merkle_proof(levels, index):
+    """Sibling hashes from the leaf at index up to the root"""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append(level[sibling])
+        index //= 2
+    return proof
+
+
+def verify_proof(leaf, proof, root):
+    """Whether a leaf and its proof hash up to root"""
+    node = leaf
+    for sibling in proof:
+        node = node_hash(node, sibling)
+    return node == root
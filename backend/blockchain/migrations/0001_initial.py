@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlockchainJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('job_type', models.CharField(choices=[('register_product', 'Register Product'), ('register_batch', 'Register Batch')], max_length=30, verbose_name='Job Type')),
+                ('payload', models.JSONField(default=dict, verbose_name='Payload')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('submitted', 'Submitted'), ('mined', 'Mined'), ('failed', 'Failed')], default='queued', max_length=20, verbose_name='Status')),
+                ('tx_hash', models.CharField(blank=True, max_length=66, verbose_name='Transaction Hash')),
+                ('block_number', models.PositiveBigIntegerField(blank=True, null=True, verbose_name='Block Number')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('requested_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='blockchain_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Blockchain Job',
+                'verbose_name_plural': 'Blockchain Jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='blockchain__status_1e48c9_idx'), models.Index(fields=['requested_by', '-created_at'], name='blockchain__request_ba9c03_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='blockchainjob',
+            name='job_type',
+            field=models.CharField(choices=[('register_product', 'Register Product'), ('register_batch', 'Register Batch'), ('anchor_root', 'Anchor Merkle Root')], max_length=30, verbose_name='Job Type'),
+        ),
+        migrations.CreateModel(
+            name='AnchorBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('root', models.CharField(max_length=66, unique=True, verbose_name='Merkle Root')),
+                ('leaf_count', models.PositiveIntegerField(verbose_name='Leaf Count')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('anchored', 'Anchored'), ('failed', 'Failed')], default='pending', max_length=20, verbose_name='Status')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('anchored_at', models.DateTimeField(blank=True, null=True, verbose_name='Anchored At')),
+                ('job', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='anchor_batch', to='blockchain.blockchainjob')),
+            ],
+            options={
+                'verbose_name': 'Anchor Batch',
+                'verbose_name_plural': 'Anchor Batches',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', '-created_at'], name='blockchain__status_348508_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,118 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0002_alter_blockchainjob_job_type_anchorbatch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexedBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tx_hash', models.CharField(max_length=66, verbose_name='Transaction Hash')),
+                ('block_number', models.BigIntegerField(verbose_name='Block Number')),
+                ('log_index', models.PositiveIntegerField(verbose_name='Log Index')),
+                ('batch_number', models.CharField(max_length=255, unique=True, verbose_name='Batch Number')),
+                ('seed_variety', models.TextField(verbose_name='Seed Variety')),
+                ('planting_date', models.DecimalField(decimal_places=0, max_digits=78, verbose_name='Planting Date')),
+                ('total_quantity', models.DecimalField(decimal_places=0, max_digits=78, verbose_name='Total Quantity')),
+                ('farmer', models.CharField(db_index=True, max_length=42, verbose_name='Farmer Address')),
+                ('created_at', models.DecimalField(decimal_places=0, max_digits=78, verbose_name='Created At')),
+            ],
+            options={
+                'verbose_name': 'Indexed Batch',
+                'verbose_name_plural': 'Indexed Batches',
+                'ordering': ['-block_number', '-log_index'],
+            },
+        ),
+        migrations.CreateModel(
+            name='IndexedProduct',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tx_hash', models.CharField(max_length=66, verbose_name='Transaction Hash')),
+                ('block_number', models.BigIntegerField(verbose_name='Block Number')),
+                ('log_index', models.PositiveIntegerField(verbose_name='Log Index')),
+                ('qr_code', models.CharField(max_length=255, unique=True, verbose_name='QR Code')),
+                ('name', models.TextField(verbose_name='Product Name')),
+                ('variety', models.TextField(verbose_name='Variety')),
+                ('iron_content', models.DecimalField(decimal_places=0, max_digits=78, verbose_name='Iron Content (ppm)')),
+                ('biofortified', models.BooleanField(verbose_name='Biofortified')),
+                ('creator', models.CharField(db_index=True, max_length=42, verbose_name='Creator Address')),
+                ('quantity', models.DecimalField(decimal_places=0, max_digits=78, verbose_name='Quantity (g)')),
+                ('harvest_date', models.DecimalField(decimal_places=0, max_digits=78, verbose_name='Harvest Date')),
+                ('ipfs_hash', models.TextField(blank=True, verbose_name='IPFS Hash')),
+                ('registered_at', models.DecimalField(decimal_places=0, max_digits=78, verbose_name='Registered At')),
+                ('verified', models.BooleanField(default=False, verbose_name='Verified')),
+                ('verified_by', models.CharField(blank=True, max_length=42, verbose_name='Verifier Address')),
+                ('verified_at', models.DecimalField(blank=True, decimal_places=0, max_digits=78, null=True, verbose_name='Verified At')),
+            ],
+            options={
+                'verbose_name': 'Indexed Product',
+                'verbose_name_plural': 'Indexed Products',
+                'ordering': ['-block_number', '-log_index'],
+            },
+        ),
+        migrations.CreateModel(
+            name='IndexerCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Name')),
+                ('block_number', models.BigIntegerField(verbose_name='Block Number')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Indexer Checkpoint',
+                'verbose_name_plural': 'Indexer Checkpoints',
+            },
+        ),
+        migrations.CreateModel(
+            name='IndexedTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tx_hash', models.CharField(max_length=66, verbose_name='Transaction Hash')),
+                ('block_number', models.BigIntegerField(verbose_name='Block Number')),
+                ('log_index', models.PositiveIntegerField(verbose_name='Log Index')),
+                ('record_hash', models.CharField(max_length=66, unique=True, verbose_name='Record Hash')),
+                ('from_address', models.CharField(db_index=True, max_length=42, verbose_name='From Address')),
+                ('to_address', models.CharField(db_index=True, max_length=42, verbose_name='To Address')),
+                ('product_qr_code', models.CharField(max_length=255, verbose_name='Product QR Code')),
+                ('quantity', models.DecimalField(decimal_places=0, max_digits=78, verbose_name='Quantity')),
+                ('price', models.DecimalField(decimal_places=0, max_digits=78, verbose_name='Price')),
+                ('transaction_type', models.TextField(verbose_name='Transaction Type')),
+                ('timestamp', models.DecimalField(decimal_places=0, max_digits=78, verbose_name='Timestamp')),
+            ],
+            options={
+                'verbose_name': 'Indexed Transaction',
+                'verbose_name_plural': 'Indexed Transactions',
+                'ordering': ['-block_number', '-log_index'],
+                'indexes': [models.Index(fields=['product_qr_code', 'block_number', 'log_index'], name='blockchain__product_4ff085_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='IndexedSupplyChainStep',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tx_hash', models.CharField(max_length=66, verbose_name='Transaction Hash')),
+                ('block_number', models.BigIntegerField(verbose_name='Block Number')),
+                ('log_index', models.PositiveIntegerField(verbose_name='Log Index')),
+                ('qr_code', models.CharField(max_length=255, verbose_name='QR Code')),
+                ('actor', models.CharField(max_length=42, verbose_name='Actor Address')),
+                ('action', models.TextField(verbose_name='Action')),
+                ('description', models.TextField(blank=True, verbose_name='Description')),
+                ('location', models.TextField(blank=True, verbose_name='Location')),
+                ('timestamp', models.DecimalField(decimal_places=0, max_digits=78, verbose_name='Timestamp')),
+            ],
+            options={
+                'verbose_name': 'Indexed Supply Chain Step',
+                'verbose_name_plural': 'Indexed Supply Chain Steps',
+                'ordering': ['qr_code', 'block_number', 'log_index'],
+                'indexes': [models.Index(fields=['qr_code', 'block_number', 'log_index'], name='blockchain__qr_code_e95381_idx')],
+                'unique_together': {('tx_hash', 'log_index')},
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0003_event_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blockchainjob',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Submission Attempts'),
+        ),
+        migrations.AddField(
+            model_name='blockchainjob',
+            name='raw_transaction',
+            field=models.TextField(blank=True, verbose_name='Signed Transaction'),
+        ),
+        migrations.AddField(
+            model_name='blockchainjob',
+            name='submitted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Submitted At'),
+        ),
+        migrations.AddIndex(
+            model_name='blockchainjob',
+            index=models.Index(fields=['status', 'submitted_at'], name='blockchain__status_c3297d_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0004_job_reconciliation'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='blockchainjob',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('sending', 'Sending'), ('submitted', 'Submitted'), ('mined', 'Mined'), ('failed', 'Failed')], default='queued', max_length=20, verbose_name='Status'),
+        ),
+    ]
@@ -0,0 +1,235 @@
+"""
+Blockchain models for AGRITRACE
+"""
+from django.conf import settings
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+import uuid
+
+
+class BlockchainJob(models.Model):
+    """Queued blockchain write and its on-chain outcome"""
+    
+    JOB_TYPES = [
+        ('register_product', _('Register Product')),
+        ('register_batch', _('Register Batch')),
+        ('anchor_root', _('Anchor Merkle Root')),
+    ]
+    
+    STATUS_CHOICES = [
+        ('queued', _('Queued')),
+        ('sending', _('Sending')),
+        ('submitted', _('Submitted')),
+        ('mined', _('Mined')),
+        ('failed', _('Failed')),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    job_type = models.CharField(_('Job Type'), max_length=30, choices=JOB_TYPES)
+    payload = models.JSONField(_('Payload'), default=dict)
+    status = models.CharField(_('Status'), max_length=20, choices=STATUS_CHOICES, default='queued')
+    tx_hash = models.CharField(_('Transaction Hash'), max_length=66, blank=True)
+    raw_transaction = models.TextField(_('Signed Transaction'), blank=True)
+    attempts = models.PositiveSmallIntegerField(_('Submission Attempts'), default=0)
+    submitted_at = models.DateTimeField(_('Submitted At'), null=True, blank=True)
+    block_number = models.PositiveBigIntegerField(_('Block Number'), null=True, blank=True)
+    error = models.TextField(_('Error'), blank=True)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='blockchain_jobs'
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = _('Blockchain Job')
+        verbose_name_plural = _('Blockchain Jobs')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['status', 'submitted_at']),
+            models.Index(fields=['requested_by', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_job_type_display()} - {self.status}"
+
+
+class AnchorBatch(models.Model):
+    """Merkle root committing a batch of off-chain records to the chain"""
+    
+    STATUS_CHOICES = [
+        ('pending', _('Pending')),
+        ('anchored', _('Anchored')),
+        ('failed', _('Failed')),
+    ]
+    
+    root = models.CharField(_('Merkle Root'), max_length=66, unique=True)
+    leaf_count = models.PositiveIntegerField(_('Leaf Count'))
+    status = models.CharField(_('Status'), max_length=20, choices=STATUS_CHOICES, default='pending')
+    job = models.OneToOneField(
+        BlockchainJob,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='anchor_batch'
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    anchored_at = models.DateTimeField(_('Anchored At'), null=True, blank=True)
+    
+    class Meta:
+        verbose_name = _('Anchor Batch')
+        verbose_name_plural = _('Anchor Batches')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.root} ({self.leaf_count} records)"
+
+
+class IndexerCheckpoint(models.Model):
+    """Last block whose contract events have been indexed"""
+    
+    name = models.CharField(_('Name'), max_length=50, unique=True)
+    block_number = models.BigIntegerField(_('Block Number'))
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = _('Indexer Checkpoint')
+        verbose_name_plural = _('Indexer Checkpoints')
+    
+    def __str__(self):
+        return f"{self.name} @ {self.block_number}"
+
+
+class IndexedEvent(models.Model):
+    """Common fields of rows mirrored from contract events"""
+    
+    tx_hash = models.CharField(_('Transaction Hash'), max_length=66)
+    block_number = models.BigIntegerField(_('Block Number'))
+    log_index = models.PositiveIntegerField(_('Log Index'))
+    
+    class Meta:
+        abstract = True
+
+
+class IndexedProduct(IndexedEvent):
+    """Product as registered on chain, from ProductRegistered and ProductVerified"""
+    
+    qr_code = models.CharField(_('QR Code'), max_length=255, unique=True)
+    name = models.TextField(_('Product Name'))
+    variety = models.TextField(_('Variety'))
+    iron_content = models.DecimalField(_('Iron Content (ppm)'), max_digits=78, decimal_places=0)
+    biofortified = models.BooleanField(_('Biofortified'))
+    creator = models.CharField(_('Creator Address'), max_length=42, db_index=True)
+    quantity = models.DecimalField(_('Quantity (g)'), max_digits=78, decimal_places=0)
+    harvest_date = models.DecimalField(_('Harvest Date'), max_digits=78, decimal_places=0)
+    ipfs_hash = models.TextField(_('IPFS Hash'), blank=True)
+    registered_at = models.DecimalField(_('Registered At'), max_digits=78, decimal_places=0)
+    
+    verified = models.BooleanField(_('Verified'), default=False)
+    verified_by = models.CharField(_('Verifier Address'), max_length=42, blank=True)
+    verified_at = models.DecimalField(_('Verified At'), max_digits=78, decimal_places=0, null=True, blank=True)
+    
+    class Meta:
+        verbose_name = _('Indexed Product')
+        verbose_name_plural = _('Indexed Products')
+        ordering = ['-block_number', '-log_index']
+    
+    def __str__(self):
+        return f"{self.name} ({self.qr_code})"
+    
+    def as_chain_data(self):
+        """Same shape as Web3Client.get_product"""
+        return {
+            'name': self.name,
+            'variety': self.variety,
+            'iron_content': int(self.iron_content),
+            'biofortified': self.biofortified,
+            'creator': self.creator,
+            'quantity': int(self.quantity),
+            'harvest_date': int(self.harvest_date),
+            'ipfs_hash': self.ipfs_hash
+        }
+
+
+class IndexedBatch(IndexedEvent):
+    """Batch as registered on chain, from BatchCreated"""
+    
+    batch_number = models.CharField(_('Batch Number'), max_length=255, unique=True)
+    seed_variety = models.TextField(_('Seed Variety'))
+    planting_date = models.DecimalField(_('Planting Date'), max_digits=78, decimal_places=0)
+    total_quantity = models.DecimalField(_('Total Quantity'), max_digits=78, decimal_places=0)
+    farmer = models.CharField(_('Farmer Address'), max_length=42, db_index=True)
+    created_at = models.DecimalField(_('Created At'), max_digits=78, decimal_places=0)
+    
+    class Meta:
+        verbose_name = _('Indexed Batch')
+        verbose_name_plural = _('Indexed Batches')
+        ordering = ['-block_number', '-log_index']
+    
+    def __str__(self):
+        return self.batch_number
+
+
+class IndexedTransaction(IndexedEvent):
+    """Transfer recorded on chain, from TransactionRecorded"""
+    
+    record_hash = models.CharField(_('Record Hash'), max_length=66, unique=True)
+    from_address = models.CharField(_('From Address'), max_length=42, db_index=True)
+    to_address = models.CharField(_('To Address'), max_length=42, db_index=True)
+    product_qr_code = models.CharField(_('Product QR Code'), max_length=255)
+    quantity = models.DecimalField(_('Quantity'), max_digits=78, decimal_places=0)
+    price = models.DecimalField(_('Price'), max_digits=78, decimal_places=0)
+    transaction_type = models.TextField(_('Transaction Type'))
+    timestamp = models.DecimalField(_('Timestamp'), max_digits=78, decimal_places=0)
+    
+    class Meta:
+        verbose_name = _('Indexed Transaction')
+        verbose_name_plural = _('Indexed Transactions')
+        ordering = ['-block_number', '-log_index']
+        indexes = [
+            models.Index(fields=['product_qr_code', 'block_number', 'log_index']),
+        ]
+    
+    def __str__(self):
+        return self.record_hash
+
+
+class IndexedSupplyChainStep(IndexedEvent):
+    """Supply chain step recorded on chain, from SupplyChainStepAdded"""
+    
+    qr_code = models.CharField(_('QR Code'), max_length=255)
+    actor = models.CharField(_('Actor Address'), max_length=42)
+    action = models.TextField(_('Action'))
+    description = models.TextField(_('Description'), blank=True)
+    location = models.TextField(_('Location'), blank=True)
+    timestamp = models.DecimalField(_('Timestamp'), max_digits=78, decimal_places=0)
+    
+    class Meta:
+        verbose_name = _('Indexed Supply Chain Step')
+        verbose_name_plural = _('Indexed Supply Chain Steps')
+        ordering = ['qr_code', 'block_number', 'log_index']
+        unique_together = ['tx_hash', 'log_index']
+        indexes = [
+            models.Index(fields=['qr_code', 'block_number', 'log_index']),
+        ]
+    
+    def __str__(self):
+        return f"{self.qr_code} - {self.action}"
+    
+    def as_chain_data(self):
+        """Same shape as the steps of Web3Client.get_supply_chain_history"""
+        return {
+            'actor': self.actor,
+            'action': self.action,
+            'description': self.description,
+            'timestamp': int(self.timestamp),
+            'location': self.location
+        }
@@ -0,0 +1,66 @@
+"""
+Nonce allocation for transactions sent from the AgriTrace account
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+
+# Node errors that mean the nonce we sent is no longer the account's next one
+NONCE_ERRORS = (
+    'nonce too low',
+    'nonce too high',
+    'replacement transaction underpriced',
+)
+
+# Node errors that mean the node already holds this exact signed transaction
+KNOWN_TRANSACTION_ERRORS = (
+    'already known',
+    'known transaction',
+)
+
+
+def is_nonce_error(error):
+    """Whether a send failure was caused by a stale nonce"""
+    message = str(error).lower()
+    return any(text in message for text in NONCE_ERRORS)
+
+
+def is_known_transaction(error):
+    """Whether a send failed only because the transaction was already submitted"""
+    message = str(error).lower()
+    return any(text in message for text in KNOWN_TRANSACTION_ERRORS)
+
+
+class NonceManager:
+    """
+    Hand out consecutive nonces for one account without asking the node
+    
+    The counter lives in the default cache (Redis in production, so every
+    worker shares it) and is seeded from the account's pending transaction
+    count. Incrementing it is atomic, so concurrent senders never share a
+    nonce and signed transactions can be sent back to back. The counter
+    expires after BLOCKCHAIN_NONCE_TIMEOUT seconds and is dropped when the
+    node rejects a nonce, after which it is re-read from the node; expiry
+    also recovers from gaps left by transactions that were never sent.
+    """
+    
+    def __init__(self, w3, address):
+        self.w3 = w3
+        self.address = address
+        self.key = f'blockchain:nonce:{address.lower()}'
+    
+    def allocate(self):
+        """Return the next unused nonce"""
+        while True:
+            try:
+                return cache.incr(self.key)
+            except ValueError:
+                pass
+            # Seed one below the pending count so the incr above returns it;
+            # add() leaves a counter seeded concurrently by another sender alone
+            pending = self.w3.eth.get_transaction_count(self.address, 'pending')
+            cache.add(self.key, pending - 1, settings.BLOCKCHAIN_NONCE_TIMEOUT)
+    
+    def resync(self):
+        """Forget the counter so the next allocation re-reads the pending count"""
+        cache.delete(self.key)
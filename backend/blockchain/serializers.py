@@ -0,0 +1,18 @@
+"""
+Serializers for Blockchain app
+"""
+from rest_framework import serializers
+from agritrace.serializers import DynamicFieldsMixin
+from .models import BlockchainJob
+
+
+class BlockchainJobSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Serializer for BlockchainJob status"""
+    
+    class Meta:
+        model = BlockchainJob
+        fields = [
+            'id', 'job_type', 'status', 'tx_hash', 'attempts', 'submitted_at',
+            'block_number', 'error', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
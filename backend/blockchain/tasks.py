@@ -0,0 +1,295 @@
+"""
+Celery tasks for Blockchain app
+"""
+import logging
+from datetime import timedelta
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, CharField, Value, When
+from django.utils import timezone
+from products.cache import invalidate_qr_payloads
+from products.models import Batch, Product
+from . import anchoring
+from .models import BlockchainJob
+from .clients import web3_client
+
+
+logger = logging.getLogger(__name__)
+
+# Called with the job once a job of that type is mined or has failed
+JOB_CALLBACKS = {
+    'anchor_root': anchoring.complete_anchor_batch,
+}
+
+# Rows that get the tx hash of a mined job of that type:
+# job type -> (model, lookup field, payload key)
+JOB_RECORDS = {
+    'register_product': (Product, 'qr_code', 'qr_code'),
+    'register_batch': (Batch, 'batch_number', 'batch_number'),
+}
+
+ANCHOR_LOCK_KEY = 'blockchain:anchor:lock'
+SYNC_LOCK_KEY = 'blockchain:sync:lock'
+RECONCILE_LOCK_KEY = 'blockchain:reconcile:lock'
+SWEEP_LOCK_KEY = 'blockchain:sweep:lock'
+
+
+def queue_blockchain_job(job_type, payload, user=None):
+    """Record a blockchain write and hand it to a worker once the request commits"""
+    job = BlockchainJob.objects.create(job_type=job_type, payload=payload, requested_by=user)
+    transaction.on_commit(lambda: dispatch_blockchain_job(job.id))
+    return job
+
+
+def dispatch_blockchain_job(job_id):
+    """Hand a queued job to a worker; sweep_blockchain_jobs retries if the broker is down"""
+    try:
+        run_blockchain_job.apply_async((str(job_id),), retry=False)
+    except Exception:
+        logger.warning('Could not dispatch blockchain job %s', job_id, exc_info=True)
+
+
+@shared_task
+def run_blockchain_job(job_id):
+    """
+    Submit a queued blockchain write without waiting for it to be mined
+    
+    The job is claimed by moving it from queued to sending in one UPDATE,
+    so a redelivered or duplicated task never signs it a second time.
+    Receipts are picked up by reconcile_blockchain_jobs.
+    """
+    claimed = BlockchainJob.objects.filter(pk=job_id, status='queued').update(
+        status='sending', updated_at=timezone.now()
+    )
+    if not claimed:
+        return
+    
+    job = BlockchainJob.objects.get(pk=job_id)
+    _submit_job(job)
+    if job.status == 'failed':
+        _run_callback(job)
+
+
+def _submit_job(job):
+    """Sign and send a job's transaction, storing its hash and signed copy"""
+    try:
+        result = getattr(web3_client, job.job_type)(**job.payload)
+    except Exception as e:
+        result = {'success': False, 'error': str(e)}
+    
+    job.attempts += 1
+    if not result.get('success'):
+        job.status = 'failed'
+        job.error = result.get('error', 'Submission failed')
+        job.save(update_fields=['status', 'error', 'attempts', 'updated_at'])
+        return
+    job.status = 'submitted'
+    job.tx_hash = result['tx_hash']
+    job.raw_transaction = result['raw_transaction']
+    job.submitted_at = timezone.now()
+    job.error = ''
+    job.save(update_fields=[
+        'status', 'tx_hash', 'raw_transaction', 'submitted_at', 'error', 'attempts', 'updated_at'
+    ])
+
+
+def _run_callback(job):
+    callback = JOB_CALLBACKS.get(job.job_type)
+    if callback:
+        callback(job)
+
+
+def record_job_hashes(jobs):
+    """Write the tx hashes of mined jobs to the rows they registered, one UPDATE per model"""
+    for job_type, (model, field, key) in JOB_RECORDS.items():
+        hashes = {
+            job.payload[key]: job.tx_hash for job in jobs
+            if job.job_type == job_type and job.status == 'mined' and job.payload.get(key)
+        }
+        if not hashes:
+            continue
+        model.objects.filter(**{f'{field}__in': list(hashes)}).update(
+            blockchain_hash=Case(
+                *[When(**{field: value}, then=Value(tx_hash)) for value, tx_hash in hashes.items()],
+                output_field=CharField()
+            )
+        )
+        if model is Product:
+            qr_codes = list(hashes)
+            transaction.on_commit(lambda: invalidate_qr_payloads(qr_codes))
+
+
+@shared_task
+def reconcile_blockchain_jobs():
+    """
+    Record the outcome of submitted jobs
+    
+    Receipts of up to BLOCKCHAIN_RECONCILE_BATCH_SIZE jobs are fetched in
+    JSON-RPC batches and written back with bulk updates, together with the
+    blockchain_hash of the rows the jobs registered. Transactions still
+    without a receipt after BLOCKCHAIN_RECEIPT_TIMEOUT seconds are checked
+    for having been dropped by the node.
+    """
+    if not cache.add(RECONCILE_LOCK_KEY, True, 10 * 60):
+        return 0
+    try:
+        jobs = list(
+            BlockchainJob.objects.filter(status='submitted').order_by('submitted_at')[
+                :settings.BLOCKCHAIN_RECONCILE_BATCH_SIZE
+            ]
+        )
+        if not jobs:
+            return 0
+        
+        now = timezone.now()
+        receipts = web3_client.get_receipts([job.tx_hash for job in jobs])
+        finished = []
+        pending = []
+        for job in jobs:
+            receipt = receipts[job.tx_hash]
+            if receipt is None:
+                pending.append(job)
+                continue
+            job.status = 'mined' if receipt['success'] else 'failed'
+            job.block_number = receipt['block_number']
+            job.error = '' if receipt['success'] else 'Transaction reverted'
+            # bulk_update() skips auto_now
+            job.updated_at = now
+            finished.append(job)
+        
+        with transaction.atomic():
+            BlockchainJob.objects.bulk_update(finished, ['status', 'block_number', 'error', 'updated_at'])
+            record_job_hashes(finished)
+        for job in finished:
+            _run_callback(job)
+        
+        overdue = now - timedelta(seconds=settings.BLOCKCHAIN_RECEIPT_TIMEOUT)
+        stale = [job for job in pending if job.submitted_at is None or job.submitted_at < overdue]
+        if stale:
+            _recover_dropped_jobs(stale)
+        return len(finished)
+    finally:
+        cache.delete(RECONCILE_LOCK_KEY)
+
+
+@shared_task
+def sweep_blockchain_jobs():
+    """
+    Recover jobs whose task was lost
+    
+    Jobs still queued BLOCKCHAIN_REDISPATCH_AFTER seconds after they were
+    created are dispatched again (the claim in run_blockchain_job makes the
+    extra tasks harmless). Jobs sending for longer than
+    BLOCKCHAIN_SEND_TIMEOUT lost their worker between the claim and the
+    save; whether the transaction went out is unknown, so rather than risk
+    a second write they fail.
+    """
+    if not cache.add(SWEEP_LOCK_KEY, True, 10 * 60):
+        return 0
+    try:
+        now = timezone.now()
+        queued = list(BlockchainJob.objects.filter(
+            status='queued', created_at__lt=now - timedelta(seconds=settings.BLOCKCHAIN_REDISPATCH_AFTER)
+        ).order_by('created_at').values_list('pk', flat=True)[:settings.BLOCKCHAIN_RECONCILE_BATCH_SIZE])
+        for job_id in queued:
+            dispatch_blockchain_job(job_id)
+        
+        stuck = BlockchainJob.objects.filter(
+            status='sending', updated_at__lt=now - timedelta(seconds=settings.BLOCKCHAIN_SEND_TIMEOUT)
+        )
+        for job in stuck:
+            failed = BlockchainJob.objects.filter(pk=job.pk, status='sending').update(
+                status='failed', error='Submission timed out', updated_at=now
+            )
+            if failed:
+                job.status = 'failed'
+                _run_callback(job)
+        return len(queued)
+    finally:
+        cache.delete(SWEEP_LOCK_KEY)
+
+
+def _recover_dropped_jobs(jobs):
+    """
+    Get dropped transactions mined
+    
+    The signed copy is re-broadcast first, which keeps the nonce and so can
+    never execute the write twice. If the node rejects it (the nonce was
+    taken by another transaction, or the fees no longer clear the base fee)
+    and it has still not been mined, the job is signed again with a fresh
+    nonce and fees, up to BLOCKCHAIN_MAX_SUBMISSIONS times in total.
+    """
+    known = web3_client.get_known_transactions([job.tx_hash for job in jobs])
+    for job in jobs:
+        if job.tx_hash in known:
+            # Still in the mempool, just slow
+            continue
+        
+        if job.raw_transaction:
+            try:
+                web3_client.rebroadcast(job.raw_transaction)
+            except Exception as e:
+                job.error = f'Re-broadcast failed: {str(e)}'
+            else:
+                job.submitted_at = timezone.now()
+                job.save(update_fields=['submitted_at', 'updated_at'])
+                continue
+        
+        if web3_client.get_receipts([job.tx_hash])[job.tx_hash] is not None:
+            # Mined after all; the next pass records it
+            continue
+        web3_client.nonces.resync()
+        if job.attempts < settings.BLOCKCHAIN_MAX_SUBMISSIONS:
+            _submit_job(job)
+        else:
+            job.status = 'failed'
+            job.error = job.error or 'Transaction dropped'
+            job.save(update_fields=['status', 'error', 'updated_at'])
+        if job.status == 'failed':
+            _run_callback(job)
+
+
+@shared_task
+def anchor_pending_records(force=False):
+    """
+    Commit pending records to the chain as Merkle roots
+    
+    Runs on a short beat schedule but only anchors once ANCHOR_BATCH_SIZE
+    records are waiting or the oldest has waited ANCHOR_MAX_DELAY seconds.
+    A backlog is split into several batches whose roots are sent back to
+    back.
+    """
+    if not cache.add(ANCHOR_LOCK_KEY, True, 10 * 60):
+        return 0
+    try:
+        anchored = 0
+        while force or anchoring.anchor_due():
+            force = False
+            with transaction.atomic():
+                batch = anchoring.create_anchor_batch()
+                if batch is None:
+                    break
+                batch.job = queue_blockchain_job(
+                    'anchor_root', {'root': batch.root, 'leaf_count': batch.leaf_count}
+                )
+                batch.save(update_fields=['job'])
+            anchored += batch.leaf_count
+        return anchored
+    finally:
+        cache.delete(ANCHOR_LOCK_KEY)
+
+
+@shared_task
+def sync_blockchain_data():
+    """Mirror newly confirmed contract events into the index tables"""
+    if not cache.add(SYNC_LOCK_KEY, True, 30 * 60):
+        return 0
+    # Imported here: the indexer pulls in web3, which the web process never needs
+    from . import indexer
+    
+    try:
+        return indexer.sync_events()
+    finally:
+        cache.delete(SYNC_LOCK_KEY)
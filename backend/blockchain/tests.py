@@ -0,0 +1,138 @@
+"""
+Tests for Blockchain app
+"""
+import datetime
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase
+from products.models import Product
+from users.models import User
+from .anchoring import complete_anchor_batch, create_anchor_batch, verify_record
+from .merkle import build_tree, leaf_hash, merkle_proof, merkle_root, verify_proof
+from .models import AnchorBatch, BlockchainJob
+from .nonce import NonceManager
+from .web3_client import Web3Client
+
+
+ACCOUNT = '0x' + 'ab' * 20
+
+
+class MerkleTests(TestCase):
+    """Proofs of every leaf hash up to the root, including unpaired nodes"""
+    
+    def test_every_proof_verifies(self):
+        leaves = [leaf_hash(f'record-{index}'.encode()) for index in range(7)]
+        levels = build_tree(leaves)
+        root = merkle_root(levels)
+        for index, leaf in enumerate(leaves):
+            self.assertTrue(verify_proof(leaf, merkle_proof(levels, index), root))
+    
+    def test_tampered_leaf_fails(self):
+        leaves = [leaf_hash(f'record-{index}'.encode()) for index in range(4)]
+        levels = build_tree(leaves)
+        self.assertFalse(verify_proof(leaf_hash(b'tampered'), merkle_proof(levels, 0), merkle_root(levels)))
+
+
+class AnchoringTests(TestCase):
+    """Pending records are batched under one root and verified against it"""
+    
+    def setUp(self):
+        cache.clear()
+        self.farmer = User.objects.create(username='farmer', phone_number='0788000001', user_type='farmer')
+        self.products = [
+            Product.objects.create(
+                name=f'Beans {index}', variety='RWV 3006', iron_content=85, creator=self.farmer,
+                quantity=500, harvest_date=datetime.date(2025, 6, 1)
+            )
+            for index in range(3)
+        ]
+        self.batch = create_anchor_batch()
+        self.job = BlockchainJob.objects.create(job_type='anchor_root', tx_hash='0x' + '12' * 32)
+        self.batch.job = self.job
+        self.batch.save()
+    
+    def test_batch_takes_every_pending_record(self):
+        self.assertEqual(self.batch.leaf_count, 3)
+        self.assertIsNone(create_anchor_batch())
+    
+    @mock.patch('blockchain.anchoring.web3_client')
+    def test_verify_record(self, web3_client):
+        web3_client.get_anchored_root.return_value = 1750000000
+        result = verify_record('products', self.products[1].pk)
+        self.assertTrue(result['verified'])
+        
+        Product.objects.filter(pk=self.products[1].pk).update(name='Tampered')
+        result = verify_record('products', self.products[1].pk)
+        self.assertFalse(result['proof_valid'])
+        # The anchored root was read from the node once
+        self.assertEqual(web3_client.get_anchored_root.call_count, 1)
+    
+    def test_mined_batch_keeps_individual_hashes(self):
+        Product.objects.filter(pk=self.products[0].pk).update(blockchain_hash='0x' + '34' * 32)
+        self.job.status = 'mined'
+        complete_anchor_batch(self.job)
+        
+        hashes = list(Product.objects.order_by('pk').values_list('blockchain_hash', flat=True))
+        self.assertEqual(hashes, ['0x' + '34' * 32, self.job.tx_hash, self.job.tx_hash])
+        self.assertEqual(AnchorBatch.objects.get().status, 'anchored')
+    
+    def test_failed_batch_releases_its_records(self):
+        self.job.status = 'failed'
+        complete_anchor_batch(self.job)
+        
+        self.assertEqual(AnchorBatch.objects.get().status, 'failed')
+        self.assertFalse(Product.objects.filter(anchor_batch__isnull=False).exists())
+        self.assertEqual(create_anchor_batch().leaf_count, 3)
+
+
+class NonceTests(TestCase):
+    """Nonces are handed out locally and re-read from the node on nonce errors"""
+    
+    def setUp(self):
+        cache.clear()
+        w3 = mock.Mock()
+        w3.eth.account.from_key.return_value = mock.Mock(address=ACCOUNT)
+        w3.eth.get_transaction_count.return_value = 7
+        self.client = Web3Client(w3=w3, private_key='0x' + '01' * 32, contract_abi=[])
+        self.client.fees = mock.Mock()
+        self.client.fees.get_fees.return_value = {'gasPrice': 1}
+        self.function = mock.Mock()
+    
+    def sent_nonces(self):
+        return [call.args[0]['nonce'] for call in self.function.build_transaction.call_args_list]
+    
+    def test_allocate_counts_up_from_the_pending_count(self):
+        nonces = NonceManager(self.client.w3, ACCOUNT)
+        self.assertEqual([nonces.allocate() for _ in range(3)], [7, 8, 9])
+        self.assertEqual(self.client.w3.eth.get_transaction_count.call_count, 1)
+        
+        self.client.w3.eth.get_transaction_count.return_value = 20
+        nonces.resync()
+        self.assertEqual(nonces.allocate(), 20)
+    
+    def test_nonce_error_resyncs_and_retries(self):
+        self.client.w3.eth.send_raw_transaction.side_effect = [ValueError('nonce too low'), b'\x01']
+        self.client._send(self.function, 100000)
+        self.assertEqual(self.sent_nonces(), [7, 7])
+    
+    def test_already_known_is_a_successful_send(self):
+        self.client.w3.eth.send_raw_transaction.side_effect = ValueError('already known')
+        signed_tx = self.client._send(self.function, 100000)
+        self.assertIs(signed_tx, self.client.w3.eth.account.sign_transaction.return_value)
+        self.assertEqual(self.client._send(self.function, 100000), signed_tx)
+        self.assertEqual(self.sent_nonces(), [7, 8])
+    
+    def test_other_errors_keep_the_counter(self):
+        self.client.fees.gas_limit.side_effect = ValueError('execution reverted')
+        with self.assertRaises(ValueError):
+            self.client._send(self.function, None)
+        self.assertIsNone(cache.get(self.client.nonces.key))
+        
+        self.client.fees.gas_limit.side_effect = None
+        self.client.w3.eth.send_raw_transaction.side_effect = ValueError('insufficient funds for gas')
+        with self.assertRaises(ValueError):
+            self.client._send(self.function, 100000)
+        self.client.w3.eth.send_raw_transaction.side_effect = None
+        self.client._send(self.function, 100000)
+        self.assertEqual(self.sent_nonces(), [7, 8])
+        self.assertEqual(self.client.w3.eth.get_transaction_count.call_count, 1)
@@ -1,14 +1,37 @@
 """
 URL patterns for Blockchain app
 """
+from django.conf import settings
 from django.urls import path
 from . import views
 
+if settings.BLOCKCHAIN_ASYNC_VIEWS:
+    # Async read views for ASGI deployments
+    from . import async_views
+    status_view = async_views.blockchain_status
+    bulk_verify_view = async_views.bulk_verify_products
+    verify_view = async_views.verify_product
+    product_view = async_views.get_product
+    supply_chain_view = async_views.get_supply_chain
+else:
+    status_view = views.BlockchainStatusView.as_view()
+    bulk_verify_view = views.BulkVerifyProductsView.as_view()
+    verify_view = views.VerifyProductView.as_view()
+    product_view = views.GetProductView.as_view()
+    supply_chain_view = views.GetSupplyChainView.as_view()
+
 urlpatterns = [
-    path('status/', views.BlockchainStatusView.as_view(), name='blockchain_status'),
+    path('status/', status_view, name='blockchain_status'),
     path('register-product/', views.RegisterProductView.as_view(), name='register_product'),
     path('register-batch/', views.RegisterBatchView.as_view(), name='register_batch'),
-    path('verify/<str:qr_code>/', views.VerifyProductView.as_view(), name='verify_product'),
-    path('product/<str:qr_code>/', views.GetProductView.as_view(), name='get_product'),
-    path('supply-chain/<str:qr_code>/', views.GetSupplyChainView.as_view(), name='get_supply_chain'),
+    path('jobs/<uuid:job_id>/', views.BlockchainJobStatusView.as_view(), name='blockchain_job'),
+    path(
+        'anchors/verify/<str:record_type>/<int:record_id>/',
+        views.VerifyAnchoredRecordView.as_view(),
+        name='verify_anchored_record'
+    ),
+    path('verify/bulk/', bulk_verify_view, name='bulk_verify_products'),
+    path('verify/<str:qr_code>/', verify_view, name='verify_product'),
+    path('product/<str:qr_code>/', product_view, name='get_product'),
+    path('supply-chain/<str:qr_code>/', supply_chain_view, name='get_supply_chain'),
 ]
@@ -1,11 +1,32 @@
 """
 Views for Blockchain app
 """
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from .web3_client import web3_client
+from .anchoring import ANCHOR_SOURCES, verify_record
+from .models import BlockchainJob, IndexedProduct, IndexedSupplyChainStep
+from .serializers import BlockchainJobSerializer
+from .tasks import queue_blockchain_job
+from .clients import web3_client
+
+
+def job_accepted_response(request, job, detail):
+    """202 response pointing the client at the job status endpoint"""
+    status_url = request.build_absolute_uri(reverse('blockchain_job', args=[job.id]))
+    return Response(
+        {
+            'detail': detail,
+            'job_id': str(job.id),
+            'status': job.status,
+            'status_url': status_url
+        },
+        status=status.HTTP_202_ACCEPTED,
+        headers={'Location': status_url}
+    )
 
 
 class BlockchainStatusView(APIView):
@@ -13,82 +34,76 @@ class BlockchainStatusView(APIView):
     permission_classes = (IsAuthenticated,)
     
     def get(self, request):
-        is_connected = web3_client.is_connected()
-        balance = web3_client.get_balance() if is_connected else 0
+        chain_status = web3_client.get_status()
         
         return Response({
-            'connected': is_connected,
-            'balance': float(balance),
+            'connected': chain_status['connected'],
+            'balance': float(chain_status['balance']),
             'network': 'Goerli Testnet',
             'contract_address': web3_client.contract.address if web3_client.contract else None
         })
 
 
 class RegisterProductView(APIView):
-    """Register product on blockchain"""
+    """Queue product registration on blockchain"""
     permission_classes = (IsAuthenticated,)
     
     def post(self, request):
+        data = request.data
         try:
-            data = request.data
-            result = web3_client.register_product(
-                qr_code=data.get('qr_code'),
-                name=data.get('name'),
-                variety=data.get('variety'),
-                iron_content=int(data.get('iron_content', 0)),
-                biofortified=data.get('biofortified', True),
-                quantity=int(data.get('quantity', 0)),
-                harvest_date=int(data.get('harvest_date', 0)),
-                ipfs_hash=data.get('ipfs_hash', '')
-            )
-            
-            if result.get('success'):
-                return Response({
-                    'detail': 'Product registered on blockchain',
-                    'tx_hash': result.get('tx_hash'),
-                    'block_number': result.get('block_number')
-                })
-            else:
-                return Response(
-                    {'detail': result.get('error', 'Registration failed')},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        except Exception as e:
+            payload = {
+                'qr_code': data.get('qr_code'),
+                'name': data.get('name'),
+                'variety': data.get('variety'),
+                'iron_content': int(data.get('iron_content', 0)),
+                'biofortified': data.get('biofortified', True),
+                'quantity': int(data.get('quantity', 0)),
+                'harvest_date': int(data.get('harvest_date', 0)),
+                'ipfs_hash': data.get('ipfs_hash', '')
+            }
+        except (TypeError, ValueError) as e:
             return Response(
-                {'detail': f'Blockchain error: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'detail': f'Invalid product data: {str(e)}'},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        
+        job = queue_blockchain_job('register_product', payload, request.user)
+        return job_accepted_response(request, job, 'Product registration queued')
 
 
 class RegisterBatchView(APIView):
-    """Register batch on blockchain"""
+    """Queue batch registration on blockchain"""
     permission_classes = (IsAuthenticated,)
     
     def post(self, request):
+        data = request.data
         try:
-            data = request.data
-            result = web3_client.register_batch(
-                batch_number=data.get('batch_number'),
-                seed_variety=data.get('seed_variety'),
-                planting_date=int(data.get('planting_date', 0)),
-                total_quantity=int(data.get('total_quantity', 0))
-            )
-            
-            if result.get('success'):
-                return Response({
-                    'detail': 'Batch registered on blockchain',
-                    'tx_hash': result.get('tx_hash')
-                })
-            else:
-                return Response(
-                    {'detail': result.get('error', 'Registration failed')},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        except Exception as e:
+            payload = {
+                'batch_number': data.get('batch_number'),
+                'seed_variety': data.get('seed_variety'),
+                'planting_date': int(data.get('planting_date', 0)),
+                'total_quantity': int(data.get('total_quantity', 0))
+            }
+        except (TypeError, ValueError) as e:
             return Response(
-                {'detail': f'Blockchain error: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'detail': f'Invalid batch data: {str(e)}'},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        
+        job = queue_blockchain_job('register_batch', payload, request.user)
+        return job_accepted_response(request, job, 'Batch registration queued')
+
+
+class BlockchainJobStatusView(APIView):
+    """Get the status of a queued blockchain write"""
+    permission_classes = (IsAuthenticated,)
+    
+    def get(self, request, job_id):
+        jobs = BlockchainJob.objects.all()
+        if not request.user.is_staff:
+            jobs = jobs.filter(requested_by=request.user)
+        job = get_object_or_404(jobs, pk=job_id)
+        return Response(BlockchainJobSerializer(job, context={'request': request}).data)
 
 
 class VerifyProductView(APIView):
@@ -96,9 +111,17 @@ class VerifyProductView(APIView):
     permission_classes = (IsAuthenticated,)
     
     def get(self, request, qr_code):
+        # Served from the event index, with a live read for unindexed products
+        indexed = IndexedProduct.objects.filter(qr_code=qr_code).first()
+        if indexed:
+            return Response({
+                'verified': indexed.verified,
+                'product': indexed.as_chain_data(),
+                'blockchain_verified': True
+            })
+        
         try:
-            is_verified = web3_client.is_product_verified(qr_code)
-            product_data = web3_client.get_product(qr_code)
+            is_verified, product_data = web3_client.get_verified_products([qr_code])[qr_code]
             
             return Response({
                 'verified': is_verified,
@@ -112,11 +135,61 @@ class VerifyProductView(APIView):
             )
 
 
+class BulkVerifyProductsView(APIView):
+    """Verify a list of products on blockchain, e.g. a whole delivery"""
+    permission_classes = (IsAuthenticated,)
+    max_qr_codes = 200
+    
+    def post(self, request):
+        qr_codes = request.data.get('qr_codes')
+        if not isinstance(qr_codes, list) or not qr_codes:
+            return Response(
+                {'detail': 'qr_codes must be a non-empty list'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(qr_codes) > self.max_qr_codes:
+            return Response(
+                {'detail': f'At most {self.max_qr_codes} QR codes can be verified at once'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        qr_codes = [str(qr_code) for qr_code in qr_codes]
+        
+        # Indexed products come from the DB, the rest from one batched RPC
+        results = {
+            indexed.qr_code: (indexed.verified, indexed.as_chain_data())
+            for indexed in IndexedProduct.objects.filter(qr_code__in=qr_codes)
+        }
+        missing = [qr_code for qr_code in qr_codes if qr_code not in results]
+        if missing:
+            try:
+                results.update(web3_client.get_verified_products(missing))
+            except Exception as e:
+                return Response(
+                    {'detail': f'Verification error: {str(e)}'},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                )
+        
+        return Response({
+            'results': [
+                {
+                    'qr_code': qr_code,
+                    'verified': results[qr_code][0],
+                    'product': results[qr_code][1]
+                }
+                for qr_code in dict.fromkeys(qr_codes)
+            ]
+        })
+
+
 class GetProductView(APIView):
     """Get product from blockchain"""
     permission_classes = (IsAuthenticated,)
     
     def get(self, request, qr_code):
+        indexed = IndexedProduct.objects.filter(qr_code=qr_code).first()
+        if indexed:
+            return Response(indexed.as_chain_data())
+        
         try:
             product = web3_client.get_product(qr_code)
             if product:
@@ -137,6 +210,10 @@ class GetSupplyChainView(APIView):
     permission_classes = (IsAuthenticated,)
     
     def get(self, request, qr_code):
+        if IndexedProduct.objects.filter(qr_code=qr_code).exists():
+            steps = IndexedSupplyChainStep.objects.filter(qr_code=qr_code).order_by('block_number', 'log_index')
+            return Response({'supply_chain': [step.as_chain_data() for step in steps]})
+        
         try:
             history = web3_client.get_supply_chain_history(qr_code)
             return Response({'supply_chain': history})
@@ -145,3 +222,30 @@ class GetSupplyChainView(APIView):
                 {'detail': f'Error: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class VerifyAnchoredRecordView(APIView):
+    """Verify a record against the Merkle root it was anchored in"""
+    permission_classes = (IsAuthenticated,)
+    
+    def get(self, request, record_type, record_id):
+        if record_type not in ANCHOR_SOURCES:
+            return Response(
+                {'detail': f'Unknown record type. Choose from: {", ".join(ANCHOR_SOURCES)}'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        try:
+            result = verify_record(record_type, record_id)
+        except Exception as e:
+            return Response(
+                {'detail': f'Verification error: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        
+        if result is None:
+            return Response(
+                {'detail': 'Record has not been anchored yet'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(result)
@@ -1,41 +1,91 @@
 """
 Web3 client for interacting with Ethereum blockchain
 """
-from web3 import Web3
+from web3 import HTTPProvider, Web3
+from web3._utils.abi import get_abi_output_types, map_abi_data
+from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
+from web3._utils.request import get_response_from_post_request
+from web3.exceptions import ContractLogicError
+from hexbytes import HexBytes
 from django.conf import settings
+from .cache import get_call_result, get_call_results, head_block, set_call_result, set_call_results
+from .fees import FeeOracle
+from .nonce import NonceManager, is_known_transaction, is_nonce_error
 import json
 import os
 
 
+def load_contract_abi():
+    """Read the AgriTrace ABI from the contract build, empty if not built"""
+    contract_path = os.path.join(
+        os.path.dirname(__file__),
+        'contracts',
+        'build',
+        'AgriTrace.json'
+    )
+    
+    if os.path.exists(contract_path):
+        with open(contract_path, 'r') as f:
+            contract_json = json.load(f)
+            return contract_json.get('abi', [])
+    return []
+
+
+def product_to_dict(product):
+    """Shape the getProduct return values"""
+    return {
+        'name': product[0],
+        'variety': product[1],
+        'iron_content': product[2],
+        'biofortified': product[3],
+        'creator': product[4],
+        'quantity': product[5],
+        'harvest_date': product[6],
+        'ipfs_hash': product[7]
+    }
+
+
+def supply_chain_to_list(history):
+    """Shape the getSupplyChainHistory return values"""
+    return [
+        {
+            'actor': step[0],
+            'action': step[1],
+            'description': step[2],
+            'timestamp': step[3],
+            'location': step[4]
+        }
+        for step in history
+    ]
+
+
 class Web3Client:
     """Client for interacting with AgriTrace smart contract"""
     
-    def __init__(self):
-        self.w3 = Web3(Web3.HTTPProvider(settings.ETHEREUM_NODE_URL))
+    def __init__(self, w3=None, private_key=None, contract_address=None, contract_abi=None):
+        """
+        Connect to the node, account and contract configured in settings
+        
+        The arguments override the settings, e.g. to point the client at an
+        in-process chain (see blockchain.benchmark).
+        """
+        self.w3 = w3 or Web3(Web3.HTTPProvider(settings.ETHEREUM_NODE_URL))
         self.account = None
+        self.nonces = None
+        self.fees = FeeOracle(self)
         
-        if settings.ETHEREUM_PRIVATE_KEY:
-            self.account = self.w3.eth.account.from_key(settings.ETHEREUM_PRIVATE_KEY)
+        private_key = private_key or settings.ETHEREUM_PRIVATE_KEY
+        if private_key:
+            self.account = self.w3.eth.account.from_key(private_key)
+            self.nonces = NonceManager(self.w3, self.account.address)
         
-        # Load contract ABI
-        contract_path = os.path.join(
-            os.path.dirname(__file__),
-            'contracts',
-            'build',
-            'AgriTrace.json'
-        )
-        
-        if os.path.exists(contract_path):
-            with open(contract_path, 'r') as f:
-                contract_json = json.load(f)
-                self.contract_abi = contract_json.get('abi', [])
-        else:
-            self.contract_abi = []
+        self.contract_abi = contract_abi if contract_abi is not None else load_contract_abi()
+        contract_address = contract_address or settings.CONTRACT_ADDRESS
         
         # Initialize contract
-        if settings.CONTRACT_ADDRESS and self.contract_abi:
+        if contract_address and self.contract_abi:
             self.contract = self.w3.eth.contract(
-                address=settings.CONTRACT_ADDRESS,
+                address=contract_address,
                 abi=self.contract_abi
             )
         else:
@@ -55,15 +105,201 @@ class Web3Client:
             return self.w3.from_wei(balance, 'ether')
         return 0
     
+    def get_status(self):
+        """Connection state and account balance, read in one JSON-RPC batch"""
+        calls = [('web3_clientVersion', [])]
+        if self.account:
+            calls.append(('eth_getBalance', [self.account.address, 'latest']))
+        
+        try:
+            replies = self._rpc_batch(calls)
+        except Exception:
+            return {'connected': False, 'balance': 0}
+        
+        balance = 0
+        if self.account and 'result' in replies[1]:
+            balance = self.w3.from_wei(int(replies[1]['result'], 16), 'ether')
+        return {'connected': 'result' in replies[0], 'balance': balance}
+    
+    def _rpc_batch(self, calls):
+        """
+        Send several JSON-RPC requests in a single HTTP round trip
+        
+        Goes to the node of self.w3's provider, so a client built on an
+        injected w3 batches against the same node as its other calls.
+        
+        Args:
+            calls: List of (method, params) tuples
+        
+        Returns:
+            The JSON-RPC replies, in the order of calls
+        """
+        provider = self.w3.provider
+        if not isinstance(provider, HTTPProvider):
+            # IPC and WebSocket providers take one request at a time
+            return [
+                dict(provider.make_request(method, params), id=index)
+                for index, (method, params) in enumerate(calls)
+            ]
+        
+        payload = [
+            {'jsonrpc': '2.0', 'id': index, 'method': method, 'params': params}
+            for index, (method, params) in enumerate(calls)
+        ]
+        # Same endpoint, headers and pooled session as the provider's own requests
+        response = get_response_from_post_request(
+            provider.endpoint_uri,
+            json=payload,
+            **{'timeout': settings.BLOCKCHAIN_RPC_TIMEOUT, **provider.get_request_kwargs()}
+        )
+        response.raise_for_status()
+        replies = response.json()
+        if not isinstance(replies, list):
+            # The node rejected the batch as a whole
+            raise ValueError(replies.get('error', replies))
+        replies = {reply['id']: reply for reply in replies}
+        return [replies[index] for index in range(len(calls))]
+    
+    def _transact(self, function, gas, wait=False):
+        """
+        Sign and send a contract transaction
+        
+        Args:
+            function: Bound contract function to call
+            gas: Gas limit used when the call cannot be estimated
+            wait: Whether to block until the transaction is mined. Web
+                requests never should; receipts are picked up by the
+                reconcile_blockchain_jobs task instead.
+        
+        Returns:
+            Dict with success flag and tx hash, plus the block number once
+            mined or the signed raw transaction (for re-broadcasting) when
+            not waiting
+        """
+        try:
+            signed_tx = self._send(function, gas)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+        
+        tx_hash = signed_tx.hash
+        if not wait:
+            return {
+                'success': True,
+                'tx_hash': tx_hash.hex(),
+                'raw_transaction': signed_tx.rawTransaction.hex()
+            }
+        try:
+            return self.wait_for_receipt(tx_hash)
+        except Exception as e:
+            return {
+                'success': False,
+                'tx_hash': tx_hash.hex(),
+                'error': str(e)
+            }
+    
+    def _send(self, function, gas, retries=1):
+        """Sign and send a transaction with a locally allocated nonce and cached fees, returning it signed"""
+        # Fee and gas lookups can fail; run them before a nonce is taken
+        fields = {
+            'from': self.account.address,
+            'chainId': self.fees.chain_id(),
+            'gas': self.fees.gas_limit(function, gas),
+            **self.fees.get_fees()
+        }
+        # Every field is filled in, so build_transaction makes no RPC
+        tx = function.build_transaction({**fields, 'nonce': self.nonces.allocate()})
+        signed_tx = self.w3.eth.account.sign_transaction(tx, self.account.key)
+        try:
+            self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+        except Exception as e:
+            if is_known_transaction(e):
+                # A retried send of the same signed transaction
+                return signed_tx
+            if not is_nonce_error(e):
+                raise
+            # The counter drifted from the node; re-read it and try once more
+            self.nonces.resync()
+            if retries:
+                return self._send(function, gas, retries - 1)
+            raise
+        return signed_tx
+    
+    def wait_for_receipt(self, tx_hash, timeout=120):
+        """Block until a transaction is mined and summarise its receipt"""
+        receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout)
+        return {
+            'success': receipt['status'] == 1,
+            'tx_hash': Web3.to_hex(receipt['transactionHash']),
+            'block_number': receipt['blockNumber']
+        }
+    
+    def _rpc_batch_chunked(self, method, params):
+        """Run one JSON-RPC method for many parameter lists, BLOCKCHAIN_RPC_BATCH_SIZE per request"""
+        replies = []
+        for start in range(0, len(params), settings.BLOCKCHAIN_RPC_BATCH_SIZE):
+            chunk = params[start:start + settings.BLOCKCHAIN_RPC_BATCH_SIZE]
+            replies.extend(self._rpc_batch([(method, item) for item in chunk]))
+        return replies
+    
+    def get_receipts(self, tx_hashes):
+        """
+        Receipts of several transactions, batched
+        
+        Returns:
+            Dict of tx_hash -> receipt summary, or None while not mined
+        """
+        receipts = {}
+        replies = self._rpc_batch_chunked('eth_getTransactionReceipt', [[tx_hash] for tx_hash in tx_hashes])
+        for tx_hash, reply in zip(tx_hashes, replies):
+            if 'error' in reply:
+                raise ValueError(reply['error'])
+            receipt = reply['result']
+            receipts[tx_hash] = receipt and {
+                'success': int(receipt['status'], 16) == 1,
+                'tx_hash': receipt['transactionHash'],
+                'block_number': int(receipt['blockNumber'], 16)
+            }
+        return receipts
+    
+    def get_known_transactions(self, tx_hashes):
+        """Subset of tx_hashes the node still knows about (mined or in its mempool), batched"""
+        replies = self._rpc_batch_chunked('eth_getTransactionByHash', [[tx_hash] for tx_hash in tx_hashes])
+        return {
+            tx_hash for tx_hash, reply in zip(tx_hashes, replies)
+            if reply.get('result')
+        }
+    
+    def get_transactions(self, tx_hashes):
+        """
+        Several transactions by hash, batched
+        
+        Returns:
+            Dict of tx_hash -> transaction as returned by the node (hex
+            quantities), or None if the node does not know it
+        """
+        replies = self._rpc_batch_chunked('eth_getTransactionByHash', [[tx_hash] for tx_hash in tx_hashes])
+        transactions = {}
+        for tx_hash, reply in zip(tx_hashes, replies):
+            if 'error' in reply:
+                raise ValueError(reply['error'])
+            transactions[tx_hash] = reply['result']
+        return transactions
+    
+    def rebroadcast(self, raw_transaction):
+        """Send an already signed transaction again, e.g. after the node dropped it"""
+        return self.w3.eth.send_raw_transaction(HexBytes(raw_transaction)).hex()
+    
     def register_product(self, qr_code, name, variety, iron_content, biofortified, 
-                        quantity, harvest_date, ipfs_hash):
+                        quantity, harvest_date, ipfs_hash, wait=False):
         """Register a product on blockchain"""
         if not self.contract or not self.account:
             raise Exception("Contract or account not initialized")
         
-        try:
-            # Build transaction
-            tx = self.contract.functions.registerProduct(
+        return self._transact(
+            self.contract.functions.registerProduct(
                 qr_code,
                 name,
                 variety,
@@ -72,160 +308,181 @@ class Web3Client:
                 quantity,
                 harvest_date,
                 ipfs_hash
-            ).build_transaction({
-                'from': self.account.address,
-                'nonce': self.w3.eth.get_transaction_count(self.account.address),
-                'gas': 500000,
-                'gasPrice': self.w3.eth.gas_price
-            })
-            
-            # Sign transaction
-            signed_tx = self.w3.eth.account.sign_transaction(tx, self.account.key)
-            
-            # Send transaction
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-            
-            # Wait for receipt
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
-            
-            return {
-                'success': receipt['status'] == 1,
-                'tx_hash': tx_hash.hex(),
-                'block_number': receipt['blockNumber']
-            }
-        except Exception as e:
-            return {
-                'success': False,
-                'error': str(e)
-            }
+            ),
+            gas=500000,
+            wait=wait
+        )
     
-    def register_batch(self, batch_number, seed_variety, planting_date, total_quantity):
+    def register_batch(self, batch_number, seed_variety, planting_date, total_quantity, wait=False):
         """Register a batch on blockchain"""
         if not self.contract or not self.account:
             raise Exception("Contract or account not initialized")
         
-        try:
-            tx = self.contract.functions.registerBatch(
+        return self._transact(
+            self.contract.functions.registerBatch(
                 batch_number,
                 seed_variety,
                 planting_date,
                 total_quantity
-            ).build_transaction({
-                'from': self.account.address,
-                'nonce': self.w3.eth.get_transaction_count(self.account.address),
-                'gas': 300000,
-                'gasPrice': self.w3.eth.gas_price
-            })
-            
-            signed_tx = self.w3.eth.account.sign_transaction(tx, self.account.key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
-            
-            return {
-                'success': receipt['status'] == 1,
-                'tx_hash': tx_hash.hex(),
-                'block_number': receipt['blockNumber']
-            }
-        except Exception as e:
-            return {
-                'success': False,
-                'error': str(e)
-            }
+            ),
+            gas=300000,
+            wait=wait
+        )
     
-    def record_transaction(self, to_address, qr_code, quantity, price, transaction_type):
+    def record_transaction(self, to_address, qr_code, quantity, price, transaction_type, wait=False):
         """Record a transaction on blockchain"""
         if not self.contract or not self.account:
             raise Exception("Contract or account not initialized")
         
-        try:
-            tx = self.contract.functions.recordTransaction(
+        return self._transact(
+            self.contract.functions.recordTransaction(
                 to_address,
                 qr_code,
                 quantity,
                 price,
                 transaction_type
-            ).build_transaction({
-                'from': self.account.address,
-                'nonce': self.w3.eth.get_transaction_count(self.account.address),
-                'gas': 400000,
-                'gasPrice': self.w3.eth.gas_price
-            })
-            
-            signed_tx = self.w3.eth.account.sign_transaction(tx, self.account.key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
-            
-            return {
-                'success': receipt['status'] == 1,
-                'tx_hash': tx_hash.hex(),
-                'block_number': receipt['blockNumber']
-            }
-        except Exception as e:
-            return {
-                'success': False,
-                'error': str(e)
-            }
+            ),
+            gas=400000,
+            wait=wait
+        )
     
-    def add_supply_chain_step(self, qr_code, action, description, location):
+    def add_supply_chain_step(self, qr_code, action, description, location, wait=False):
         """Add a supply chain step on blockchain"""
         if not self.contract or not self.account:
             raise Exception("Contract or account not initialized")
         
-        try:
-            tx = self.contract.functions.addSupplyChainStep(
+        return self._transact(
+            self.contract.functions.addSupplyChainStep(
                 qr_code,
                 action,
                 description,
                 location
-            ).build_transaction({
-                'from': self.account.address,
-                'nonce': self.w3.eth.get_transaction_count(self.account.address),
-                'gas': 350000,
-                'gasPrice': self.w3.eth.gas_price
-            })
-            
-            signed_tx = self.w3.eth.account.sign_transaction(tx, self.account.key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
-            
-            return {
-                'success': receipt['status'] == 1,
-                'tx_hash': tx_hash.hex(),
-                'block_number': receipt['blockNumber']
-            }
-        except Exception as e:
-            return {
-                'success': False,
-                'error': str(e)
-            }
+            ),
+            gas=350000,
+            wait=wait
+        )
     
-    def verify_product(self, qr_code):
+    def verify_product(self, qr_code, wait=False):
         """Verify a product on blockchain"""
         if not self.contract or not self.account:
             raise Exception("Contract or account not initialized")
         
-        try:
-            tx = self.contract.functions.verifyProduct(qr_code).build_transaction({
-                'from': self.account.address,
-                'nonce': self.w3.eth.get_transaction_count(self.account.address),
-                'gas': 200000,
-                'gasPrice': self.w3.eth.gas_price
-            })
-            
-            signed_tx = self.w3.eth.account.sign_transaction(tx, self.account.key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
-            
-            return {
-                'success': receipt['status'] == 1,
-                'tx_hash': tx_hash.hex(),
-                'block_number': receipt['blockNumber']
-            }
-        except Exception as e:
-            return {
-                'success': False,
-                'error': str(e)
-            }
+        return self._transact(
+            self.contract.functions.verifyProduct(qr_code),
+            gas=200000,
+            wait=wait
+        )
+    
+    def anchor_root(self, root, leaf_count, wait=False):
+        """Anchor the Merkle root of a batch of records on blockchain"""
+        if not self.contract or not self.account:
+            raise Exception("Contract or account not initialized")
+        
+        return self._transact(
+            self.contract.functions.anchorRoot(Web3.to_bytes(hexstr=root), leaf_count),
+            gas=100000,
+            wait=wait
+        )
+    
+    def _call(self, function_name, *args):
+        """
+        Run a contract view call at the head block, through the call cache
+        
+        Results (including reverts) are cached per block, so repeated reads
+        of the same record cost no RPC until a new block arrives. Other
+        errors are not cached.
+        """
+        block = head_block(self.w3)
+        entry = get_call_result(function_name, args, block)
+        if entry is None:
+            function = getattr(self.contract.functions, function_name)(*args)
+            try:
+                entry = (True, function.call(block_identifier=block))
+            except ContractLogicError as e:
+                entry = (False, str(e))
+            set_call_result(function_name, args, block, entry)
+        
+        ok, value = entry
+        if not ok:
+            raise ContractLogicError(value)
+        return value
+    
+    def _decode_output(self, function_name, data):
+        """Decode eth_call output the way ContractFunction.call() does"""
+        output_types = get_abi_output_types(self.contract.get_function_by_name(function_name).abi)
+        values = self.w3.codec.decode(output_types, HexBytes(data))
+        values = map_abi_data(BASE_RETURN_NORMALIZERS, output_types, values)
+        return values[0] if len(values) == 1 else list(values)
+    
+    def call_many(self, calls):
+        """
+        Run several contract view calls in one JSON-RPC batch
+        
+        Calls are pinned to the head block and share the per-block call
+        cache, so only the misses are sent to the node, chunked by
+        BLOCKCHAIN_RPC_BATCH_SIZE.
+        
+        Args:
+            calls: List of (function_name, args) tuples
+        
+        Returns:
+            List of (ok, value) entries; ok is False for reverted calls
+        """
+        calls = [(function_name, tuple(args)) for function_name, args in calls]
+        block = head_block(self.w3)
+        entries = get_call_results(calls, block)
+        missing = [index for index, entry in enumerate(entries) if entry is None]
+        
+        for start in range(0, len(missing), settings.BLOCKCHAIN_RPC_BATCH_SIZE):
+            chunk = missing[start:start + settings.BLOCKCHAIN_RPC_BATCH_SIZE]
+            replies = self._rpc_batch([
+                ('eth_call', [
+                    {
+                        'to': self.contract.address,
+                        'data': self.contract.encodeABI(fn_name=calls[index][0], args=list(calls[index][1]))
+                    },
+                    hex(block)
+                ])
+                for index in chunk
+            ])
+            fetched = {}
+            for index, reply in zip(chunk, replies):
+                error = reply.get('error')
+                if error is None:
+                    entry = (True, self._decode_output(calls[index][0], reply['result']))
+                elif 'revert' in str(error.get('message', '')).lower():
+                    entry = (False, error['message'])
+                else:
+                    raise ValueError(error)
+                entries[index] = fetched[calls[index]] = entry
+            set_call_results(fetched, block)
+        return entries
+    
+    def get_verified_products(self, qr_codes):
+        """
+        Verification flag and product details of several QR codes, batched
+        
+        Returns:
+            Dict of qr_code -> (is_verified, product dict or None)
+        """
+        if not self.contract:
+            raise Exception("Contract not initialized")
+        
+        qr_codes = list(dict.fromkeys(qr_codes))
+        calls = []
+        for qr_code in qr_codes:
+            calls.append(('isProductVerified', (qr_code,)))
+            calls.append(('getProduct', (qr_code,)))
+        entries = self.call_many(calls)
+        
+        results = {}
+        for position, qr_code in enumerate(qr_codes):
+            (verified_ok, verified), (product_ok, product) = entries[2 * position:2 * position + 2]
+            results[qr_code] = (
+                verified_ok and verified,
+                product_to_dict(product) if product_ok else None
+            )
+        return results
     
     def get_product(self, qr_code):
         """Get product details from blockchain"""
@@ -233,17 +490,8 @@ class Web3Client:
             raise Exception("Contract not initialized")
         
         try:
-            product = self.contract.functions.getProduct(qr_code).call()
-            return {
-                'name': product[0],
-                'variety': product[1],
-                'iron_content': product[2],
-                'biofortified': product[3],
-                'creator': product[4],
-                'quantity': product[5],
-                'harvest_date': product[6],
-                'ipfs_hash': product[7]
-            }
+            product = self._call('getProduct', qr_code)
+            return product_to_dict(product)
         except Exception as e:
             return None
     
@@ -253,17 +501,8 @@ class Web3Client:
             raise Exception("Contract not initialized")
         
         try:
-            history = self.contract.functions.getSupplyChainHistory(qr_code).call()
-            return [
-                {
-                    'actor': step[0],
-                    'action': step[1],
-                    'description': step[2],
-                    'timestamp': step[3],
-                    'location': step[4]
-                }
-                for step in history
-            ]
+            history = self._call('getSupplyChainHistory', qr_code)
+            return supply_chain_to_list(history)
         except Exception as e:
             return []
     
@@ -273,10 +512,17 @@ class Web3Client:
             raise Exception("Contract not initialized")
         
         try:
-            return self.contract.functions.isProductVerified(qr_code).call()
+            return self._call('isProductVerified', qr_code)
         except Exception as e:
             return False
+    
+    def get_anchored_root(self, root):
+        """Timestamp at which a Merkle root was anchored, 0 if it never was"""
+        if not self.contract:
+            raise Exception("Contract not initialized")
+        
+        return self.contract.functions.anchoredRoots(Web3.to_bytes(hexstr=root)).call()
 
 
-# Singleton instance
-web3_client = Web3Client()
+# Singleton instance, built on first use
+from .clients import web3_client  # noqa: E402,F401
@@ -11,7 +11,7 @@ class BatchAdmin(admin.ModelAdmin):
     list_display = ['batch_number', 'seed_variety', 'farmer', 'total_quantity', 'planting_date', 'harvest_date']
     list_filter = ['seed_variety', 'planting_date', 'harvest_date']
     search_fields = ['batch_number', 'seed_variety', 'farmer__username']
-    readonly_fields = ['batch_number', 'blockchain_hash', 'created_at', 'updated_at']
+    readonly_fields = ['batch_number', 'blockchain_hash', 'anchor_batch', 'merkle_proof', 'created_at', 'updated_at']
     ordering = ['-created_at']
     
     fieldsets = (
@@ -22,7 +22,7 @@ class BatchAdmin(admin.ModelAdmin):
             'fields': ('total_quantity', 'farmer', 'location')
         }),
         ('Additional Data', {
-            'fields': ('soil_test_results', 'blockchain_hash')
+            'fields': ('soil_test_results', 'blockchain_hash', 'anchor_batch', 'merkle_proof')
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
@@ -36,7 +36,7 @@ class ProductAdmin(admin.ModelAdmin):
     list_display = ['qr_code', 'name', 'variety', 'iron_content', 'biofortified', 'status', 'creator', 'created_at']
     list_filter = ['biofortified', 'status', 'variety', 'created_at']
     search_fields = ['qr_code', 'name', 'variety', 'creator__username']
-    readonly_fields = ['qr_code', 'blockchain_hash', 'created_at', 'updated_at', 'display_qr_code']
+    readonly_fields = ['qr_code', 'blockchain_hash', 'anchor_batch', 'merkle_proof', 'created_at', 'updated_at', 'display_qr_code']
     ordering = ['-created_at']
     
     fieldsets = (
@@ -50,7 +50,7 @@ class ProductAdmin(admin.ModelAdmin):
             'fields': ('creator', 'product_image', 'ipfs_hash')
         }),
         ('Blockchain', {
-            'fields': ('blockchain_hash',),
+            'fields': ('blockchain_hash', 'anchor_batch', 'merkle_proof'),
             'classes': ('collapse',)
         }),
         ('Timestamps', {
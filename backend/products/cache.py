@@ -0,0 +1,124 @@
+"""
+Read cache for product QR code lookups
+"""
+from collections import namedtuple
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, OuterRef, Subquery
+from django.utils import timezone
+from .models import Certification, Product, Verification
+
+
+QR_CACHE_PREFIX = 'products:qr:'
+QR_SUMMARY_PREFIX = 'products:qr-summary:'
+QR_VERIFICATIONS_PREFIX = 'products:qr-verifications:'
+
+# Compact projection of a product for USSD replies, cached as a plain tuple;
+# unknown QR codes are cached as an empty tuple
+QRSummary = namedtuple('QRSummary', [
+    'product_id', 'name', 'variety', 'iron_content', 'biofortified', 'status',
+    'certificate_type', 'certificate_verified', 'certificate_expiry', 'anchored'
+])
+
+
+def qr_cache_key(qr_code):
+    """Build the cache key for a serialized QR payload"""
+    return f'{QR_CACHE_PREFIX}{qr_code}'
+
+
+def get_qr_payload(qr_code):
+    """Return the cached product payload for a QR code, or None on a miss"""
+    return cache.get(qr_cache_key(qr_code))
+
+
+def set_qr_payload(qr_code, payload):
+    """Store the serialized product payload for a QR code"""
+    cache.set(qr_cache_key(qr_code), payload, settings.QR_CACHE_TIMEOUT)
+
+
+def invalidate_qr_payloads(qr_codes):
+    """Drop the cached payloads and summaries for the given QR codes"""
+    keys = []
+    for qr_code in qr_codes:
+        if qr_code:
+            keys.extend([qr_cache_key(qr_code), f'{QR_SUMMARY_PREFIX}{qr_code}'])
+    if keys:
+        cache.delete_many(keys)
+
+
+def _build_qr_summary(qr_code, extra_count=None):
+    """Read the summary and live verification count of a QR code in one query"""
+    latest_certificate = Certification.objects.filter(product=OuterRef('pk')).order_by('-issue_date', '-pk')
+    row = Product.objects.filter(qr_code=qr_code).annotate(
+        certificate_type=Subquery(latest_certificate.values('cert_type')[:1]),
+        certificate_verified=Subquery(latest_certificate.values('verified')[:1]),
+        certificate_expiry=Subquery(latest_certificate.values('expiry_date')[:1]),
+        verification_count=Count('verifications'),
+    ).values_list(
+        'id', 'name', 'variety', 'iron_content', 'biofortified', 'status',
+        'certificate_type', 'certificate_verified', 'certificate_expiry', 'blockchain_hash',
+        'verification_count'
+    ).first()
+    if row is None:
+        return (), 0
+    *summary, blockchain_hash, count = row
+    if extra_count is not None:
+        count += extra_count(row[0])
+    return tuple(summary) + (bool(blockchain_hash),), count
+
+
+def get_qr_summary(qr_code, extra_count=None):
+    """
+    Compact product projection and verification count for a QR code
+    
+    Both come from the cache in one round trip. The count is a separate
+    counter bumped as verifications are recorded, so new verifications do
+    not invalidate the summary.
+    
+    Args:
+        qr_code: QR code to look up
+        extra_count: Optional callable taking a product id and returning
+            verifications kept outside the Verification table, added to the
+            count whenever it is read from the database
+    
+    Returns:
+        Tuple of (QRSummary or None for unknown codes, verification count)
+    """
+    summary_key = f'{QR_SUMMARY_PREFIX}{qr_code}'
+    count_key = f'{QR_VERIFICATIONS_PREFIX}{qr_code}'
+    cached = cache.get_many([summary_key, count_key])
+    summary = cached.get(summary_key)
+    count = cached.get(count_key)
+    
+    if summary is None:
+        summary, count = _build_qr_summary(qr_code, extra_count)
+        if summary:
+            cache.set(summary_key, summary, settings.QR_CACHE_TIMEOUT)
+            cache.add(count_key, count, settings.QR_CACHE_TIMEOUT)
+        else:
+            cache.set(summary_key, summary, settings.QR_SUMMARY_MISS_TIMEOUT)
+    elif summary and count is None:
+        count = Verification.objects.filter(product_id=summary[0]).count()
+        if extra_count is not None:
+            count += extra_count(summary[0])
+        cache.add(count_key, count, settings.QR_CACHE_TIMEOUT)
+    
+    if not summary:
+        return None, 0
+    return QRSummary._make(summary), count
+
+
+def count_qr_verification(qr_code, delta=1):
+    """Adjust the cached verification count of a QR code, if it is cached"""
+    try:
+        cache.incr(f'{QR_VERIFICATIONS_PREFIX}{qr_code}', delta)
+    except ValueError:
+        pass
+
+
+def certificate_valid(summary, today=None):
+    """Whether the latest certificate in a summary is verified and unexpired"""
+    if not summary.certificate_type or not summary.certificate_verified:
+        return False
+    expiry = summary.certificate_expiry
+    return expiry is None or expiry >= (today or timezone.localdate())
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0002_alter_blockchainjob_job_type_anchorbatch'),
+        ('products', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='batch',
+            name='anchor_batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='batches', to='blockchain.anchorbatch'),
+        ),
+        migrations.AddField(
+            model_name='batch',
+            name='merkle_proof',
+            field=models.JSONField(blank=True, null=True, verbose_name='Merkle Proof'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='anchor_batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='products', to='blockchain.anchorbatch'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='merkle_proof',
+            field=models.JSONField(blank=True, null=True, verbose_name='Merkle Proof'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_partition_verification'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='batch',
+            index=models.Index(condition=models.Q(('anchor_batch__isnull', True), ('blockchain_hash', '')), fields=['created_at', 'id'], name='batch_pending_anchor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('anchor_batch__isnull', True), ('blockchain_hash', '')), fields=['created_at', 'id'], name='product_pending_anchor_idx'),
+        ),
+    ]
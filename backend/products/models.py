@@ -36,6 +36,14 @@ class Batch(models.Model):
     
     # Blockchain reference
     blockchain_hash = models.CharField(_('Blockchain Hash'), max_length=66, blank=True)
+    anchor_batch = models.ForeignKey(
+        'blockchain.AnchorBatch',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='batches'
+    )
+    merkle_proof = models.JSONField(_('Merkle Proof'), null=True, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -47,6 +55,12 @@ class Batch(models.Model):
         indexes = [
             models.Index(fields=['farmer', '-created_at']),
             models.Index(fields=['batch_number']),
+            # Records anchor_pending_records has yet to batch, oldest first
+            models.Index(
+                fields=['created_at', 'id'],
+                condition=models.Q(anchor_batch__isnull=True, blockchain_hash=''),
+                name='batch_pending_anchor_idx'
+            ),
         ]
     
     def __str__(self):
@@ -112,6 +126,14 @@ class Product(models.Model):
     
     # Blockchain reference
     blockchain_hash = models.CharField(_('Blockchain Hash'), max_length=66, blank=True)
+    anchor_batch = models.ForeignKey(
+        'blockchain.AnchorBatch',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='products'
+    )
+    merkle_proof = models.JSONField(_('Merkle Proof'), null=True, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -124,6 +146,11 @@ class Product(models.Model):
             models.Index(fields=['qr_code']),
             models.Index(fields=['creator', '-created_at']),
             models.Index(fields=['biofortified', 'status']),
+            models.Index(
+                fields=['created_at', 'id'],
+                condition=models.Q(anchor_batch__isnull=True, blockchain_hash=''),
+                name='product_pending_anchor_idx'
+            ),
         ]
     
     def __str__(self):
@@ -2,11 +2,12 @@
 Serializers for Product models
 """
 from rest_framework import serializers
+from agritrace.serializers import DynamicFieldsMixin
 from .models import Batch, Product, Certification, Verification
 from users.serializers import UserSerializer, LocationSerializer
 
 
-class BatchSerializer(serializers.ModelSerializer):
+class BatchSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Batch model"""
     
     farmer = UserSerializer(read_only=True)
@@ -22,7 +23,7 @@ class BatchSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'batch_number', 'blockchain_hash', 'created_at', 'updated_at']
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Product model"""
     
     creator = UserSerializer(read_only=True)
@@ -64,7 +65,7 @@ class ProductCreateSerializer(serializers.ModelSerializer):
         return value
 
 
-class CertificationSerializer(serializers.ModelSerializer):
+class CertificationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Certification model"""
     
     product = ProductSerializer(read_only=True)
@@ -79,7 +80,7 @@ class CertificationSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'verified', 'created_at', 'updated_at']
 
 
-class VerificationSerializer(serializers.ModelSerializer):
+class VerificationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Verification model"""
     
     product = ProductSerializer(read_only=True)
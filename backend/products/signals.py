@@ -0,0 +1,105 @@
+"""
+Signal handlers for Products app
+"""
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+from users.models import User, Location
+from users.serializers import UserSerializer
+from .cache import count_qr_verification, invalidate_qr_payloads
+from .models import Batch, Certification, Product, Verification
+
+
+# User fields serialized into QR payloads (as creator and batch farmer).
+# last_login is left out: it changes on every login, and a payload showing
+# an older one is fine until QR_CACHE_TIMEOUT
+QR_USER_FIELDS = frozenset(UserSerializer.Meta.fields) - {'last_login'}
+
+
+def _invalidate_on_commit(qr_codes):
+    """Invalidate cached QR payloads once the surrounding transaction commits"""
+    qr_codes = list(qr_codes)
+    if qr_codes:
+        transaction.on_commit(lambda: invalidate_qr_payloads(qr_codes))
+
+
+@receiver(pre_save, sender=Product)
+def remember_product_qr_code(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keep the stored QR code so a changed code invalidates the old payload too"""
+    instance._previous_qr_code = None
+    if instance.pk and not raw and (update_fields is None or 'qr_code' in update_fields):
+        instance._previous_qr_code = Product.objects.filter(pk=instance.pk).values_list('qr_code', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_product_qr_cache(sender, instance, **kwargs):
+    """A product change only affects its own payload"""
+    _invalidate_on_commit({instance.qr_code, getattr(instance, '_previous_qr_code', None)} - {None})
+
+
+@receiver([post_save, post_delete], sender=Certification)
+def invalidate_certification_qr_cache(sender, instance, **kwargs):
+    """The latest certificate is part of the product's USSD summary"""
+    _invalidate_on_commit(
+        Product.objects.filter(pk=instance.product_id).values_list('qr_code', flat=True)
+    )
+
+
+@receiver(post_save, sender=Verification)
+def count_verification(sender, instance, created, **kwargs):
+    """Keep the cached verification count in step without dropping the summary"""
+    if created:
+        qr_code = Product.objects.filter(pk=instance.product_id).values_list('qr_code', flat=True).first()
+        if qr_code:
+            transaction.on_commit(lambda: count_qr_verification(qr_code))
+
+
+@receiver(post_delete, sender=Verification)
+def uncount_verification(sender, instance, **kwargs):
+    qr_code = Product.objects.filter(pk=instance.product_id).values_list('qr_code', flat=True).first()
+    if qr_code:
+        transaction.on_commit(lambda: count_qr_verification(qr_code, -1))
+
+
+@receiver([post_save, post_delete], sender=Batch)
+def invalidate_batch_qr_cache(sender, instance, **kwargs):
+    """Batches are embedded in the payload of every product they contain"""
+    _invalidate_on_commit(
+        Product.objects.filter(batch_id=instance.pk).values_list('qr_code', flat=True)
+    )
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_qr_cache(sender, instance, update_fields=None, **kwargs):
+    """Users appear as product creator and as batch farmer"""
+    if update_fields is not None and not QR_USER_FIELDS & set(update_fields):
+        return
+    _invalidate_on_commit(
+        Product.objects.filter(
+            Q(creator_id=instance.pk) | Q(batch__farmer_id=instance.pk)
+        ).values_list('qr_code', flat=True).distinct()
+    )
+
+
+def _location_qr_codes(location_id):
+    return Product.objects.filter(
+        Q(creator__location_id=location_id) |
+        Q(batch__location_id=location_id) |
+        Q(batch__farmer__location_id=location_id)
+    ).values_list('qr_code', flat=True).distinct()
+
+
+@receiver(post_save, sender=Location)
+def invalidate_location_qr_cache(sender, instance, **kwargs):
+    """Locations are nested under the creator, the batch and the batch farmer"""
+    _invalidate_on_commit(_location_qr_codes(instance.pk))
+
+
+@receiver(pre_delete, sender=Location)
+def invalidate_deleted_location_qr_cache(sender, instance, **kwargs):
+    """
+    Collect the affected codes before the delete, since users and batches
+    drop their reference to the location (SET_NULL) ahead of post_delete
+    """
+    _invalidate_on_commit(_location_qr_codes(instance.pk))
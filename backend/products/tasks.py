@@ -0,0 +1,38 @@
+"""
+Celery tasks for Products app
+"""
+import logging
+from celery import shared_task
+from django.db import OperationalError
+from .models import Verification
+
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(autoretry_for=(OperationalError,), retry_backoff=True, max_retries=5)
+def record_verification(product_id, user_id, verification_type, result, verification_method='', notes=''):
+    """Store a verification that was answered before it was written"""
+    Verification.objects.create(
+        product_id=product_id,
+        user_id=user_id,
+        verification_type=verification_type,
+        result=result,
+        verification_method=verification_method,
+        notes=notes
+    )
+
+
+def queue_verification(**fields):
+    """
+    Hand a verification row to a worker instead of writing it in the request
+    
+    Falls back to writing it directly when the broker cannot be reached, so
+    a verification is never lost.
+    """
+    try:
+        # No publish retries: the caller is inside a gateway deadline
+        record_verification.apply_async(kwargs=fields, retry=False)
+    except Exception:
+        logger.warning('Could not queue verification, writing it directly', exc_info=True)
+        record_verification(**fields)
@@ -0,0 +1,187 @@
+"""
+Tests for Products app
+"""
+import datetime
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from users.models import User, Location
+from .cache import get_qr_payload, get_qr_summary, set_qr_payload
+from .models import Batch, Certification, Product, Verification
+
+
+class ProductTestCase(TestCase):
+    """A farmer with a located batch and one product"""
+    
+    def setUp(self):
+        cache.clear()
+        self.location = Location.objects.create(district='Musanze', sector='Muhoza', cell='Cyabararika', village='Kabeza')
+        self.farmer = User.objects.create(
+            username='farmer', phone_number='0788000001', user_type='farmer', location=self.location
+        )
+        self.batch = Batch.objects.create(
+            seed_variety='RWV 3006', planting_date=datetime.date(2025, 3, 1), total_quantity=1000,
+            farmer=self.farmer, location=self.location
+        )
+        self.product = self.create_product()
+        self.client = APIClient()
+        self.client.force_authenticate(self.farmer)
+    
+    def create_product(self, **fields):
+        return Product.objects.create(**{
+            'name': 'Iron Beans',
+            'variety': 'RWV 3006',
+            'iron_content': 85,
+            'creator': self.farmer,
+            'batch': self.batch,
+            'quantity': 500,
+            'harvest_date': datetime.date(2025, 6, 1),
+            **fields
+        })
+
+
+class EagerLoadingTests(ProductTestCase):
+    """List endpoints load related rows up front"""
+    
+    def setUp(self):
+        super().setUp()
+        for index in range(10):
+            product = self.create_product(name=f'Beans {index}')
+            Certification.objects.create(
+                product=product, cert_type='organic', issuer='RAB', issue_date=datetime.date(2025, 6, 1)
+            )
+            Verification.objects.create(product=product, user=self.farmer, verification_type='qr_scan')
+    
+    def test_list_endpoints_run_a_constant_number_of_queries(self):
+        # One COUNT for the page number paginator and one SELECT with joins
+        for url in (
+            '/api/v1/products/',
+            '/api/v1/products/batches/',
+            '/api/v1/products/certifications/',
+            '/api/v1/products/verifications/',
+        ):
+            with self.subTest(url=url), self.assertNumQueries(2):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+    
+    def test_cursor_pagination_skips_the_count(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/products/verifications/?pagination=cursor&page_size=4')
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertIsNotNone(response.data['next'])
+        
+        seen = [row['id'] for row in response.data['results']]
+        url = response.data['next']
+        while url:
+            response = self.client.get(url)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(sorted(seen), sorted(Verification.objects.values_list('pk', flat=True)))
+    
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get('/api/v1/products/verifications/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+
+class SparseFieldsetTests(ProductTestCase):
+    """?fields= and ?expand= on the product list"""
+    
+    def test_fields_limits_the_response(self):
+        response = self.client.get('/api/v1/products/?fields=id,name,creator')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0], {
+            'id': self.product.pk, 'name': 'Iron Beans', 'creator': self.farmer.pk
+        })
+    
+    def test_dotted_fields_select_nested_fields(self):
+        response = self.client.get('/api/v1/products/?fields=id,creator.username,batch.farmer.location.district')
+        self.assertEqual(response.data['results'][0], {
+            'id': self.product.pk,
+            'creator': {'username': 'farmer'},
+            'batch': {'farmer': {'location': {'district': 'Musanze'}}},
+        })
+    
+    def test_empty_expand_returns_primary_keys(self):
+        response = self.client.get('/api/v1/products/?expand=')
+        row = response.data['results'][0]
+        self.assertEqual(row['creator'], self.farmer.pk)
+        self.assertEqual(row['batch'], self.batch.pk)
+    
+    def test_sparse_fieldsets_keep_a_single_select(self):
+        with self.assertNumQueries(2):
+            self.client.get('/api/v1/products/?fields=id,name,batch.farmer.username')
+
+
+@mock.patch('products.views.activity_log')
+class QRCacheTests(ProductTestCase):
+    """Cached QR payloads and summaries follow the rows they embed"""
+    
+    def lookup(self):
+        return self.client.get(f'/api/v1/products/qr/{self.product.qr_code}/')
+    
+    def test_lookup_is_served_from_the_cache(self, activity_log):
+        self.lookup()
+        with self.assertNumQueries(0):
+            response = self.lookup()
+        self.assertEqual(response.data['name'], 'Iron Beans')
+    
+    def test_product_change_invalidates_its_payload(self, activity_log):
+        self.lookup()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = 'Iron Beans 2'
+            self.product.save()
+        self.assertIsNone(get_qr_payload(self.product.qr_code))
+        self.assertEqual(self.lookup().data['name'], 'Iron Beans 2')
+    
+    def test_qr_code_change_invalidates_the_old_code(self, activity_log):
+        old_code = self.product.qr_code
+        set_qr_payload(old_code, {'name': 'stale'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.qr_code = 'QR-RENAMED'
+            self.product.save()
+        self.assertIsNone(get_qr_payload(old_code))
+    
+    def test_location_change_invalidates_nested_payloads(self, activity_log):
+        self.lookup()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.location.village = 'Nyarutovu'
+            self.location.save()
+        self.assertEqual(self.lookup().data['creator']['location']['village'], 'Nyarutovu')
+    
+    def test_location_delete_invalidates_nested_payloads(self, activity_log):
+        self.lookup()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.location.delete()
+        self.assertIsNone(get_qr_payload(self.product.qr_code))
+        self.assertIsNone(self.lookup().data['creator']['location'])
+    
+    def test_login_does_not_invalidate_payloads(self, activity_log):
+        self.lookup()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.farmer.last_login = datetime.datetime(2025, 6, 1, tzinfo=datetime.timezone.utc)
+            self.farmer.save(update_fields=['last_login'])
+        self.assertIsNotNone(get_qr_payload(self.product.qr_code))
+    
+    def test_certification_change_invalidates_the_summary(self, activity_log):
+        summary, count = get_qr_summary(self.product.qr_code)
+        self.assertIsNone(summary.certificate_type)
+        with self.captureOnCommitCallbacks(execute=True):
+            Certification.objects.create(
+                product=self.product, cert_type='quality', issuer='RAB',
+                issue_date=datetime.date(2025, 6, 1), verified=True
+            )
+        summary, count = get_qr_summary(self.product.qr_code)
+        self.assertEqual(summary.certificate_type, 'quality')
+    
+    def test_verifications_bump_the_cached_count(self, activity_log):
+        get_qr_summary(self.product.qr_code)
+        with self.captureOnCommitCallbacks(execute=True):
+            Verification.objects.create(product=self.product, user=self.farmer, verification_type='qr_scan')
+        with self.assertNumQueries(0):
+            summary, count = get_qr_summary(self.product.qr_code)
+        self.assertEqual(count, 1)
+    
+    def test_extra_count_is_added_on_a_miss(self, activity_log):
+        summary, count = get_qr_summary(self.product.qr_code, extra_count=lambda product_id: 7)
+        self.assertEqual(count, 7)
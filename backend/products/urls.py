@@ -7,9 +7,9 @@ from . import views
 
 router = DefaultRouter()
 router.register(r'batches', views.BatchViewSet, basename='batch')
-router.register(r'', views.ProductViewSet, basename='product')
 router.register(r'certifications', views.CertificationViewSet, basename='certification')
 router.register(r'verifications', views.VerificationViewSet, basename='verification')
+router.register(r'', views.ProductViewSet, basename='product')
 
 urlpatterns = [
     path('', include(router.urls)),
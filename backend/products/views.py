@@ -5,6 +5,10 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from agritrace.mixins import EagerLoadingMixin
+from agritrace.serializers import sparse_fieldsets_requested
+from users.activity import activity_log
+from .cache import get_qr_payload, set_qr_payload
 from .models import Batch, Product, Certification, Verification
 from .serializers import (
     BatchSerializer,
@@ -16,7 +20,7 @@ from .serializers import (
 )
 
 
-class BatchViewSet(viewsets.ModelViewSet):
+class BatchViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """Batch CRUD operations"""
     queryset = Batch.objects.all()
     serializer_class = BatchSerializer
@@ -26,7 +30,7 @@ class BatchViewSet(viewsets.ModelViewSet):
         serializer.save(farmer=self.request.user)
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """Product CRUD operations"""
     queryset = Product.objects.all()
     permission_classes = (IsAuthenticated,)
@@ -37,7 +41,7 @@ class ProductViewSet(viewsets.ModelViewSet):
         return ProductSerializer
     
     def get_queryset(self):
-        queryset = Product.objects.all()
+        queryset = super().get_queryset()
         
         # Filter by biofortified
         biofortified = self.request.query_params.get('biofortified')
@@ -52,20 +56,34 @@ class ProductViewSet(viewsets.ModelViewSet):
         return queryset
     
     def perform_create(self, serializer):
-        serializer.save(creator=self.request.user)
+        product = serializer.save(creator=self.request.user)
+        activity_log.log(
+            self.request.user, 'product_register', f'Registered product {product.qr_code}', request=self.request
+        )
     
     @action(detail=False, methods=['get'], url_path='qr/(?P<qr_code>[^/.]+)')
     def by_qr_code(self, request, qr_code=None):
         """Get product by QR code"""
+        # Only the full representation is cached
+        cacheable = not sparse_fieldsets_requested(request)
+        activity_log.log(request.user, 'qr_scan', f'Scanned {qr_code}', request=request)
+        payload = get_qr_payload(qr_code) if cacheable else None
+        if payload is not None:
+            return Response(payload)
+        
         try:
-            product = Product.objects.get(qr_code=qr_code)
-            serializer = self.get_serializer(product)
-            return Response(serializer.data)
+            product = self.optimize_queryset(Product.objects.all()).get(qr_code=qr_code)
         except Product.DoesNotExist:
             return Response(
                 {'detail': 'Product not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
+        
+        serializer = self.get_serializer(product)
+        payload = dict(serializer.data)
+        if cacheable:
+            set_qr_payload(qr_code, payload)
+        return Response(payload)
     
     @action(detail=True, methods=['post'])
     def verify(self, request, pk=None):
@@ -81,6 +99,7 @@ class ProductViewSet(viewsets.ModelViewSet):
                 result='authentic',  # Simplified for now
                 notes=serializer.validated_data.get('notes', '')
             )
+            activity_log.log(request.user, 'product_verify', f'Verified product {product.qr_code}', request=request)
             return Response({'detail': 'Product verified successfully'})
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -96,7 +115,7 @@ class ProductViewSet(viewsets.ModelViewSet):
         })
 
 
-class CertificationViewSet(viewsets.ModelViewSet):
+class CertificationViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """Certification CRUD operations"""
     queryset = Certification.objects.all()
     serializer_class = CertificationSerializer
@@ -116,8 +135,24 @@ class CertificationViewSet(viewsets.ModelViewSet):
         )
 
 
-class VerificationViewSet(viewsets.ReadOnlyModelViewSet):
+class VerificationViewSet(EagerLoadingMixin, viewsets.ReadOnlyModelViewSet):
     """Verification read-only operations"""
     queryset = Verification.objects.all()
     serializer_class = VerificationSerializer
     permission_classes = (IsAuthenticated,)
+    cursor_ordering = '-verified_at'
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        
+        # Filter by product
+        product = self.request.query_params.get('product')
+        if product:
+            queryset = queryset.filter(product_id=product)
+        
+        # Filter by result
+        result = self.request.query_params.get('result')
+        if result:
+            queryset = queryset.filter(result=result)
+        
+        return queryset
@@ -11,7 +11,7 @@ class TransactionAdmin(admin.ModelAdmin):
     list_display = ['transaction_id', 'from_user', 'to_user', 'product', 'quantity', 'price', 'status', 'timestamp']
     list_filter = ['transaction_type', 'status', 'timestamp']
     search_fields = ['transaction_id', 'from_user__username', 'to_user__username', 'product__qr_code']
-    readonly_fields = ['transaction_id', 'blockchain_hash', 'timestamp', 'updated_at', 'display_total_value']
+    readonly_fields = ['transaction_id', 'blockchain_hash', 'anchor_batch', 'merkle_proof', 'timestamp', 'updated_at', 'display_total_value']
     ordering = ['-timestamp']
     
     fieldsets = (
@@ -28,7 +28,7 @@ class TransactionAdmin(admin.ModelAdmin):
             'fields': ('location', 'transport_method', 'estimated_delivery', 'actual_delivery')
         }),
         ('Additional Info', {
-            'fields': ('notes', 'blockchain_hash')
+            'fields': ('notes', 'blockchain_hash', 'anchor_batch', 'merkle_proof')
         }),
         ('Timestamps', {
             'fields': ('timestamp', 'updated_at'),
@@ -52,7 +52,7 @@ class SupplyChainAdmin(admin.ModelAdmin):
     list_display = ['product', 'step_number', 'actor_type', 'actor', 'action', 'timestamp']
     list_filter = ['actor_type', 'action', 'timestamp']
     search_fields = ['product__qr_code', 'actor__username', 'description']
-    readonly_fields = ['blockchain_hash', 'timestamp']
+    readonly_fields = ['blockchain_hash', 'anchor_batch', 'merkle_proof', 'timestamp']
     ordering = ['product', 'step_number']
     
     fieldsets = (
@@ -66,7 +66,7 @@ class SupplyChainAdmin(admin.ModelAdmin):
             'fields': ('description', 'temperature', 'humidity')
         }),
         ('Blockchain', {
-            'fields': ('blockchain_hash', 'timestamp'),
+            'fields': ('blockchain_hash', 'anchor_batch', 'merkle_proof', 'timestamp'),
             'classes': ('collapse',)
         }),
     )
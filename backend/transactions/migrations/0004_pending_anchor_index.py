@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0003_supplychain_anchor_batch_supplychain_merkle_proof_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='supplychain',
+            index=models.Index(condition=models.Q(('anchor_batch__isnull', True), ('blockchain_hash', '')), fields=['timestamp', 'id'], name='supplychain_pending_anchor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('anchor_batch__isnull', True), ('blockchain_hash', '')), fields=['timestamp', 'id'], name='transaction_pending_anchor_idx'),
+        ),
+    ]
@@ -78,6 +78,14 @@ class Transaction(models.Model):
     
     # Blockchain reference
     blockchain_hash = models.CharField(_('Blockchain Hash'), max_length=66, blank=True, db_index=True)
+    anchor_batch = models.ForeignKey(
+        'blockchain.AnchorBatch',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='transactions'
+    )
+    merkle_proof = models.JSONField(_('Merkle Proof'), null=True, blank=True)
     
     # Additional metadata
     notes = models.TextField(_('Notes'), blank=True)
@@ -98,6 +106,12 @@ class Transaction(models.Model):
             models.Index(fields=['product', '-timestamp']),
             models.Index(fields=['status', '-timestamp']),
             models.Index(fields=['blockchain_hash']),
+            # Records anchor_pending_records has yet to batch, oldest first
+            models.Index(
+                fields=['timestamp', 'id'],
+                condition=models.Q(anchor_batch__isnull=True, blockchain_hash=''),
+                name='transaction_pending_anchor_idx'
+            ),
         ]
     
     def __str__(self):
@@ -158,6 +172,14 @@ class SupplyChain(models.Model):
     
     # Blockchain reference
     blockchain_hash = models.CharField(_('Blockchain Hash'), max_length=66, blank=True)
+    anchor_batch = models.ForeignKey(
+        'blockchain.AnchorBatch',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='supply_chain_steps'
+    )
+    merkle_proof = models.JSONField(_('Merkle Proof'), null=True, blank=True)
     
     # Additional data
     temperature = models.DecimalField(
@@ -183,6 +205,11 @@ class SupplyChain(models.Model):
         indexes = [
             models.Index(fields=['product', 'step_number']),
             models.Index(fields=['actor', '-timestamp']),
+            models.Index(
+                fields=['timestamp', 'id'],
+                condition=models.Q(anchor_batch__isnull=True, blockchain_hash=''),
+                name='supplychain_pending_anchor_idx'
+            ),
         ]
     
     def __str__(self):
@@ -2,12 +2,13 @@
 Serializers for Transaction models
 """
 from rest_framework import serializers
+from agritrace.serializers import DynamicFieldsMixin
 from .models import Transaction, SupplyChain, Payment
 from users.serializers import UserSerializer
 from products.serializers import ProductSerializer
 
 
-class TransactionSerializer(serializers.ModelSerializer):
+class TransactionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Transaction model"""
     
     from_user = UserSerializer(read_only=True)
@@ -27,7 +28,7 @@ class TransactionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'transaction_id', 'blockchain_hash', 'timestamp', 'updated_at']
 
 
-class SupplyChainSerializer(serializers.ModelSerializer):
+class SupplyChainSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for SupplyChain model"""
     
     actor = UserSerializer(read_only=True)
@@ -43,7 +44,7 @@ class SupplyChainSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'blockchain_hash', 'timestamp']
 
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Payment model"""
     
     transaction = TransactionSerializer(read_only=True)
@@ -0,0 +1,135 @@
+"""
+Tests for Transactions app
+"""
+import datetime
+from django.db.models import Q
+from django.test import TestCase
+from rest_framework.test import APIClient
+from products.models import Product
+from users.models import User, Location
+from .models import Transaction, Payment, SupplyChain
+
+
+class TransactionTestCase(TestCase):
+    """A farmer and a trader trading one product"""
+    
+    def setUp(self):
+        self.location = Location.objects.create(district='Musanze', sector='Muhoza', cell='Cyabararika', village='Kabeza')
+        self.farmer = User.objects.create(
+            username='farmer', phone_number='0788000001', user_type='farmer', location=self.location
+        )
+        self.trader = User.objects.create(
+            username='trader', phone_number='0788000002', user_type='trader', location=self.location
+        )
+        self.product = Product.objects.create(
+            name='Iron Beans', variety='RWV 3006', iron_content=85, creator=self.farmer,
+            quantity=500, harvest_date=datetime.date(2025, 6, 1)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.farmer)
+    
+    def create_transaction(self, from_user, to_user, **fields):
+        return Transaction.objects.create(**{
+            'from_user': from_user,
+            'to_user': to_user,
+            'product': self.product,
+            'quantity': 10,
+            'price': 500,
+            'transaction_type': 'sale',
+            'location': self.location,
+            **fields
+        })
+
+
+class EagerLoadingTests(TransactionTestCase):
+    """List endpoints load related rows up front"""
+    
+    def setUp(self):
+        super().setUp()
+        for index in range(10):
+            transaction = self.create_transaction(self.farmer, self.trader)
+            Payment.objects.create(transaction=transaction, amount=5000, payment_method='mobile_money')
+            SupplyChain.objects.create(
+                product=self.product, step_number=index, actor_type='farmer', actor=self.farmer,
+                action='harvested', location=self.location
+            )
+    
+    def test_list_endpoints_run_a_constant_number_of_queries(self):
+        for url in (
+            '/api/v1/transactions/',
+            '/api/v1/transactions/payments/',
+            '/api/v1/transactions/supply-chain/',
+            f'/api/v1/transactions/supply-chain/{self.product.qr_code}/',
+            '/api/v1/transactions/my_transactions/',
+        ):
+            with self.subTest(url=url), self.assertNumQueries(2):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+    
+    def test_sparse_fieldsets_on_cursor_pages(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/transactions/?fields=id,quantity,from_user&pagination=cursor')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'quantity', 'from_user'})
+    
+    def test_expand_nested_relation(self):
+        response = self.client.get(
+            '/api/v1/transactions/payments/?expand=transaction.product'
+            '&fields=id,amount,transaction.product.name'
+        )
+        self.assertEqual(response.data['results'][0]['transaction'], {'product': {'name': 'Iron Beans'}})
+
+
+class MyTransactionsTests(TransactionTestCase):
+    """Sent and received transactions merged into one keyset-paginated stream"""
+    
+    def setUp(self):
+        super().setUp()
+        for index in range(12):
+            self.create_transaction(self.farmer, self.trader)
+            self.create_transaction(self.trader, self.farmer)
+        # Counted once although the farmer is both sender and receiver
+        self.create_transaction(self.farmer, self.farmer)
+        self.create_transaction(self.trader, self.trader)
+    
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        return ids
+    
+    def test_pages_cover_both_streams_newest_first(self):
+        ids = self.walk('/api/v1/transactions/my_transactions/?page_size=5')
+        expected = Transaction.objects.filter(
+            Q(from_user=self.farmer) | Q(to_user=self.farmer)
+        ).order_by('-timestamp', '-pk').values_list('pk', flat=True)
+        self.assertEqual(ids, list(expected))
+        self.assertEqual(len(ids), 25)
+    
+    def test_pages_run_a_constant_number_of_queries(self):
+        response = self.client.get('/api/v1/transactions/my_transactions/?page_size=5')
+        with self.assertNumQueries(2):
+            self.client.get(response.data['next'])
+    
+    def test_direction(self):
+        sent = self.walk('/api/v1/transactions/my_transactions/?direction=sent')
+        received = self.walk('/api/v1/transactions/my_transactions/?direction=received')
+        self.assertEqual(len(sent), 13)
+        self.assertEqual(len(received), 13)
+        response = self.client.get('/api/v1/transactions/my_transactions/?direction=both-ways')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_date_bounds(self):
+        self.assertEqual(self.walk('/api/v1/transactions/my_transactions/?until=2000-01-01'), [])
+        self.assertEqual(len(self.walk('/api/v1/transactions/my_transactions/?since=2000-01-01')), 25)
+    
+    def test_invalid_date_bound_is_rejected(self):
+        response = self.client.get('/api/v1/transactions/my_transactions/?until=next-week')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['detail'], 'Invalid until date')
+    
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get('/api/v1/transactions/my_transactions/?cursor=zzz')
+        self.assertEqual(response.status_code, 404)
@@ -5,18 +5,29 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from agritrace.mixins import EagerLoadingMixin
+from agritrace.pagination import MergedKeysetPagination
+from agritrace.utils import parse_timestamp_bound
+from users.activity import activity_log
 from .models import Transaction, SupplyChain, Payment
 from .serializers import TransactionSerializer, SupplyChainSerializer, PaymentSerializer
 
 
-class TransactionViewSet(viewsets.ModelViewSet):
+class TransactionViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """Transaction CRUD operations"""
     queryset = Transaction.objects.all()
     serializer_class = TransactionSerializer
     permission_classes = (IsAuthenticated,)
+    cursor_ordering = '-timestamp'
+    
+    def perform_create(self, serializer):
+        transaction = serializer.save()
+        activity_log.log(
+            self.request.user, 'transaction', f'Recorded transaction {transaction.transaction_id}', request=self.request
+        )
     
     def get_queryset(self):
-        queryset = Transaction.objects.all()
+        queryset = super().get_queryset()
         
         # Filter by status
         status_filter = self.request.query_params.get('status')
@@ -28,21 +39,68 @@ class TransactionViewSet(viewsets.ModelViewSet):
         if tx_type:
             queryset = queryset.filter(transaction_type=tx_type)
         
+        # Filter by sender or receiver
+        from_user = self.request.query_params.get('from_user')
+        if from_user:
+            queryset = queryset.filter(from_user_id=from_user)
+        
+        to_user = self.request.query_params.get('to_user')
+        if to_user:
+            queryset = queryset.filter(to_user_id=to_user)
+        
         return queryset
     
     @action(detail=False, methods=['get'])
     def my_transactions(self, request):
-        """Get current user's transactions"""
-        transactions = Transaction.objects.filter(
-            from_user=request.user
-        ) | Transaction.objects.filter(
-            to_user=request.user
-        )
-        serializer = self.get_serializer(transactions, many=True)
-        return Response(serializer.data)
+        """
+        Get current user's transactions, newest first
+        
+        Sent and received transactions are read as two separate streams,
+        each served by its own (user, -timestamp) index, and merged one
+        page at a time.
+        
+        Query params:
+            direction: sent, received or both (default)
+            since / until: Date or datetime bounds on the timestamp
+            cursor / page_size: Keyset pagination
+        """
+        direction = request.query_params.get('direction', 'both')
+        if direction not in ('sent', 'received', 'both'):
+            return Response(
+                {'detail': 'direction must be one of sent, received, both'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        queryset = self.get_queryset()
+        for param, lookup in (('since', 'timestamp__gte'), ('until', 'timestamp__lt')):
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            bound = parse_timestamp_bound(value, end=(param == 'until'))
+            if bound is None:
+                return Response(
+                    {'detail': f'Invalid {param} date'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            queryset = queryset.filter(**{lookup: bound})
+        
+        streams = []
+        if direction in ('sent', 'both'):
+            streams.append(queryset.filter(from_user=request.user))
+        if direction in ('received', 'both'):
+            received = queryset.filter(to_user=request.user)
+            if direction == 'both':
+                # Transfers to oneself are already part of the sent stream
+                received = received.exclude(from_user=request.user)
+            streams.append(received)
+        
+        paginator = MergedKeysetPagination()
+        page = paginator.paginate_streams(streams, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 
-class SupplyChainViewSet(viewsets.ModelViewSet):
+class SupplyChainViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """Supply Chain CRUD operations"""
     queryset = SupplyChain.objects.all()
     serializer_class = SupplyChainSerializer
@@ -55,7 +113,9 @@ class SupplyChainViewSet(viewsets.ModelViewSet):
         
         try:
             product = Product.objects.get(qr_code=qr_code)
-            supply_chain = SupplyChain.objects.filter(product=product).order_by('step_number')
+            supply_chain = self.optimize_queryset(
+                SupplyChain.objects.filter(product=product).order_by('step_number')
+            )
             serializer = self.get_serializer(supply_chain, many=True)
             return Response(serializer.data)
         except Product.DoesNotExist:
@@ -67,14 +127,14 @@ class SupplyChainViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path='history/(?P<product_id>[^/.]+)')
     def history(self, request, product_id=None):
         """Get supply chain history for a product"""
-        supply_chain = SupplyChain.objects.filter(
-            product_id=product_id
-        ).order_by('step_number')
+        supply_chain = self.optimize_queryset(
+            SupplyChain.objects.filter(product_id=product_id).order_by('step_number')
+        )
         serializer = self.get_serializer(supply_chain, many=True)
         return Response(serializer.data)
 
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """Payment CRUD operations"""
     queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
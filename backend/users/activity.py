@@ -0,0 +1,262 @@
+"""
+Write-behind logging of user activity
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+from django.conf import settings
+from django.db import DatabaseError, DataError, IntegrityError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import UserActivity
+
+
+logger = logging.getLogger(__name__)
+
+REDIS_BUFFER_KEY = 'users:activity:buffer'
+
+
+class MemoryBuffer:
+    """Events waiting in this process; flushed by a background thread"""
+    
+    def __init__(self, max_size):
+        self.events = []
+        self.max_size = max_size
+        self.lock = threading.Lock()
+    
+    def push(self, event):
+        """Append an event and return the buffer length"""
+        with self.lock:
+            self.events.append(event)
+            self._trim()
+            return len(self.events)
+    
+    def drain(self, limit):
+        with self.lock:
+            events = self.events[:limit]
+            del self.events[:limit]
+            return events
+    
+    def requeue(self, events):
+        with self.lock:
+            self.events[:0] = events
+            self._trim()
+    
+    def _trim(self):
+        """Drop the oldest events beyond max_size"""
+        excess = len(self.events) - self.max_size
+        if excess > 0:
+            del self.events[:excess]
+            logger.warning('User activity buffer full, dropped %d events', excess)
+
+
+class RedisBuffer:
+    """
+    Events waiting in a Redis list shared by all processes
+    
+    Survives restarts of the web processes; drained by the
+    flush_user_activity task.
+    """
+    
+    def __init__(self, url, max_size):
+        self.url = url
+        self.max_size = max_size
+        self._client = None
+    
+    @property
+    def client(self):
+        if self._client is None:
+            import redis
+            
+            self._client = redis.Redis.from_url(self.url)
+        return self._client
+    
+    def push(self, event):
+        pipe = self.client.pipeline()
+        pipe.rpush(REDIS_BUFFER_KEY, json.dumps(event))
+        pipe.ltrim(REDIS_BUFFER_KEY, -self.max_size, -1)
+        size, _ = pipe.execute()
+        return size
+    
+    def drain(self, limit):
+        # LRANGE and LTRIM in one MULTI, so two flushers never take the same events
+        pipe = self.client.pipeline()
+        pipe.lrange(REDIS_BUFFER_KEY, 0, limit - 1)
+        pipe.ltrim(REDIS_BUFFER_KEY, limit, -1)
+        events, _ = pipe.execute()
+        return [json.loads(event) for event in events]
+    
+    def requeue(self, events):
+        if events:
+            pipe = self.client.pipeline()
+            pipe.lpush(REDIS_BUFFER_KEY, *[json.dumps(event) for event in reversed(events)])
+            pipe.ltrim(REDIS_BUFFER_KEY, -self.max_size, -1)
+            pipe.execute()
+
+
+class ActivityLogger:
+    """
+    Buffer UserActivity rows and write them with bulk_create
+    
+    log() only appends to the buffer, so the request that records an
+    activity does not pay for an INSERT. The buffer is written once it
+    holds ACTIVITY_BATCH_SIZE events or ACTIVITY_FLUSH_INTERVAL seconds
+    after the last flush, whichever comes first, and on shutdown.
+    """
+    
+    def __init__(self, buffer, batch_size, flush_interval, max_attempts):
+        self.buffer = buffer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self._wake = threading.Event()
+        self._flusher_pid = None
+    
+    @classmethod
+    def from_settings(cls):
+        if settings.ACTIVITY_BUFFER == 'redis':
+            buffer = RedisBuffer(settings.ACTIVITY_BUFFER_URL, settings.ACTIVITY_BUFFER_MAX)
+        else:
+            buffer = MemoryBuffer(settings.ACTIVITY_BUFFER_MAX)
+        return cls(
+            buffer,
+            settings.ACTIVITY_BATCH_SIZE,
+            settings.ACTIVITY_FLUSH_INTERVAL,
+            settings.ACTIVITY_MAX_ATTEMPTS
+        )
+    
+    def log(self, user, activity_type, description='', request=None):
+        """Record an activity of user, with the client address of request if given"""
+        event = {
+            'user_id': getattr(user, 'pk', user),
+            'activity_type': activity_type,
+            'description': description,
+            'ip_address': request.META.get('REMOTE_ADDR') if request is not None else None,
+            'user_agent': request.META.get('HTTP_USER_AGENT', '')[:255] if request is not None else '',
+            'timestamp': timezone.now().isoformat(),
+        }
+        try:
+            size = self.buffer.push(event)
+        except Exception:
+            logger.warning('Could not buffer user activity, writing it directly', exc_info=True)
+            self.write([event])
+            return
+        
+        if size % self.batch_size == 0:
+            self.request_flush()
+        elif isinstance(self.buffer, MemoryBuffer):
+            self._ensure_flusher()
+    
+    def request_flush(self):
+        """Have the buffer written outside the calling request"""
+        if isinstance(self.buffer, MemoryBuffer):
+            self._ensure_flusher()
+            self._wake.set()
+            return
+        from .tasks import flush_user_activity
+        
+        try:
+            flush_user_activity.apply_async(retry=False)
+        except Exception:
+            # The beat schedule flushes the buffer anyway
+            logger.warning('Could not queue user activity flush', exc_info=True)
+    
+    def flush(self):
+        """
+        Write everything buffered so far
+        
+        A batch some row of which cannot be written (e.g. its user was
+        deleted in the meantime) is written row by row, dropping the bad
+        rows. On other database errors the batch goes back to the buffer,
+        each event for at most max_attempts flushes.
+        
+        Returns:
+            Number of activities written
+        """
+        written = 0
+        while True:
+            events = self.buffer.drain(self.batch_size)
+            if not events:
+                return written
+            try:
+                self.write(events)
+            except (IntegrityError, DataError):
+                written += self.write_each(events)
+                continue
+            except DatabaseError:
+                self.requeue_failed(events)
+                raise
+            written += len(events)
+    
+    def write_each(self, events):
+        """Write events one at a time, logging and dropping those that fail"""
+        written = 0
+        for event in events:
+            try:
+                with transaction.atomic():
+                    self.write([event])
+            except (IntegrityError, DataError):
+                logger.warning('Dropping user activity that cannot be written: %r', event, exc_info=True)
+            else:
+                written += 1
+        return written
+    
+    def requeue_failed(self, events):
+        retry = []
+        for event in events:
+            event['attempts'] = event.get('attempts', 0) + 1
+            if event['attempts'] < self.max_attempts:
+                retry.append(event)
+        if len(retry) < len(events):
+            logger.error(
+                'Dropping %d user activities after %d failed flushes', len(events) - len(retry), self.max_attempts
+            )
+        self.buffer.requeue(retry)
+    
+    def write(self, events):
+        UserActivity.objects.bulk_create([
+            UserActivity(
+                user_id=event['user_id'],
+                activity_type=event['activity_type'],
+                description=event['description'],
+                ip_address=event['ip_address'],
+                user_agent=event['user_agent'],
+                timestamp=parse_datetime(event['timestamp']),
+            )
+            for event in events
+        ], batch_size=self.batch_size)
+    
+    def _ensure_flusher(self):
+        """Start the flusher thread of this process (again, after a fork)"""
+        if self._flusher_pid == os.getpid():
+            return
+        self._flusher_pid = os.getpid()
+        threading.Thread(target=self._run_flusher, name='activity-flusher', daemon=True).start()
+    
+    def _run_flusher(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Could not flush user activity')
+            finally:
+                # The thread's own connection; do not hold it between flushes
+                connection.close()
+
+
+activity_log = ActivityLogger.from_settings()
+
+
+@atexit.register
+def flush_on_exit():
+    """Keep the activities buffered in memory by a process that is shutting down"""
+    if not isinstance(activity_log.buffer, MemoryBuffer):
+        return
+    try:
+        activity_log.flush()
+    except Exception:
+        logger.exception('Could not flush user activity on exit')
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:43
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='useractivity',
+            name='activity_type',
+            field=models.CharField(choices=[('login', 'Login'), ('product_register', 'Product Registration'), ('product_verify', 'Product Verification'), ('transaction', 'Transaction'), ('qr_scan', 'QR Code Scan'), ('logout', 'Logout')], max_length=30, verbose_name='Activity Type'),
+        ),
+        migrations.AlterField(
+            model_name='useractivity',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:52
+
+from django.conf import settings
+from django.db import migrations
+from agritrace.partitions import partition_table, unpartition_table
+
+
+def partition(apps, schema_editor):
+    partition_table(schema_editor, 'users_useractivity', 'timestamp', settings.PARTITION_MONTHS_AHEAD)
+
+
+def unpartition(apps, schema_editor):
+    unpartition_table(schema_editor, 'users_useractivity')
+
+
+class Migration(migrations.Migration):
+    """Range partition user activity by month on PostgreSQL; a no-op elsewhere"""
+
+    dependencies = [
+        ('users', '0002_activity_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, unpartition),
+    ]
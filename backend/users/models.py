@@ -3,6 +3,7 @@ User models for AGRITRACE
 """
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -117,6 +118,7 @@ class UserActivity(models.Model):
         ('product_verify', _('Product Verification')),
         ('transaction', _('Transaction')),
         ('qr_scan', _('QR Code Scan')),
+        ('logout', _('Logout')),
     ]
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activities')
@@ -124,7 +126,8 @@ class UserActivity(models.Model):
     description = models.TextField(_('Description'), blank=True)
     ip_address = models.GenericIPAddressField(_('IP Address'), null=True, blank=True)
     user_agent = models.CharField(_('User Agent'), max_length=255, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the activity happened, not when the buffered row is written
+    timestamp = models.DateTimeField(default=timezone.now)
     
     class Meta:
         verbose_name = _('User Activity')
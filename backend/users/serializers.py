@@ -2,13 +2,14 @@
 Serializers for User models
 """
 from rest_framework import serializers
+from agritrace.serializers import DynamicFieldsMixin
 from django.contrib.auth import get_user_model
 from .models import Location, UserActivity
 
 User = get_user_model()
 
 
-class LocationSerializer(serializers.ModelSerializer):
+class LocationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Location model"""
     
     class Meta:
@@ -21,7 +22,7 @@ class LocationSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for User model"""
     
     location = LocationSerializer(read_only=True)
@@ -101,7 +102,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return user
 
 
-class UserActivitySerializer(serializers.ModelSerializer):
+class UserActivitySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for UserActivity model"""
     
     user = UserSerializer(read_only=True)
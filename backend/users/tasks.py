@@ -0,0 +1,38 @@
+"""
+Celery tasks for Users app
+"""
+import logging
+from celery import shared_task
+from celery.signals import worker_shutdown
+from django.core.cache import cache
+from .activity import activity_log
+
+
+logger = logging.getLogger(__name__)
+
+FLUSH_LOCK_KEY = 'users:activity:flush:lock'
+
+
+@shared_task
+def flush_user_activity():
+    """
+    Write the buffered user activity
+    
+    Returns:
+        Number of activities written
+    """
+    if not cache.add(FLUSH_LOCK_KEY, True, 5 * 60):
+        return 0
+    try:
+        return activity_log.flush()
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+
+
+@worker_shutdown.connect
+def flush_user_activity_on_shutdown(**kwargs):
+    """Write what is still buffered before the worker goes away"""
+    try:
+        activity_log.flush()
+    except Exception:
+        logger.exception('Could not flush user activity on worker shutdown')
@@ -0,0 +1,116 @@
+"""
+Tests for Users app
+"""
+from unittest import mock
+from django.db import IntegrityError, OperationalError
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from .activity import ActivityLogger, MemoryBuffer
+from .models import User, Location, UserActivity
+
+
+class UserTestCase(TestCase):
+    """A located farmer"""
+    
+    def setUp(self):
+        self.location = Location.objects.create(district='Musanze', sector='Muhoza', cell='Cyabararika', village='Kabeza')
+        self.farmer = User.objects.create(
+            username='farmer', phone_number='0788000001', user_type='farmer', location=self.location
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.farmer)
+
+
+class ActivityListTests(UserTestCase):
+    """The activity feed pages by cursor over its timestamp index"""
+    
+    def setUp(self):
+        super().setUp()
+        UserActivity.objects.bulk_create([
+            UserActivity(user=self.farmer, activity_type='login', timestamp=timezone.now())
+            for _ in range(12)
+        ])
+    
+    def test_list_runs_a_constant_number_of_queries(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/v1/users/activities/')
+        self.assertEqual(response.data['count'], 12)
+    
+    def test_cursor_pages_cover_every_row(self):
+        seen = []
+        url = '/api/v1/users/activities/?pagination=cursor&page_size=5'
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(sorted(seen), sorted(UserActivity.objects.values_list('pk', flat=True)))
+    
+    def test_location_list(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/v1/users/locations/?fields=id,district')
+        self.assertEqual(response.data['results'], [{'id': self.location.pk, 'district': 'Musanze'}])
+
+
+@mock.patch.object(ActivityLogger, '_ensure_flusher')
+class ActivityLoggerTests(UserTestCase):
+    """Buffered activity writes"""
+    
+    def create_logger(self, max_size=100, batch_size=50, max_attempts=2):
+        return ActivityLogger(MemoryBuffer(max_size), batch_size, flush_interval=10, max_attempts=max_attempts)
+    
+    def test_log_only_buffers(self, ensure_flusher):
+        activity_log = self.create_logger()
+        with self.assertNumQueries(0):
+            activity_log.log(self.farmer, 'qr_scan', 'Scanned QR-1')
+        self.assertEqual(activity_log.flush(), 1)
+        self.assertEqual(UserActivity.objects.get().description, 'Scanned QR-1')
+    
+    def test_full_buffer_keeps_the_newest_events(self, ensure_flusher):
+        activity_log = self.create_logger(max_size=3)
+        with self.assertLogs('users.activity', 'WARNING'):
+            for index in range(5):
+                activity_log.log(self.farmer, 'qr_scan', f'Scan {index}')
+        self.assertEqual([event['description'] for event in activity_log.buffer.events], ['Scan 2', 'Scan 3', 'Scan 4'])
+    
+    def test_rows_that_cannot_be_written_are_dropped(self, ensure_flusher):
+        activity_log = self.create_logger()
+        for user in (self.farmer, 999999, self.farmer):
+            activity_log.log(user, 'login')
+        write = activity_log.write
+        
+        def write_existing_users(events):
+            if any(event['user_id'] == 999999 for event in events):
+                raise IntegrityError('FOREIGN KEY constraint failed')
+            write(events)
+        
+        with mock.patch.object(activity_log, 'write', side_effect=write_existing_users):
+            with self.assertLogs('users.activity', 'WARNING'):
+                self.assertEqual(activity_log.flush(), 2)
+        self.assertEqual(UserActivity.objects.count(), 2)
+        self.assertEqual(activity_log.buffer.events, [])
+    
+    def test_failed_flushes_are_retried_then_dropped(self, ensure_flusher):
+        activity_log = self.create_logger(max_attempts=2)
+        activity_log.log(self.farmer, 'login')
+        with mock.patch.object(activity_log, 'write', side_effect=OperationalError('database is locked')):
+            with self.assertRaises(OperationalError):
+                activity_log.flush()
+            self.assertEqual(len(activity_log.buffer.events), 1)
+            with self.assertRaises(OperationalError), self.assertLogs('users.activity', 'ERROR'):
+                activity_log.flush()
+        self.assertEqual(activity_log.buffer.events, [])
+
+
+class LoginTests(UserTestCase):
+    """Logging in records the activity without writing it inline"""
+    
+    def test_login(self):
+        self.farmer.set_password('harvest-2025')
+        self.farmer.save()
+        with mock.patch('users.views.activity_log') as activity_log:
+            response = APIClient().post('/api/v1/users/login/', {'username': 'farmer', 'password': 'harvest-2025'})
+        self.assertEqual(response.status_code, 200)
+        activity_log.log.assert_called_once()
+        self.assertFalse(UserActivity.objects.exists())
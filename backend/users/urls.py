@@ -8,6 +8,7 @@ from . import views
 
 router = DefaultRouter()
 router.register(r'locations', views.LocationViewSet, basename='location')
+router.register(r'activities', views.UserActivityViewSet, basename='activity')
 
 urlpatterns = [
     # Authentication
@@ -7,6 +7,8 @@ from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
+from agritrace.mixins import EagerLoadingMixin
+from .activity import activity_log
 from .models import User, Location, UserActivity
 from .serializers import (
     UserSerializer, 
@@ -61,12 +63,7 @@ class LoginView(generics.GenericAPIView):
             refresh = RefreshToken.for_user(user)
             
             # Log activity
-            UserActivity.objects.create(
-                user=user,
-                activity_type='login',
-                description='User logged in',
-                ip_address=request.META.get('REMOTE_ADDR')
-            )
+            activity_log.log(user, 'login', 'User logged in', request=request)
             
             return Response({
                 'access': str(refresh.access_token),
@@ -91,11 +88,7 @@ class LogoutView(generics.GenericAPIView):
             token.blacklist()
             
             # Log activity
-            UserActivity.objects.create(
-                user=request.user,
-                activity_type='logout',
-                description='User logged out'
-            )
+            activity_log.log(request.user, 'logout', 'User logged out', request=request)
             
             return Response({'detail': 'Successfully logged out'})
         except Exception as e:
@@ -146,7 +139,32 @@ class VerifyUserView(generics.GenericAPIView):
             )
 
 
-class LocationViewSet(viewsets.ModelViewSet):
+class UserActivityViewSet(EagerLoadingMixin, viewsets.ReadOnlyModelViewSet):
+    """User activity feed (own activity, or everyone's for admins)"""
+    queryset = UserActivity.objects.all()
+    serializer_class = UserActivitySerializer
+    permission_classes = (IsAuthenticated,)
+    cursor_ordering = '-timestamp'
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user)
+        else:
+            user = self.request.query_params.get('user')
+            if user:
+                queryset = queryset.filter(user_id=user)
+        
+        # Filter by activity type
+        activity_type = self.request.query_params.get('type')
+        if activity_type:
+            queryset = queryset.filter(activity_type=activity_type)
+        
+        return queryset
+
+
+class LocationViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """Location CRUD operations"""
     queryset = Location.objects.all()
     serializer_class = LocationSerializer
@@ -0,0 +1,25 @@
+"""
+Admin configuration for USSD models
+"""
+from django.contrib import admin
+from .models import OutboundSMS, UserSummary
+
+
+@admin.register(OutboundSMS)
+class OutboundSMSAdmin(admin.ModelAdmin):
+    list_display = ['phone_number', 'status', 'attempts', 'gateway_status', 'created_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['phone_number', 'gateway_message_id', 'message']
+    readonly_fields = [
+        'attempts', 'next_attempt_at', 'gateway_message_id', 'gateway_status',
+        'cost', 'error', 'created_at', 'sent_at', 'updated_at'
+    ]
+    ordering = ['-created_at']
+
+
+@admin.register(UserSummary)
+class UserSummaryAdmin(admin.ModelAdmin):
+    list_display = ['phone_number', 'user', 'user_type', 'payments_due_count', 'payments_owed_count', 'updated_at']
+    list_filter = ['user_type']
+    search_fields = ['phone_number', 'user__username']
+    readonly_fields = [field.name for field in UserSummary._meta.fields]
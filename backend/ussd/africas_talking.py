@@ -43,7 +43,7 @@ class AfricasTalkingClient:
             if sender_id:
                 params['sender_id'] = sender_id
             
-            response = self.sms.send(message, recipients)
+            response = self.sms.send(message, recipients, sender_id)
             return {
                 'success': True,
                 'response': response
@@ -67,54 +67,11 @@ class AfricasTalkingClient:
         Returns:
             USSD response string
         """
-        response = ""
+        # Imported here: the screens pull in the product and user models
+        from .screens import ussd_menu
         
-        if text == "":
-            # Main menu
-            response = "CON Welcome to AGRITRACE\n"
-            response += "1. Verify Product\n"
-            response += "2. Register Product\n"
-            response += "3. Check My Products\n"
-            response += "4. Transaction History\n"
-            response += "5. Help"
-        
-        elif text == "1":
-            # Verify product
-            response = "CON Enter QR Code to verify:"
-        
-        elif text.startswith("1*"):
-            # Process verification
-            qr_code = text.split("*")[1]
-            # TODO: Implement product verification logic
-            response = f"END Product {qr_code} verification in progress. You will receive SMS confirmation."
-        
-        elif text == "2":
-            # Register product
-            response = "CON Product Registration\n"
-            response += "1. Biofortified Beans\n"
-            response += "2. Other Crops"
-        
-        elif text == "3":
-            # Check products
-            # TODO: Implement product listing
-            response = "END You have 5 registered products. Check SMS for details."
-        
-        elif text == "4":
-            # Transaction history
-            # TODO: Implement transaction history
-            response = "END Your last 5 transactions sent via SMS."
-        
-        elif text == "5":
-            # Help
-            response = "END AGRITRACE Help:\n"
-            response += "Call: +250 XXX XXX XXX\n"
-            response += "Email: support@agritrace.rw"
-        
-        else:
-            response = "END Invalid option. Please try again."
-        
-        return response
+        return ussd_menu.handle(session_id, phone_number, text)
 
 
-# Singleton instance
-africas_talking_client = AfricasTalkingClient()
+# Singleton instance, built on first use
+from .clients import africas_talking_client  # noqa: E402,F401
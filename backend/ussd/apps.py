@@ -5,3 +5,6 @@ class UssdConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ussd'
     verbose_name = 'USSD Integration'
+
+    def ready(self):
+        from . import signals  # noqa: F401
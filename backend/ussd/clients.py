@@ -0,0 +1,7 @@
+"""
+Africa's Talking client, built on first use in each process
+"""
+from agritrace.clients import lazy_client
+
+
+africas_talking_client = lazy_client('africas_talking', 'ussd.africas_talking.AfricasTalkingClient')
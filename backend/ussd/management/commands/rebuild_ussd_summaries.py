@@ -0,0 +1,21 @@
+"""
+Rebuild the per-user USSD summaries from raw rows
+"""
+from django.core.management.base import BaseCommand
+from ussd.summaries import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute the USSD user summaries from products, transactions and payments'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            type=int,
+            help='Only rebuild the summary of this user ID (may be repeated)'
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild(options['user'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt USSD summaries: {written} users'))
@@ -0,0 +1,173 @@
+"""
+Declarative USSD menu engine with cache-backed sessions
+"""
+from collections import namedtuple
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import translation
+from django.utils.translation import gettext as _
+
+
+SESSION_CACHE_PREFIX = 'ussd:session:'
+BACK_INPUT = '0'
+
+# Numbered choice; options are (label, next screen name[, value]) tuples
+# picked by 1..n. With a key, the picked option's value is stored under
+# session.data[key]
+Menu = namedtuple('Menu', ['title', 'options', 'key'], defaults=(None,))
+
+# Free text input; clean(value, session) returns the value stored under
+# session.data[key] or raises ValueError with the message to show
+Prompt = namedtuple('Prompt', ['text', 'key', 'next', 'clean'], defaults=(None,))
+
+# Last screen; render(session) returns the text that closes the session
+End = namedtuple('End', ['render'])
+
+
+class USSDSession:
+    """
+    State of one USSD session, kept in the cache between hops
+    
+    The caller's user and language are looked up once, when the session
+    starts, and travel with the session afterwards.
+    """
+    
+    FIELDS = ('screen', 'history', 'data', 'user_id', 'user_type', 'language', 'text', 'error', 'response')
+    
+    def __init__(self, session_id, phone_number, screen):
+        self.session_id = session_id
+        self.phone_number = phone_number
+        self.screen = screen
+        self.history = []
+        self.data = {}
+        self.user_id = None
+        self.user_type = None
+        self.language = settings.USSD_DEFAULT_LANGUAGE
+        # Cumulative text already consumed and the response sent for it
+        self.text = ''
+        self.error = ''
+        self.response = None
+    
+    @staticmethod
+    def cache_key(session_id):
+        return f'{SESSION_CACHE_PREFIX}{session_id}'
+    
+    @classmethod
+    def load(cls, session_id, phone_number):
+        """Session stored for session_id, or None"""
+        state = cache.get(cls.cache_key(session_id))
+        if state is None or state.get('phone_number') != phone_number:
+            return None
+        session = cls(session_id, phone_number, state['screen'])
+        for field in cls.FIELDS:
+            setattr(session, field, state[field])
+        return session
+    
+    def preload_user(self):
+        """Attach the caller's account and language, if the number is registered"""
+        from .summaries import lookup
+        
+        summary = lookup(self.phone_number)
+        if summary is not None:
+            self.user_id, self.user_type, self.language = (
+                summary.user_id, summary.user_type, summary.preferred_language
+            )
+    
+    def save(self):
+        state = {field: getattr(self, field) for field in self.FIELDS}
+        state['phone_number'] = self.phone_number
+        cache.set(self.cache_key(self.session_id), state, settings.USSD_SESSION_TIMEOUT)
+
+
+class USSDMenu:
+    """
+    Run USSD sessions through a dict of named screens
+    
+    Gateways send the whole input so far ("1*QR-123*2") on every hop. The
+    session remembers the text it has already consumed, so each hop only
+    reads the new segment and makes one dictionary lookup. Sessions missing
+    from the cache (expired, or a hop that skipped the cache) are rebuilt
+    by replaying the text from the start screen.
+    """
+    
+    def __init__(self, screens, start):
+        self.screens = screens
+        self.start = start
+    
+    def handle(self, session_id, phone_number, text):
+        """Advance the session by the latest input and return the response text"""
+        text = text or ''
+        session = USSDSession.load(session_id, phone_number) if text else None
+        
+        if session is not None and text == session.text:
+            # Gateway retry of a hop we already answered
+            return session.response
+        if session is not None and session.text and not text.startswith(session.text + '*'):
+            session = None
+        
+        if session is None:
+            session = USSDSession(session_id, phone_number, self.start)
+            session.preload_user()
+            segments = text.split('*') if text else []
+        else:
+            segments = [text[len(session.text) + 1:] if session.text else text]
+        
+        with translation.override(session.language):
+            for segment in segments:
+                if isinstance(self.screens[session.screen], End):
+                    break
+                self.advance(session, segment)
+            session.response = self.render(session)
+        session.text = text
+        # Kept after the last screen too, so a retried final hop is answered
+        # from the cache instead of running the screen again
+        session.save()
+        return session.response
+    
+    def advance(self, session, value):
+        """Apply one input segment to the session's current screen"""
+        screen = self.screens[session.screen]
+        session.error = ''
+        value = value.strip()
+        
+        if value == BACK_INPUT and session.history and isinstance(screen, Menu):
+            session.screen = session.history.pop()
+            return
+        
+        if isinstance(screen, Menu):
+            index = int(value) - 1 if value.isdigit() else -1
+            if not 0 <= index < len(screen.options):
+                session.error = 'invalid_option'
+                return
+            option = screen.options[index]
+            if screen.key:
+                session.data[screen.key] = option[2]
+            next_screen = option[1]
+        else:
+            try:
+                session.data[screen.key] = screen.clean(value, session) if screen.clean else value
+            except ValueError as e:
+                session.error = str(e)
+                return
+            next_screen = screen.next
+        
+        session.history.append(session.screen)
+        session.screen = next_screen
+    
+    def render(self, session):
+        """Response text for the session's current screen"""
+        screen = self.screens[session.screen]
+        if isinstance(screen, End):
+            return f'END {screen.render(session)}'
+        
+        lines = []
+        if session.error:
+            lines.append(_('Invalid option.') if session.error == 'invalid_option' else session.error)
+        if isinstance(screen, Menu):
+            lines.append(str(screen.title))
+            lines.extend(f'{index}. {option[0]}' for index, option in enumerate(screen.options, 1))
+            if session.history:
+                lines.append(f'{BACK_INPUT}. {_("Back")}')
+        else:
+            lines.append(str(screen.text))
+        return 'CON ' + '\n'.join(lines)
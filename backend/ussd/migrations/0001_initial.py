@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:38
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundSMS',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phone_number', models.CharField(max_length=20, verbose_name='Phone Number')),
+                ('message', models.TextField(verbose_name='Message')),
+                ('sender_id', models.CharField(blank=True, max_length=11, verbose_name='Sender ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('sent', 'Sent'), ('delivered', 'Delivered'), ('failed', 'Failed')], default='queued', max_length=20, verbose_name='Status')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Attempts')),
+                ('next_attempt_at', models.DateTimeField(blank=True, null=True, verbose_name='Next Attempt At')),
+                ('gateway_message_id', models.CharField(blank=True, max_length=100, verbose_name='Gateway Message ID')),
+                ('gateway_status', models.CharField(blank=True, max_length=50, verbose_name='Gateway Status')),
+                ('cost', models.CharField(blank=True, max_length=30, verbose_name='Cost')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Sent At')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='outbound_sms', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Outbound SMS',
+                'verbose_name_plural': 'Outbound SMS',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='ussd_outbou_status_470dcc_idx'), models.Index(fields=['gateway_message_id'], name='ussd_outbou_gateway_5d831b_idx'), models.Index(fields=['phone_number', '-created_at'], name='ussd_outbou_phone_n_9d831f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('ussd', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phone_number', models.CharField(max_length=20, verbose_name='Phone Number')),
+                ('user_type', models.CharField(max_length=20, verbose_name='User Type')),
+                ('preferred_language', models.CharField(max_length=10, verbose_name='Preferred Language')),
+                ('product_counts', models.JSONField(default=dict, verbose_name='Product Counts')),
+                ('recent_transactions', models.JSONField(default=list, verbose_name='Recent Transactions')),
+                ('payments_due_count', models.PositiveIntegerField(default=0, verbose_name='Payments Due')),
+                ('payments_due_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Amount Due (RWF)')),
+                ('payments_owed_count', models.PositiveIntegerField(default=0, verbose_name='Payments Owed')),
+                ('payments_owed_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Amount Owed (RWF)')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='ussd_summary', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'USSD User Summary',
+                'verbose_name_plural': 'USSD User Summaries',
+                'indexes': [models.Index(fields=['phone_number'], name='ussd_usersu_phone_n_11f2c4_idx')],
+            },
+        ),
+    ]
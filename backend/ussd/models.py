@@ -0,0 +1,93 @@
+"""
+USSD and SMS models for AGRITRACE
+"""
+from django.conf import settings
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class OutboundSMS(models.Model):
+    """One recipient of a queued SMS and its delivery status"""
+    
+    STATUS_CHOICES = [
+        ('queued', _('Queued')),
+        ('sent', _('Sent')),
+        ('delivered', _('Delivered')),
+        ('failed', _('Failed')),
+    ]
+    
+    phone_number = models.CharField(_('Phone Number'), max_length=20)
+    message = models.TextField(_('Message'))
+    sender_id = models.CharField(_('Sender ID'), max_length=11, blank=True)
+    status = models.CharField(_('Status'), max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(_('Attempts'), default=0)
+    next_attempt_at = models.DateTimeField(_('Next Attempt At'), null=True, blank=True)
+    gateway_message_id = models.CharField(_('Gateway Message ID'), max_length=100, blank=True)
+    gateway_status = models.CharField(_('Gateway Status'), max_length=50, blank=True)
+    cost = models.CharField(_('Cost'), max_length=30, blank=True)
+    error = models.TextField(_('Error'), blank=True)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='outbound_sms'
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(_('Sent At'), null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = _('Outbound SMS')
+        verbose_name_plural = _('Outbound SMS')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['gateway_message_id']),
+            models.Index(fields=['phone_number', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.phone_number} - {self.status}"
+
+
+class UserSummary(models.Model):
+    """
+    What the USSD menu shows a caller, kept up to date by signals
+    
+    Looked up by the caller's normalised phone number, so a USSD hop reads
+    one row instead of aggregating products, transactions and payments.
+    """
+    
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='ussd_summary'
+    )
+    phone_number = models.CharField(_('Phone Number'), max_length=20)
+    user_type = models.CharField(_('User Type'), max_length=20)
+    preferred_language = models.CharField(_('Preferred Language'), max_length=10)
+    
+    # Product status -> number of products the user created
+    product_counts = models.JSONField(_('Product Counts'), default=dict)
+    # Latest transactions sent or received, newest first
+    recent_transactions = models.JSONField(_('Recent Transactions'), default=list)
+    
+    # Pending or processing payments owed to the user (as seller) and by the user (as buyer)
+    payments_due_count = models.PositiveIntegerField(_('Payments Due'), default=0)
+    payments_due_amount = models.DecimalField(_('Amount Due (RWF)'), max_digits=14, decimal_places=2, default=0)
+    payments_owed_count = models.PositiveIntegerField(_('Payments Owed'), default=0)
+    payments_owed_amount = models.DecimalField(_('Amount Owed (RWF)'), max_digits=14, decimal_places=2, default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = _('USSD User Summary')
+        verbose_name_plural = _('USSD User Summaries')
+        indexes = [
+            models.Index(fields=['phone_number']),
+        ]
+    
+    def __str__(self):
+        return f"{self.phone_number} - {self.user_id}"
@@ -0,0 +1,167 @@
+"""
+AGRITRACE USSD screens
+"""
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from django.utils import timezone
+from django.utils.translation import gettext as _, gettext_lazy
+from analytics.retention import compacted_verifications
+from products.cache import certificate_valid, get_qr_summary
+from products.models import Product
+from products.tasks import queue_verification
+from users.activity import activity_log
+from .menu import End, Menu, Prompt, USSDMenu
+from .models import UserSummary
+
+
+PRODUCT_STATUSES = dict(Product.PRODUCT_STATUS)
+
+CROPS = {
+    'beans': gettext_lazy('Biofortified Beans'),
+    'other': gettext_lazy('Other Crops'),
+}
+
+
+def not_registered():
+    return _('This number is not registered with AGRITRACE.')
+
+
+def clean_quantity(value, session):
+    try:
+        quantity = Decimal(value)
+    except InvalidOperation:
+        quantity = None
+    # Decimal() also parses NaN and Infinity
+    if quantity is None or not quantity.is_finite():
+        raise ValueError(_('Enter the quantity in kg, e.g. 250'))
+    if quantity <= 0:
+        raise ValueError(_('Quantity must be greater than 0'))
+    return str(quantity)
+
+
+def verify_product(session):
+    """Answer from the cached QR summary; the Verification row is written behind"""
+    qr_code = session.data['qr_code']
+    summary, count = get_qr_summary(qr_code, extra_count=compacted_verifications)
+    if summary is None:
+        return _('Product %(qr_code)s was not found. It may not be genuine.') % {'qr_code': qr_code}
+    
+    if session.user_id:
+        queue_verification(
+            product_id=summary.product_id,
+            user_id=session.user_id,
+            verification_type='manual',
+            result='authentic',
+            verification_method='ussd'
+        )
+    
+    lines = [f'{summary.name} ({summary.variety})']
+    if summary.biofortified:
+        lines.append(_('Biofortified, iron %(iron)s ppm') % {'iron': summary.iron_content})
+    else:
+        lines.append(_('Iron %(iron)s ppm') % {'iron': summary.iron_content})
+    lines.append(_('Status: %(status)s') % {'status': PRODUCT_STATUSES.get(summary.status, summary.status)})
+    if certificate_valid(summary):
+        if summary.certificate_expiry:
+            lines.append(_('Certificate valid until %(date)s') % {'date': f'{summary.certificate_expiry:%d/%m/%Y}'})
+        else:
+            lines.append(_('Certificate valid'))
+    elif summary.certificate_type:
+        lines.append(_('Certificate not valid'))
+    else:
+        lines.append(_('No certificate'))
+    lines.append(_('Checked %(count)d times before') % {'count': count})
+    return '\n'.join(lines)
+
+
+def register_product(session):
+    if not session.user_id:
+        return not_registered()
+    crop = CROPS[session.data['crop']]
+    quantity = session.data['quantity']
+    activity_log.log(session.user_id, 'product_register', f'USSD registration request: {quantity} kg of {crop}')
+    return _('Registration of %(quantity)s kg of %(crop)s received.') % {'quantity': quantity, 'crop': crop}
+
+
+def cancelled(session):
+    return _('Registration cancelled.')
+
+
+def user_summary(session):
+    """The caller's UserSummary row, one primary key lookup"""
+    return UserSummary.objects.filter(user_id=session.user_id).first()
+
+
+def my_products(session):
+    summary = user_summary(session) if session.user_id else None
+    if summary is None:
+        return not_registered()
+    counts = summary.product_counts
+    lines = [_('You have %(count)d registered products.') % {'count': sum(counts.values())}]
+    for status, label in Product.PRODUCT_STATUS:
+        if counts.get(status):
+            lines.append(f'{label}: {counts[status]}')
+    return '\n'.join(lines)
+
+
+def transaction_history(session):
+    summary = user_summary(session) if session.user_id else None
+    if summary is None:
+        return not_registered()
+    if not summary.recent_transactions:
+        lines = [_('You have no transactions yet.')]
+    else:
+        lines = [_('Your last transactions:')]
+        for entry in summary.recent_transactions:
+            timestamp = timezone.localtime(datetime.fromisoformat(entry['timestamp']))
+            lines.append(
+                f'{timestamp:%d/%m} {entry["type"]} {Decimal(entry["quantity"]):g}kg {entry["product"]}'
+            )
+    if summary.payments_due_count:
+        lines.append(_('Payments due to you: %(count)d (%(amount)s RWF)') % {
+            'count': summary.payments_due_count, 'amount': f'{summary.payments_due_amount:,.0f}'
+        })
+    if summary.payments_owed_count:
+        lines.append(_('Payments you owe: %(count)d (%(amount)s RWF)') % {
+            'count': summary.payments_owed_count, 'amount': f'{summary.payments_owed_amount:,.0f}'
+        })
+    return '\n'.join(lines)
+
+
+def help_text(session):
+    return '\n'.join([
+        _('AGRITRACE Help:'),
+        'Call: +250 XXX XXX XXX',
+        'Email: support@agritrace.rw',
+    ])
+
+
+SCREENS = {
+    'main': Menu(gettext_lazy('Welcome to AGRITRACE'), [
+        (gettext_lazy('Verify Product'), 'verify'),
+        (gettext_lazy('Register Product'), 'register'),
+        (gettext_lazy('Check My Products'), 'my_products'),
+        (gettext_lazy('Transaction History'), 'transactions'),
+        (gettext_lazy('Help'), 'help'),
+    ]),
+    'verify': Prompt(gettext_lazy('Enter QR Code to verify:'), key='qr_code', next='verify_result'),
+    'verify_result': End(verify_product),
+    'register': Menu(gettext_lazy('Product Registration'), [
+        (CROPS['beans'], 'register_quantity', 'beans'),
+        (CROPS['other'], 'register_quantity', 'other'),
+    ], key='crop'),
+    'register_quantity': Prompt(
+        gettext_lazy('Quantity harvested (kg):'), key='quantity', next='register_confirm', clean=clean_quantity
+    ),
+    'register_confirm': Menu(gettext_lazy('Confirm registration?'), [
+        (gettext_lazy('Yes'), 'register_done'),
+        (gettext_lazy('Cancel'), 'register_cancelled'),
+    ]),
+    'register_done': End(register_product),
+    'register_cancelled': End(cancelled),
+    'my_products': End(my_products),
+    'transactions': End(transaction_history),
+    'help': End(help_text),
+}
+
+ussd_menu = USSDMenu(SCREENS, start='main')
@@ -0,0 +1,87 @@
+"""
+Signal handlers for USSD app
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from products.models import Product
+from transactions.models import Payment, Transaction
+from users.models import User
+from . import summaries
+
+
+USER_FIELDS = ('phone_number', 'user_type', 'preferred_language')
+PRODUCT_FIELDS = ('creator', 'creator_id', 'status')
+PAYMENT_FIELDS = ('status', 'amount')
+
+
+@receiver(post_save, sender=User)
+def sync_user_summary(sender, instance, created, update_fields=None, **kwargs):
+    if created or summaries.tracks_fields(update_fields, USER_FIELDS):
+        summaries.sync_user(instance, created)
+
+
+@receiver(pre_save, sender=Product)
+def capture_product_state(sender, instance, update_fields=None, **kwargs):
+    """Remember the creator and status the product was counted under"""
+    if not summaries.tracks_fields(update_fields, PRODUCT_FIELDS):
+        instance._ussd_skip = True
+        return
+    instance._ussd_skip = False
+    instance._ussd_state = (
+        Product.objects.filter(pk=instance.pk).values_list('creator_id', 'status').first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Product)
+def count_product(sender, instance, **kwargs):
+    if instance.__dict__.pop('_ussd_skip', True):
+        return
+    summaries.product_changed(
+        instance.__dict__.pop('_ussd_state', None),
+        (instance.creator_id, instance.status)
+    )
+
+
+@receiver(post_delete, sender=Product)
+def uncount_product(sender, instance, **kwargs):
+    summaries.product_changed((instance.creator_id, instance.status), None)
+
+
+@receiver(post_save, sender=Transaction)
+def record_recent_transaction(sender, instance, created, **kwargs):
+    summaries.transaction_saved(instance, created)
+
+
+@receiver(post_delete, sender=Transaction)
+def drop_recent_transaction(sender, instance, **kwargs):
+    summaries.transaction_deleted(instance)
+
+
+@receiver(pre_save, sender=Payment)
+def capture_payment_state(sender, instance, update_fields=None, **kwargs):
+    """Remember whether the payment was outstanding, and for how much"""
+    if not summaries.tracks_fields(update_fields, PAYMENT_FIELDS):
+        instance._ussd_skip = True
+        return
+    instance._ussd_skip = False
+    instance._ussd_state = (
+        Payment.objects.filter(pk=instance.pk).values_list('status', 'amount').first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Payment)
+def count_payment(sender, instance, **kwargs):
+    if instance.__dict__.pop('_ussd_skip', True):
+        return
+    summaries.payment_changed(
+        instance.transaction_id,
+        instance.__dict__.pop('_ussd_state', None),
+        (instance.status, instance.amount)
+    )
+
+
+@receiver(post_delete, sender=Payment)
+def uncount_payment(sender, instance, **kwargs):
+    summaries.payment_changed(instance.transaction_id, (instance.status, instance.amount), None)
@@ -0,0 +1,177 @@
+"""
+Queued, batched and rate-limited outbound SMS for AGRITRACE
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from agritrace.utils import normalize_phone_number
+from .clients import africas_talking_client
+from .models import OutboundSMS
+
+
+logger = logging.getLogger(__name__)
+
+# Africa's Talking per-recipient status codes: accepted by the gateway, and
+# rejections that a retry cannot fix (invalid number, blacklisted, ...)
+ACCEPTED_STATUS_CODES = {100, 101, 102}
+PERMANENT_STATUS_CODES = {402, 403, 404, 406, 409}
+
+# Delivery report statuses that end a message
+DELIVERED_STATUSES = {'Success'}
+FAILED_STATUSES = {'Failed', 'Rejected', 'AbsentSubscriber', 'Expired'}
+
+
+class TokenBucket:
+    """
+    Allow rate requests per second with bursts of up to capacity
+    
+    Kept in process: send_queued_sms holds a lock, so a single sender
+    talks to the gateway at a time.
+    """
+    
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a token is available and take it"""
+        with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                time.sleep((1 - self.tokens) / self.rate)
+
+
+def queue_sms(recipients, message, sender_id='', user=None):
+    """
+    Store one OutboundSMS per distinct recipient and wake the sender once
+    the request commits
+    
+    Returns:
+        Number of messages queued
+    """
+    numbers = {normalize_phone_number(number) for number in recipients}
+    numbers.discard('')
+    rows = OutboundSMS.objects.bulk_create([
+        OutboundSMS(phone_number=number, message=message, sender_id=sender_id, requested_by=user)
+        for number in sorted(numbers)
+    ], batch_size=1000)
+    if rows:
+        transaction.on_commit(wake_sender)
+    return len(rows)
+
+
+def wake_sender():
+    """Have the queue drained now rather than at the next beat run"""
+    from .tasks import send_queued_sms
+    
+    try:
+        send_queued_sms.apply_async(retry=False)
+    except Exception:
+        # Queued rows stay due, so the send-queued-sms beat entry sends them
+        logger.warning('Could not queue the SMS sender', exc_info=True)
+
+
+def due_messages(now=None):
+    """Queued messages whose next attempt is due"""
+    now = now or timezone.now()
+    return OutboundSMS.objects.filter(status='queued').exclude(next_attempt_at__gt=now)
+
+
+def send_due_messages(bucket, limit=None):
+    """
+    Send due messages, one gateway request per message text and sender ID
+    with up to SMS_MAX_RECIPIENTS recipients each
+    
+    Returns:
+        Number of messages handed to the gateway
+    """
+    limit = limit or settings.SMS_MAX_RECIPIENTS * 10
+    groups = {}
+    for sms in due_messages().order_by('created_at')[:limit]:
+        groups.setdefault((sms.message, sms.sender_id), []).append(sms)
+    
+    handled = 0
+    for (message, sender_id), rows in groups.items():
+        for start in range(0, len(rows), settings.SMS_MAX_RECIPIENTS):
+            chunk = rows[start:start + settings.SMS_MAX_RECIPIENTS]
+            bucket.acquire()
+            result = africas_talking_client.send_sms(
+                [sms.phone_number for sms in chunk], message, sender_id or None
+            )
+            apply_send_result(chunk, result)
+            handled += len(chunk)
+    return handled
+
+
+def apply_send_result(rows, result):
+    """Record the gateway's answer for each recipient of one request"""
+    now = timezone.now()
+    if result.get('success'):
+        recipients = result['response'].get('SMSMessageData', {}).get('Recipients', [])
+        by_number = {recipient.get('number'): recipient for recipient in recipients}
+    else:
+        by_number = {}
+    
+    for sms in rows:
+        sms.attempts += 1
+        recipient = by_number.get(sms.phone_number)
+        if recipient is None:
+            _schedule_retry(sms, now, result.get('error') or 'No status returned for recipient')
+            continue
+        code = recipient.get('statusCode')
+        sms.gateway_status = recipient.get('status', '')
+        sms.gateway_message_id = recipient.get('messageId', '') or ''
+        sms.cost = recipient.get('cost', '') or ''
+        if code in ACCEPTED_STATUS_CODES:
+            sms.status = 'sent'
+            sms.sent_at = now
+            sms.error = ''
+        elif code in PERMANENT_STATUS_CODES:
+            sms.status = 'failed'
+            sms.error = sms.gateway_status
+        else:
+            _schedule_retry(sms, now, sms.gateway_status)
+        sms.updated_at = now
+    
+    OutboundSMS.objects.bulk_update(rows, [
+        'status', 'attempts', 'next_attempt_at', 'gateway_message_id', 'gateway_status',
+        'cost', 'error', 'sent_at', 'updated_at'
+    ])
+
+
+def _schedule_retry(sms, now, error):
+    sms.error = error
+    sms.updated_at = now
+    if sms.attempts >= settings.SMS_MAX_ATTEMPTS:
+        sms.status = 'failed'
+        return
+    delay = settings.SMS_RETRY_BACKOFF * 2 ** (sms.attempts - 1)
+    sms.next_attempt_at = now + timedelta(seconds=delay)
+
+
+def record_delivery_report(message_id, status, failure_reason=''):
+    """
+    Apply a delivery report from the gateway
+    
+    Returns:
+        Number of messages updated
+    """
+    fields = {'gateway_status': status, 'updated_at': timezone.now()}
+    if status in DELIVERED_STATUSES:
+        fields['status'] = 'delivered'
+    elif status in FAILED_STATUSES:
+        fields['status'] = 'failed'
+        fields['error'] = failure_reason or status
+    return OutboundSMS.objects.filter(gateway_message_id=message_id).update(**fields)
@@ -0,0 +1,222 @@
+"""
+Per-user summaries behind the USSD "My Products" and "Transaction History" screens
+"""
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from agritrace.utils import normalize_phone_number
+from products.models import Product
+from transactions.models import Payment, Transaction
+from users.models import User
+from .models import UserSummary
+
+
+OUTSTANDING_PAYMENT_STATUSES = ('pending', 'processing')
+
+
+def lookup(phone_number):
+    """
+    Summary of the account behind a phone number, in one indexed lookup
+    
+    Accounts that have no summary yet (created before summaries existed
+    and not covered by rebuild_ussd_summaries) get one on their first call.
+    
+    Returns:
+        UserSummary or None for unregistered numbers
+    """
+    normalized = normalize_phone_number(phone_number)
+    if not normalized:
+        return None
+    summary = UserSummary.objects.filter(phone_number=normalized).first()
+    if summary is None:
+        # Accounts store numbers as typed: international or local
+        candidates = {phone_number, normalized, normalized[1:]}
+        prefix = f'+{settings.PHONE_DEFAULT_COUNTRY_CODE}'
+        if normalized.startswith(prefix):
+            candidates.add('0' + normalized[len(prefix):])
+        user_id = User.objects.filter(phone_number__in=candidates).values_list('pk', flat=True).first()
+        if user_id is not None:
+            rebuild([user_id])
+            summary = UserSummary.objects.filter(user_id=user_id).first()
+    return summary
+
+
+def transaction_entry(instance, product_name):
+    """The JSON form of a transaction in UserSummary.recent_transactions"""
+    return {
+        'id': instance.pk,
+        'timestamp': instance.timestamp.isoformat(),
+        'type': instance.transaction_type,
+        'status': instance.status,
+        'quantity': str(instance.quantity),
+        'product': product_name,
+    }
+
+
+def _recent_transactions(user_id):
+    """Latest transactions of a user, read through the (user, -timestamp) indexes"""
+    limit = settings.USSD_RECENT_TRANSACTIONS
+    rows = []
+    for field in ('from_user_id', 'to_user_id'):
+        rows.extend(
+            Transaction.objects.filter(**{field: user_id}).select_related('product').only(
+                'timestamp', 'transaction_type', 'status', 'quantity', 'product__name'
+            ).order_by('-timestamp')[:limit]
+        )
+    rows = sorted({row.pk: row for row in rows}.values(), key=lambda row: row.timestamp, reverse=True)
+    return [transaction_entry(row, row.product.name) for row in rows[:limit]]
+
+
+def rebuild(user_ids=None):
+    """
+    Recompute the summaries of the given users (all by default) from raw rows
+    
+    Returns:
+        Number of summaries written
+    """
+    users = User.objects.all()
+    if user_ids is not None:
+        users = users.filter(pk__in=list(user_ids))
+    
+    written = 0
+    for user in users.only('pk', 'phone_number', 'user_type', 'preferred_language').iterator():
+        product_counts = dict(
+            Product.objects.filter(creator_id=user.pk).values_list('status').annotate(
+                count=Count('pk')
+            ).order_by()
+        )
+        outstanding = Payment.objects.filter(status__in=OUTSTANDING_PAYMENT_STATUSES)
+        due = outstanding.filter(transaction__from_user_id=user.pk).aggregate(
+            count=Count('pk'), amount=Sum('amount')
+        )
+        owed = outstanding.filter(transaction__to_user_id=user.pk).aggregate(
+            count=Count('pk'), amount=Sum('amount')
+        )
+        UserSummary.objects.update_or_create(user_id=user.pk, defaults={
+            'phone_number': normalize_phone_number(user.phone_number),
+            'user_type': user.user_type,
+            'preferred_language': user.preferred_language,
+            'product_counts': product_counts,
+            'recent_transactions': _recent_transactions(user.pk),
+            'payments_due_count': due['count'],
+            'payments_due_amount': due['amount'] or 0,
+            'payments_owed_count': owed['count'],
+            'payments_owed_amount': owed['amount'] or 0,
+        })
+        written += 1
+    return written
+
+
+def sync_user(user, created):
+    """Copy the fields the USSD session needs from the account"""
+    if created:
+        rebuild([user.pk])
+        return
+    updated = UserSummary.objects.filter(user_id=user.pk).update(
+        phone_number=normalize_phone_number(user.phone_number),
+        user_type=user.user_type,
+        preferred_language=user.preferred_language
+    )
+    if not updated:
+        rebuild([user.pk])
+
+
+def adjust_product_counts(user_id, changes):
+    """
+    Apply status count deltas to a user's product counts
+    
+    Args:
+        changes: Dict of status -> delta
+    """
+    changes = {status: delta for status, delta in changes.items() if delta}
+    if not changes:
+        return
+    with transaction.atomic():
+        summary = UserSummary.objects.select_for_update().filter(user_id=user_id).first()
+        if summary is None:
+            return
+        counts = summary.product_counts
+        for status, delta in changes.items():
+            counts[status] = max(0, counts.get(status, 0) + delta)
+            if not counts[status]:
+                del counts[status]
+        summary.save(update_fields=['product_counts', 'updated_at'])
+
+
+def product_changed(old, new):
+    """
+    Move a product between status counts
+    
+    Args:
+        old, new: (creator_id, status) before and after the write, or None
+    """
+    if old == new:
+        return
+    for sign, values in ((-1, old), (1, new)):
+        if values and values[0]:
+            adjust_product_counts(values[0], {values[1]: sign})
+
+
+def transaction_saved(instance, created):
+    """Put a new transaction at the head of both parties' lists, or update it in place"""
+    limit = settings.USSD_RECENT_TRANSACTIONS
+    entry = transaction_entry(
+        instance, Product.objects.filter(pk=instance.product_id).values_list('name', flat=True).first() or ''
+    )
+    with transaction.atomic():
+        summaries = UserSummary.objects.select_for_update().filter(
+            user_id__in={instance.from_user_id, instance.to_user_id}
+        )
+        for summary in summaries:
+            entries = [item for item in summary.recent_transactions if item['id'] != instance.pk]
+            if created or len(entries) < len(summary.recent_transactions):
+                entries.append(entry)
+                entries.sort(key=lambda item: item['timestamp'], reverse=True)
+                summary.recent_transactions = entries[:limit]
+                summary.save(update_fields=['recent_transactions', 'updated_at'])
+
+
+def transaction_deleted(instance):
+    """Refill the lists the transaction dropped out of"""
+    summaries = UserSummary.objects.filter(user_id__in={instance.from_user_id, instance.to_user_id})
+    for summary in summaries:
+        if any(item['id'] == instance.pk for item in summary.recent_transactions):
+            summary.recent_transactions = _recent_transactions(summary.user_id)
+            summary.save(update_fields=['recent_transactions', 'updated_at'])
+
+
+def payment_changed(transaction_id, old, new):
+    """
+    Move a payment in or out of the outstanding totals of both parties
+    
+    Args:
+        old, new: (status, amount) before and after the write, or None
+    """
+    def outstanding(values):
+        if values and values[0] in OUTSTANDING_PAYMENT_STATUSES:
+            return 1, values[1] or Decimal('0')
+        return 0, Decimal('0')
+    
+    (old_count, old_amount), (new_count, new_amount) = outstanding(old), outstanding(new)
+    count, amount = new_count - old_count, new_amount - old_amount
+    if not (count or amount):
+        return
+    parties = Transaction.objects.filter(pk=transaction_id).values_list('from_user_id', 'to_user_id').first()
+    if parties is None:
+        return
+    seller_id, buyer_id = parties
+    UserSummary.objects.filter(user_id=seller_id).update(
+        payments_due_count=F('payments_due_count') + count,
+        payments_due_amount=F('payments_due_amount') + amount
+    )
+    UserSummary.objects.filter(user_id=buyer_id).update(
+        payments_owed_count=F('payments_owed_count') + count,
+        payments_owed_amount=F('payments_owed_amount') + amount
+    )
+
+
+def tracks_fields(update_fields, fields):
+    """Whether a save limited to update_fields can touch any of fields"""
+    return update_fields is None or bool(set(update_fields) & set(fields))
+
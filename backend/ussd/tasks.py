@@ -0,0 +1,36 @@
+"""
+Celery tasks for USSD app
+"""
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from .sms import TokenBucket, send_due_messages
+
+
+SEND_LOCK_KEY = 'ussd:sms:send:lock'
+
+
+@shared_task
+def send_queued_sms():
+    """
+    Drain the outbound SMS queue within the gateway rate limit
+    
+    Runs from the beat schedule and after messages are queued; the lock
+    keeps a single sender, so the token bucket holds for the whole process.
+    
+    Returns:
+        Number of messages handed to the gateway
+    """
+    if not cache.add(SEND_LOCK_KEY, True, 10 * 60):
+        return 0
+    
+    try:
+        bucket = TokenBucket(settings.SMS_RATE_PER_SECOND, settings.SMS_BURST)
+        total = 0
+        while True:
+            handled = send_due_messages(bucket)
+            total += handled
+            if not handled:
+                return total
+    finally:
+        cache.delete(SEND_LOCK_KEY)
@@ -0,0 +1,216 @@
+"""
+Tests for USSD app
+"""
+import datetime
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from products.models import Product
+from users.models import User
+from .models import OutboundSMS
+from .sms import TokenBucket, queue_sms, record_delivery_report, send_due_messages
+
+
+PHONE = '+250788123456'
+
+
+@override_settings(AFRICAS_TALKING_CALLBACK_TOKEN='callback-secret')
+@mock.patch('ussd.screens.activity_log')
+@mock.patch('ussd.screens.queue_verification')
+class USSDMenuTests(TestCase):
+    """Menu flows driven through the gateway callback"""
+    
+    def setUp(self):
+        cache.clear()
+        self.farmer = User.objects.create(
+            username='farmer', phone_number='0788123456', user_type='farmer', preferred_language='en'
+        )
+        self.product = Product.objects.create(
+            name='Iron Beans', variety='RWV 3006', iron_content=85, creator=self.farmer,
+            quantity=500, harvest_date=datetime.date(2025, 6, 1)
+        )
+        self.client = APIClient()
+    
+    def hop(self, session_id, text, phone=PHONE, token='callback-secret'):
+        response = self.client.post(f'/api/v1/ussd/callback/?token={token}', {
+            'sessionId': session_id, 'serviceCode': '*384#', 'phoneNumber': phone, 'text': text
+        })
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        return response.content.decode()
+    
+    def test_callback_requires_the_token(self, queue_verification, activity_log):
+        response = self.client.post('/api/v1/ussd/callback/?token=wrong', {
+            'sessionId': 's1', 'phoneNumber': PHONE, 'text': ''
+        })
+        self.assertEqual(response.status_code, 403)
+    
+    def test_main_menu(self, queue_verification, activity_log):
+        response = self.hop('s1', '')
+        self.assertTrue(response.startswith('CON Welcome to AGRITRACE'))
+        self.assertIn('1. Verify Product', response)
+    
+    def test_verify_product(self, queue_verification, activity_log):
+        self.hop('s1', '')
+        self.assertEqual(self.hop('s1', '1'), 'CON Enter QR Code to verify:')
+        response = self.hop('s1', f'1*{self.product.qr_code}')
+        self.assertTrue(response.startswith('END Iron Beans (RWV 3006)'))
+        self.assertIn('Checked 0 times before', response)
+        queue_verification.assert_called_once_with(
+            product_id=self.product.pk, user_id=self.farmer.pk, verification_type='manual',
+            result='authentic', verification_method='ussd'
+        )
+    
+    def test_verify_unknown_product(self, queue_verification, activity_log):
+        response = self.hop('s1', '1*QR-UNKNOWN')
+        self.assertEqual(response, 'END Product QR-UNKNOWN was not found. It may not be genuine.')
+        queue_verification.assert_not_called()
+    
+    def test_register_product(self, queue_verification, activity_log):
+        self.hop('s1', '')
+        self.hop('s1', '2')
+        self.assertEqual(self.hop('s1', '2*1'), 'CON Quantity harvested (kg):')
+        self.assertEqual(self.hop('s1', '2*1*250'), 'CON Confirm registration?\n1. Yes\n2. Cancel\n0. Back')
+        response = self.hop('s1', '2*1*250*1')
+        self.assertEqual(response, 'END Registration of 250 kg of Biofortified Beans received.')
+        self.assertEqual(activity_log.log.call_count, 1)
+    
+    def test_gateway_retry_is_answered_once(self, queue_verification, activity_log):
+        first = self.hop('s1', '2*1*250*1')
+        self.assertEqual(self.hop('s1', '2*1*250*1'), first)
+        self.assertEqual(activity_log.log.call_count, 1)
+    
+    def test_invalid_quantity_is_asked_again(self, queue_verification, activity_log):
+        for quantity in ('abc', 'NaN', 'Infinity'):
+            with self.subTest(quantity=quantity):
+                response = self.hop(f's-{quantity}', f'2*1*{quantity}')
+                self.assertEqual(response, 'CON Enter the quantity in kg, e.g. 250\nQuantity harvested (kg):')
+        self.assertEqual(self.hop('s-zero', '2*1*0'), 'CON Quantity must be greater than 0\nQuantity harvested (kg):')
+    
+    def test_cancel_and_back(self, queue_verification, activity_log):
+        self.assertEqual(self.hop('s1', '2*1*250*2'), 'END Registration cancelled.')
+        self.assertTrue(self.hop('s2', '2*0').startswith('CON Welcome to AGRITRACE'))
+    
+    def test_invalid_option(self, queue_verification, activity_log):
+        self.assertTrue(self.hop('s1', '9').startswith('CON Invalid option.\nWelcome to AGRITRACE'))
+    
+    def test_unregistered_number(self, queue_verification, activity_log):
+        self.assertEqual(self.hop('s1', '3', phone='+250700000000'), 'END This number is not registered with AGRITRACE.')
+    
+    def test_my_products_and_transactions(self, queue_verification, activity_log):
+        self.assertEqual(self.hop('s1', '3'), 'END You have 1 registered products.\nRegistered: 1')
+        self.assertEqual(self.hop('s2', '4'), 'END You have no transactions yet.')
+
+
+class SMSQueueTests(TestCase):
+    """Queued outbound SMS, sent in batches within the gateway rate limit"""
+    
+    def setUp(self):
+        self.bucket = mock.Mock()
+    
+    def gateway_reply(self, recipients, message, sender_id=None):
+        codes = {'+250788000001': 101, '+250788000002': 403, '+250788000003': 500}
+        return {'success': True, 'response': {'SMSMessageData': {'Recipients': [
+            {'number': number, 'statusCode': codes[number], 'status': 'Success', 'messageId': f'ATX-{number}', 'cost': 'RWF 10'}
+            for number in recipients
+        ]}}}
+    
+    def test_queue_normalises_and_deduplicates_numbers(self):
+        queued = queue_sms(['0788000001', '+250788000001', '250788000002', ''], 'Harvest pickup tomorrow')
+        self.assertEqual(queued, 2)
+        self.assertEqual(
+            sorted(OutboundSMS.objects.values_list('phone_number', flat=True)),
+            ['+250788000001', '+250788000002']
+        )
+    
+    @override_settings(SMS_MAX_RECIPIENTS=2)
+    def test_send_groups_recipients_and_applies_statuses(self):
+        queue_sms(['0788000001', '0788000002', '0788000003'], 'Harvest pickup tomorrow')
+        with mock.patch('ussd.sms.africas_talking_client.send_sms', side_effect=self.gateway_reply) as send_sms:
+            self.assertEqual(send_due_messages(self.bucket), 3)
+        self.assertEqual(send_sms.call_count, 2)
+        self.assertEqual(self.bucket.acquire.call_count, 2)
+        
+        statuses = dict(OutboundSMS.objects.values_list('phone_number', 'status'))
+        self.assertEqual(statuses, {'+250788000001': 'sent', '+250788000002': 'failed', '+250788000003': 'queued'})
+        retry = OutboundSMS.objects.get(phone_number='+250788000003')
+        self.assertEqual(retry.attempts, 1)
+        self.assertIsNotNone(retry.next_attempt_at)
+        
+        # The retry is not due yet
+        with mock.patch('ussd.sms.africas_talking_client.send_sms') as send_sms:
+            self.assertEqual(send_due_messages(self.bucket), 0)
+        send_sms.assert_not_called()
+    
+    def test_delivery_reports(self):
+        queue_sms(['0788000001', '0788000003'], 'Harvest pickup tomorrow')
+        OutboundSMS.objects.filter(phone_number='+250788000001').update(status='sent', gateway_message_id='ATX-1')
+        OutboundSMS.objects.filter(phone_number='+250788000003').update(status='sent', gateway_message_id='ATX-3')
+        self.assertEqual(record_delivery_report('ATX-1', 'Success'), 1)
+        self.assertEqual(record_delivery_report('ATX-3', 'AbsentSubscriber'), 1)
+        self.assertEqual(record_delivery_report('ATX-unknown', 'Success'), 0)
+        
+        delivered = OutboundSMS.objects.get(gateway_message_id='ATX-1')
+        failed = OutboundSMS.objects.get(gateway_message_id='ATX-3')
+        self.assertEqual((delivered.status, delivered.gateway_status), ('delivered', 'Success'))
+        self.assertEqual((failed.status, failed.error), ('failed', 'AbsentSubscriber'))
+    
+    @override_settings(AFRICAS_TALKING_CALLBACK_TOKEN='callback-secret')
+    def test_delivery_report_view_requires_the_token(self):
+        queue_sms(['0788000001'], 'Harvest pickup tomorrow')
+        OutboundSMS.objects.update(status='sent', gateway_message_id='ATX-1')
+        client = APIClient()
+        
+        response = client.post('/api/v1/ussd/sms/delivery/?token=wrong', {'id': 'ATX-1', 'status': 'Success'})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(OutboundSMS.objects.get().status, 'sent')
+        
+        response = client.post('/api/v1/ussd/sms/delivery/?token=callback-secret', {'id': 'ATX-1', 'status': 'Success'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(OutboundSMS.objects.get().status, 'delivered')
+    
+    @override_settings(AFRICAS_TALKING_CALLBACK_TOKEN='')
+    def test_delivery_reports_are_refused_without_a_configured_token(self):
+        response = APIClient().post('/api/v1/ussd/sms/delivery/?token=', {'id': 'ATX-1', 'status': 'Success'})
+        self.assertEqual(response.status_code, 403)
+
+
+class TokenBucketTests(TestCase):
+    """The in-process rate limiter of the SMS sender"""
+    
+    def setUp(self):
+        # A fake clock, advanced by sleep(); rates and times are exact in binary
+        self.now = 0.0
+        patcher = mock.patch('ussd.sms.time')
+        clock = patcher.start()
+        self.addCleanup(patcher.stop)
+        clock.monotonic.side_effect = lambda: self.now
+        clock.sleep.side_effect = self.sleep
+        self.slept = 0
+    
+    def sleep(self, seconds):
+        self.slept += seconds
+        self.now += seconds
+    
+    def test_burst_is_not_delayed(self):
+        bucket = TokenBucket(rate=4, capacity=4)
+        for _ in range(4):
+            bucket.acquire()
+        self.assertEqual(self.slept, 0)
+    
+    def test_requests_past_the_burst_wait_for_the_rate(self):
+        bucket = TokenBucket(rate=4, capacity=4)
+        for _ in range(12):
+            bucket.acquire()
+        self.assertEqual(self.slept, 2.0)
+    
+    def test_idle_time_refills_up_to_capacity(self):
+        bucket = TokenBucket(rate=4, capacity=4)
+        for _ in range(4):
+            bucket.acquire()
+        self.now += 60
+        for _ in range(4):
+            bucket.acquire()
+        self.assertEqual(self.slept, 0)
+        bucket.acquire()
+        self.assertEqual(self.slept, 0.25)
@@ -7,4 +7,5 @@ from . import views
 urlpatterns = [
     path('callback/', views.USSDCallbackView.as_view(), name='ussd_callback'),
     path('sms/', views.SendSMSView.as_view(), name='send_sms'),
+    path('sms/delivery/', views.DeliveryReportView.as_view(), name='sms_delivery_report'),
 ]
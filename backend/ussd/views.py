@@ -1,10 +1,26 @@
 """
 Views for USSD app
 """
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
-from .africas_talking import africas_talking_client
+from rest_framework.permissions import AllowAny, IsAdminUser
+from users.models import User
+from .screens import ussd_menu
+from .sms import queue_sms, record_delivery_report
+
+
+def valid_callback_token(request):
+    """
+    Whether a gateway callback carries AFRICAS_TALKING_CALLBACK_TOKEN
+    
+    The gateway calls the URLs registered with it, which carry the token
+    as ?token=. Callbacks are refused while the setting is unset.
+    """
+    token = settings.AFRICAS_TALKING_CALLBACK_TOKEN
+    return bool(token) and constant_time_compare(request.query_params.get('token', ''), token)
 
 
 class USSDCallbackView(APIView):
@@ -12,35 +28,63 @@ class USSDCallbackView(APIView):
     permission_classes = (AllowAny,)
     
     def post(self, request):
+        if not valid_callback_token(request):
+            return HttpResponse('Invalid callback token', content_type='text/plain', status=403)
+        
         session_id = request.data.get('sessionId')
-        service_code = request.data.get('serviceCode')
         phone_number = request.data.get('phoneNumber')
         text = request.data.get('text', '')
         
-        response_text = africas_talking_client.handle_ussd_request(
-            session_id=session_id,
-            service_code=service_code,
-            phone_number=phone_number,
-            text=text
-        )
+        # Answered from the session cache; the SMS client is not needed here
+        response_text = ussd_menu.handle(session_id, phone_number, text)
         
-        return Response(response_text, content_type='text/plain')
+        # Gateways read the body as is, so it must not go through a JSON renderer
+        return HttpResponse(response_text, content_type='text/plain')
 
 
 class SendSMSView(APIView):
-    """Send SMS to users"""
-    permission_classes = (AllowAny,)
+    """Queue SMS to phone numbers or to the members of a cooperative"""
+    permission_classes = (IsAdminUser,)
     
     def post(self, request):
         recipients = request.data.get('recipients', [])
         message = request.data.get('message', '')
+        sender_id = request.data.get('sender_id', '')
+        cooperative_name = request.data.get('cooperative_name')
         
-        result = africas_talking_client.send_sms(recipients, message)
-        
-        if result.get('success'):
-            return Response({'detail': 'SMS sent successfully'})
-        else:
-            return Response(
-                {'detail': result.get('error', 'Failed to send SMS')},
-                status=400
+        if isinstance(recipients, str):
+            recipients = [recipients]
+        if cooperative_name:
+            recipients = list(recipients) + list(
+                User.objects.filter(cooperative_name=cooperative_name, is_active=True)
+                .values_list('phone_number', flat=True)
             )
+        
+        if not message:
+            return Response({'detail': 'message is required'}, status=400)
+        if len(sender_id) > 11:
+            return Response({'detail': 'sender_id must be at most 11 characters'}, status=400)
+        
+        queued = queue_sms(recipients, message, sender_id=sender_id, user=request.user)
+        if not queued:
+            return Response({'detail': 'No valid recipients'}, status=400)
+        return Response({'detail': 'SMS queued', 'queued': queued}, status=202)
+
+
+class DeliveryReportView(APIView):
+    """Handle SMS delivery reports from Africa's Talking"""
+    permission_classes = (AllowAny,)
+    
+    def post(self, request):
+        if not valid_callback_token(request):
+            return Response({'detail': 'Invalid callback token'}, status=403)
+        
+        message_id = request.data.get('id')
+        status = request.data.get('status', '')
+        if not message_id:
+            return Response({'detail': 'id is required'}, status=400)
+        
+        record_delivery_report(message_id, status, request.data.get('failureReason', ''))
+        # Always acknowledged, so the gateway does not redeliver reports of
+        # messages sent before the queue existed
+        return Response({'detail': 'ok'})
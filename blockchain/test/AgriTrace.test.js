@@ -236,6 +236,67 @@ contract("AgriTrace", accounts => {
     });
   });
 
+  describe("Root Anchoring", () => {
+    const root = web3.utils.keccak256("ANCHOR-BATCH-001");
+    const leafCount = 1024;
+
+    beforeEach(async () => {
+      await agriTrace.verifyUser(farmer, { from: owner });
+    });
+
+    it("should anchor a root successfully", async () => {
+      const tx = await agriTrace.anchorRoot(root, leafCount, { from: farmer });
+
+      assert.equal(tx.logs[0].event, "RootAnchored", "Should emit RootAnchored event");
+      assert.equal(tx.logs[0].args.root, root);
+      assert.equal(tx.logs[0].args.leafCount.toNumber(), leafCount);
+      assert.equal(tx.logs[0].args.anchoredBy, farmer);
+
+      const anchoredAt = await agriTrace.anchoredRoots(root);
+      assert.equal(anchoredAt.toNumber(), tx.logs[0].args.timestamp.toNumber());
+    });
+
+    it("should not allow anchoring the same root twice", async () => {
+      await agriTrace.anchorRoot(root, leafCount, { from: farmer });
+
+      try {
+        await agriTrace.anchorRoot(root, leafCount, { from: farmer });
+        assert.fail("Should have thrown an error");
+      } catch (error) {
+        assert.include(error.message, "Root already anchored");
+      }
+    });
+
+    it("should not allow anchoring an empty root", async () => {
+      try {
+        await agriTrace.anchorRoot("0x" + "0".repeat(64), leafCount, { from: farmer });
+        assert.fail("Should have thrown an error");
+      } catch (error) {
+        assert.include(error.message, "Invalid root");
+      }
+    });
+
+    it("should not allow unverified users to anchor roots", async () => {
+      try {
+        await agriTrace.anchorRoot(root, leafCount, { from: trader });
+        assert.fail("Should have thrown an error");
+      } catch (error) {
+        assert.include(error.message, "User not verified");
+      }
+    });
+
+    it("should not allow anchoring while paused", async () => {
+      await agriTrace.pause({ from: owner });
+
+      try {
+        await agriTrace.anchorRoot(root, leafCount, { from: farmer });
+        assert.fail("Should have thrown an error");
+      } catch (error) {
+        assert.include(error.message, "Pausable: paused");
+      }
+    });
+  });
+
   describe("Pausable Functionality", () => {
     it("should allow owner to pause contract", async () => {
       await agriTrace.pause({ from: owner });